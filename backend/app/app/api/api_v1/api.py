@@ -1,11 +1,23 @@
 from fastapi import APIRouter
 
-from app.api.api_v1.endpoints import items, login, users, utils, university, track, course
+from app.api.api_v1.endpoints import (
+    caches,
+    course,
+    items,
+    login,
+    search,
+    track,
+    university,
+    users,
+    utils,
+)
 
 api_router = APIRouter()
 api_router.include_router(university.router, prefix="/universities")
 api_router.include_router(track.router, prefix="/universities/{university_id}/tracks")
 api_router.include_router(course.router, prefix="/universities/{university_id}/courses")
+api_router.include_router(search.router, prefix="/universities/{university_id}/search")
+api_router.include_router(caches.router, prefix="/caches")
 # api_router.include_router(login.router, tags=["login"])
 # api_router.include_router(users.router, prefix="/users", tags=["users"])
 # api_router.include_router(utils.router, prefix="/utils", tags=["utils"])
@@ -0,0 +1,14 @@
+from typing import Any, List
+
+from fastapi import APIRouter
+
+from app import schemas
+from app.core.cache import caches
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[schemas.CacheStats])
+def read_cache_stats() -> Any:
+    """ Returns the size and hit/miss counters of this process's in-memory caches """
+    return [cache.stats() for cache in caches.values()]
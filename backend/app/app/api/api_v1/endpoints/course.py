@@ -1,44 +1,114 @@
-from typing import Any, List
+from typing import Any, List, cast
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Query as SQLQuery
 from sqlalchemy.orm import Session
 
-from app import models, schemas
+from app import crud, models, schemas
 from app.api import deps
+from app.api.caching import CachedRoute
+from app.dag import required_by
+from app.search import (
+    CourseFilters,
+    autocomplete_courses,
+    facet_counts,
+    filtered_course_ids,
+)
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
+
+
+def _courses_query(db: Session, university_id: int, filters: CourseFilters) -> SQLQuery:
+    query = (
+        db.query(models.Course)
+        .filter(models.Course.university_id == university_id)
+        .join(models.Term)
+    )
+    if filters:
+        query = query.filter(
+            models.Course.id.in_(filtered_course_ids(university_id, filters))
+        )
+    return query
 
 
 @router.get("/", response_model=List[schemas.Course])
 def read_courses(
     university_id: int,
     db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
+    pagination: deps.Pagination = Depends(),
+    filters: CourseFilters = Depends(deps.get_course_filters),
+    fields: deps.Fields = Depends(),
 ) -> Any:
-    courses = (
-        db.query(models.Course)
-        .filter(models.Course.university_id == university_id)
-        .join(models.Term)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
-    return courses
+    query = _courses_query(db, university_id, filters)
+    query = fields.load(query, models.Course, schemas.Course)
+    return fields.render(pagination.page(db, crud.course, query), schemas.Course)
+
+
+@router.get("/facets", response_model=schemas.CourseFacets)
+def read_course_facets(
+    university_id: int,
+    db: Session = Depends(deps.get_db),
+    pagination: deps.Pagination = Depends(),
+    filters: CourseFilters = Depends(deps.get_course_filters),
+) -> Any:
+    """ Lists a page of courses like the course list, along with the number of courses
+        of every value of every filter. Counts are computed in memory, over the
+        university's catalog, which is loaded by a single query and cached until
+        the university changes. """
+    query = _courses_query(db, university_id, filters)
+    options = crud.loading_plan(models.Course, schemas.Course)
+    # the stubs type the generative methods of queries as returning nothing
+    courses = pagination.page(db, crud.course, cast(Any, query).options(*options))
+    return {
+        "university_id": university_id,
+        "courses": courses,
+        **facet_counts(db, university_id, filters),
+    }
+
+
+@router.get("/autocomplete", response_model=List[schemas.CourseSuggestion])
+def autocomplete(
+    university_id: int,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """ Completes a prefix of a course's id, of its name in any language, or of a word
+        in its name. Served from memory, only reading the university's data version,
+        unless the university's courses changed since the last completion. """
+    return autocomplete_courses(db, university_id, q, limit)
 
 
 @router.get("/{course_id}", response_model=schemas.Course)
 def read_course(
-    university_id: int, course_id: str, db: Session = Depends(deps.get_db),
+    university_id: int,
+    course_id: str,
+    db: Session = Depends(deps.get_db),
+    fields: deps.Fields = Depends(),
 ) -> Any:
-    course = (
-        db.query(models.Course)
-        .filter(
-            (models.Course.university_id == university_id)
-            & (models.Course.id == course_id)
-        )
-        .first()
+    query = db.query(models.Course).filter(
+        (models.Course.university_id == university_id) & (models.Course.id == course_id)
     )
+    course = fields.load(query, models.Course, schemas.Course).first()
     if not course:
         raise HTTPException(status_code=404)
-    return course
+    return fields.render(course, schemas.Course)
+
+
+@router.get("/{course_id}/required-by", response_model=schemas.CourseRequiredBy)
+def read_course_required_by(
+    university_id: int, course_id: str, db: Session = Depends(deps.get_db),
+) -> Any:
+    """ Lists the tracks requiring a course, along with the DAG nodes and course sets
+        through which they do, and their depth in the track's DAG """
+    rows = required_by(db, university_id, course_id)
+    if (
+        not rows
+        and not db.query(
+            db.query(models.Course)
+            .filter_by(university_id=university_id, id=course_id)
+            .exists()
+        ).scalar()
+    ):
+        raise HTTPException(status_code=404)
+    return {"university_id": university_id, "course_id": course_id, "required_by": rows}
@@ -0,0 +1,29 @@
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.api import deps
+from app.search import KINDS, search_names
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[schemas.SearchResult])
+def search(
+    university_id: int,
+    q: str = Query(..., min_length=1, max_length=200),
+    kinds: Optional[List[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """ Searches the courses, tracks, faculties and departments of a university by
+        their names in any language, or by their ids. Matches words by prefix, and
+        longer words with up to a single typo. """
+    unknown = set(kinds or ()) - set(KINDS)
+    if unknown:
+        raise HTTPException(
+            status_code=422, detail=f"Unknown kinds {sorted(unknown)}, expected {KINDS}"
+        )
+    return search_names(db, university_id, q, kinds, limit)
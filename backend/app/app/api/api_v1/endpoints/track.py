@@ -1,48 +1,80 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from sqlalchemy import literal, select, null, cast, Integer
-from sqlalchemy.orm import with_polymorphic, aliased
-from sqlalchemy.sql import column, label
 
-from app import models, schemas
+from app import crud, models, schemas
 from app.api import deps
+from app.api.caching import CachedRoute
+from app.core.config import settings
+from app.dag import (
+    bulk_audit,
+    diff_track,
+    get_compiled_dag,
+    get_frontier,
+    get_track_requirements,
+    plan_track,
+    track_graphs,
+)
+
+router = APIRouter(route_class=CachedRoute)
 
-router = APIRouter()
 
 @router.get("/", response_model=List[schemas.Track])
 def read_tracks(
     university_id: int,
     db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
+    pagination: deps.Pagination = Depends(),
+    fields: deps.Fields = Depends(),
 ) -> Any:
-    tracks = (
-        db.query(models.Track)
-        .filter(models.Track.university_id == university_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
+    query = db.query(models.Track).filter(models.Track.university_id == university_id)
+    query = fields.load(query, models.Track, schemas.Track)
+    return fields.render(pagination.page(db, crud.track, query), schemas.Track)
+
+
+@router.get("/dags", response_model=schemas.TrackGraphs)
+def get_track_dags(
+    university_id: int,
+    db: Session = Depends(deps.get_db),
+    track_ids: Optional[List[str]] = Query(None),
+    faculty_id: Optional[str] = None,
+    department_id: Optional[str] = None,
+) -> Any:
+    """ Returns the DAGs of many tracks in the format of `/{track_id}/graph`: either
+        the given tracks, or all tracks of a department. Nodes shared by several
+        tracks appear once, and tracks without a DAG are omitted from `roots`.
+    """
+    if track_ids:
+        return track_graphs(db, university_id, track_ids)
+    if faculty_id is None or department_id is None:
+        raise HTTPException(
+            status_code=422,
+            detail="Either track_ids, or faculty_id and department_id are required",
+        )
+    track_department = models.track_department
+    department_tracks = select(track_department.c.track_id).where(
+        (track_department.c.university_id == university_id)
+        & (track_department.c.faculty_id == faculty_id)
+        & (track_department.c.department_id == department_id)
     )
-    return tracks
+    return track_graphs(db, university_id, department_tracks)
 
 
 @router.get("/{track_id}", response_model=schemas.Track)
 def read_track(
-    university_id: int, track_id: str, db: Session = Depends(deps.get_db),
+    university_id: int,
+    track_id: str,
+    db: Session = Depends(deps.get_db),
+    fields: deps.Fields = Depends(),
 ) -> Any:
-    track = (
-        db.query(models.Track)
-        .filter(
-            (models.Track.university_id == university_id)
-            & (models.Track.id == track_id)
-        )
-        .first()
+    query = db.query(models.Track).filter(
+        (models.Track.university_id == university_id) & (models.Track.id == track_id)
     )
+    track = fields.load(query, models.Track, schemas.Track).first()
     if not track:
         raise HTTPException(status_code=404)
-    return track
+    return fields.render(track, schemas.Track)
 
 
 @router.get("/{track_id}/dag", response_model=List[Any])
@@ -50,40 +82,153 @@ def get_track_dag(
     university_id: int,
     track_id: str,
     db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=settings.TRACK_DAG_MAX_ROWS),
+    max_depth: int = Query(10, ge=0, le=settings.TRACK_DAG_MAX_DEPTH),
 ) -> Any:
     """ Returns all nodes in the DAG of given track, along with their parent and distance
-        from root. Nodes which have multiple parents appear multiple times
+        from root. Nodes which have multiple parents appear multiple times, once per
+        path, see `/{track_id}/graph` for a more compact format.
     """
 
-    rec_base = (
-        db.query(
-            models.DAGNode,
-            literal(0).label("distance"),
-            cast(null(), Integer).label("parent_id"),
-        )
-        .filter(
-            (models.DAGRootNode.university_id == university_id)
-            & (models.DAGRootNode.track_id == track_id)
-            & (models.DAGNode.node_type == "DAGRootNode")
-        )
-        .cte(name="descendants", recursive=True)
+    dag = get_compiled_dag(db, university_id, track_id)
+    if dag is None:
+        raise HTTPException(status_code=404)
+    return dag.descendant_rows(max_depth, skip, limit)
+
+
+@router.get("/{track_id}/graph", response_model=schemas.TrackGraph)
+def get_track_graph(
+    university_id: int, track_id: str, db: Session = Depends(deps.get_db),
+) -> Any:
+    """ Returns the entire DAG of given track: every node once, keyed by its id,
+        and the edges between them as (from_node_id, to_node_id) pairs
+    """
+    dag = get_compiled_dag(db, university_id, track_id)
+    if dag is None:
+        raise HTTPException(status_code=404)
+    return Response(content=dag.graph_json(), media_type="application/json")
+
+
+@router.get("/{track_id}/diff/{other_university_id}", response_model=schemas.TrackDiff)
+def diff_track_dag(
+    university_id: int,
+    track_id: str,
+    other_university_id: int,
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """ Compares the DAG of a track with the DAG of the same track in another
+        university, e.g, a snapshot of the same university from another year """
+    changes = diff_track(db, university_id, other_university_id, track_id)
+    if changes is None:
+        raise HTTPException(status_code=404)
+    return {
+        "university_id": university_id,
+        "other_university_id": other_university_id,
+        "track_id": track_id,
+        "changes": changes,
+    }
+
+
+@router.post("/{track_id}/audit", response_model=schemas.TrackAudit)
+def audit_track(
+    university_id: int,
+    track_id: str,
+    audit_in: schemas.AuditRequest,
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """ Evaluates whether the given completed courses satisfy the requirements of a
+        track, returning the result of every node in the track's DAG """
+    requirements = get_track_requirements(db, university_id, track_id)
+    if requirements is None:
+        raise HTTPException(status_code=404)
+    return requirements.audit_courses(audit_in.completed_courses)
+
+
+@router.post("/{track_id}/audit/bulk", response_model=schemas.BulkAudit)
+def bulk_audit_track(
+    university_id: int,
+    track_id: str,
+    audit_in: schemas.BulkAuditRequest,
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """ Audits the completed courses of many students against a track at once """
+    requirements = get_track_requirements(db, university_id, track_id)
+    if requirements is None:
+        raise HTTPException(status_code=404)
+    result = bulk_audit(
+        requirements, [student.completed_courses for student in audit_in.students]
     )
+    return {
+        "university_id": university_id,
+        "track_id": track_id,
+        "results": [
+            {
+                "satisfied": satisfied,
+                "missing_credits": missing_credits,
+                "earned_credits": earned_credits,
+            }
+            for satisfied, missing_credits, earned_credits in zip(
+                result.satisfied.tolist(),
+                result.missing_credits.tolist(),
+                result.earned_credits.tolist(),
+            )
+        ],
+    }
 
-    parent = aliased(rec_base, name="parent")
-    child = aliased(models.DAGNode, name="child")
 
-    rec_base = rec_base.union_all(
-        db.query(child, parent.c.distance + 1, parent.c.node_id)
-        .join(child, models.DAGNode.children)
-        .filter(
-            (parent.c.distance <= 10) & (models.DAGNode.node_id == parent.c.node_id)
-        )
+@router.post("/{track_id}/frontier", response_model=schemas.TrackFrontier)
+def get_track_frontier(
+    university_id: int,
+    track_id: str,
+    frontier_in: schemas.FrontierRequest,
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """ Returns the course sets of a track which can be taken next given the completed
+        courses: those whose prerequisites (parents in the DAG) are all passed, but
+        which weren't completed yet """
+    frontier = get_frontier(
+        db,
+        university_id,
+        track_id,
+        frontier_in.completed_courses,
+        frontier_in.added_courses,
     )
+    if frontier is None:
+        raise HTTPException(status_code=404)
+    return frontier.courses()
 
-    result = db.query(rec_base).all()
 
-    if not result:
+@router.post("/{track_id}/plan", response_model=schemas.TrackPlan)
+def plan_track_completion(
+    university_id: int,
+    track_id: str,
+    plan_in: schemas.PlanRequest,
+    db: Session = Depends(deps.get_db),
+    time_budget_ms: int = Query(1000, ge=1, le=30000),
+) -> Any:
+    """ Finds the cheapest set of courses completing a track, by total credits or by
+        number of terms. If the search doesn't complete within the time budget, the
+        best plan found so far is returned """
+    requirements = get_track_requirements(db, university_id, track_id)
+    if requirements is None:
         raise HTTPException(status_code=404)
-    return result
+    plan = plan_track(
+        requirements,
+        plan_in.completed_courses,
+        plan_in.objective,
+        time_budget_ms / 1000,
+    )
+    if plan is None:
+        raise HTTPException(
+            status_code=422, detail="No plan completing the track was found"
+        )
+    return {
+        "university_id": university_id,
+        "track_id": track_id,
+        "objective": plan_in.objective,
+        "course_ids": plan.course_ids,
+        "total_credits": plan.credits,
+        "terms": plan.terms,
+        "optimal": plan.optimal,
+    }
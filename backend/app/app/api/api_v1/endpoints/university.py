@@ -1,30 +1,130 @@
-from typing import Any, List
+import json
+from typing import Any, Dict, List, Sequence
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import DataError, IntegrityError
 from sqlalchemy.orm import Session
 
-from app import models, schemas
+from app import crud, models, schemas
 from app.api import deps
+from app.api.caching import CachedRoute
+from app.core.config import settings
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 @router.get("/", response_model=List[schemas.University])
 def read_universities(
-    db: Session = Depends(deps.get_db), skip: int = 0, limit: int = 100
+    db: Session = Depends(deps.get_db),
+    pagination: deps.Pagination = Depends(),
+    fields: deps.Fields = Depends(),
 ) -> Any:
-    unis = db.query(models.University).offset(skip).limit(limit).all()
-    return unis
+    query = fields.load(
+        db.query(models.University), models.University, schemas.University
+    )
+    universities = pagination.page(db, crud.university, query)
+    return fields.render(universities, schemas.University)
 
 
 @router.get("/{university_id}", response_model=schemas.University)
-def read_university(university_id: int, db: Session = Depends(deps.get_db)) -> Any:
+def read_university(
+    university_id: int,
+    db: Session = Depends(deps.get_db),
+    fields: deps.Fields = Depends(),
+) -> Any:
+    query = db.query(models.University).filter(models.University.id == university_id)
+    uni = fields.load(query, models.University, schemas.University).first()
+    if not uni:
+        raise HTTPException(status_code=404)
+    return fields.render(uni, schemas.University)
+
 
-    uni = (
-        db.query(models.University)
-        .filter(models.University.id == university_id)
-        .first()
+@router.get("/{university_id}/diff/{other_university_id}")
+def diff_universities(
+    university_id: int, other_university_id: int, db: Session = Depends(deps.get_db),
+) -> Any:
+    """ Compares the catalog of a university with another, e.g a snapshot of the same
+        university from another year: its faculties, departments, tracks, courses
+        and course sets. Streams the changes turning one catalog into the other as
+        JSON lines, each with the `entity` kind, its `key`, the `change` (`added`,
+        `removed` or `changed`) and the `old` and `new` values of its fields. """
+    for uid in (university_id, other_university_id):
+        if crud.university.get(db, uid) is None:
+            raise HTTPException(status_code=404)
+    changes = crud.catalog_diff(db, university_id, other_university_id)
+    return StreamingResponse(
+        (json.dumps(change) + "\n" for change in changes),
+        media_type="application/x-ndjson",
     )
-    if not uni:
+
+
+# The batch endpoints are declared here rather than with the other course endpoints,
+# as their path extends the `courses` segment rather than nesting under it
+
+
+def _course_batch(
+    db: Session, university_id: int, ids: Sequence[str]
+) -> Dict[str, Any]:
+    if len(ids) > settings.COURSE_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.COURSE_BATCH_MAX_IDS} ids may be requested",
+        )
+    courses, missing = crud.course.get_many(db, university_id=university_id, ids=ids)
+    return {"university_id": university_id, "courses": courses, "missing_ids": missing}
+
+
+@router.get("/{university_id}/courses:batch", response_model=schemas.CourseBatch)
+def read_course_batch(
+    university_id: int, ids: List[str] = Query(...), db: Session = Depends(deps.get_db),
+) -> Any:
+    """ Gets many courses of a university by their ids with a single query, returning
+        them in the order of `ids`, and reporting the ids of missing courses. For
+        more ids than fit in a URL, use the POST variant. """
+    return _course_batch(db, university_id, ids)
+
+
+@router.post("/{university_id}/courses:batch", response_model=schemas.CourseBatch)
+def read_course_batch_by_body(
+    university_id: int,
+    request: schemas.CourseBatchRequest,
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """ Like the GET variant, with the ids in the request's body """
+    return _course_batch(db, university_id, request.ids)
+
+
+@router.put("/{university_id}/courses:bulk", response_model=schemas.CourseBulkResult)
+def upsert_courses(
+    university_id: int,
+    request: schemas.CourseBulkUpsert,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """ Creates many courses of a university, or replaces the fields of existing
+        courses with the same ids, in a single transaction. Courses are written in
+        batches with a statement each, skipping those whose fields didn't change,
+        and the number of inserted, updated and unchanged courses of every batch is
+        returned. Only superusers may write courses. """
+    if len(request.courses) > settings.COURSE_BULK_MAX_COURSES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.COURSE_BULK_MAX_COURSES} courses may be "
+            "written",
+        )
+    if crud.university.get(db, university_id) is None:
         raise HTTPException(status_code=404)
-    return uni
+    try:
+        batches = crud.course.upsert_many(
+            db,
+            university_id=university_id,
+            courses=request.courses,
+            batch_size=settings.COURSE_BULK_BATCH_SIZE,
+        )
+    except (DataError, IntegrityError) as e:
+        # e.g a course of a missing term
+        db.rollback()
+        raise HTTPException(status_code=422, detail=str(e.orig).strip())
+    db.commit()
+    return {"university_id": university_id, "batches": batches}
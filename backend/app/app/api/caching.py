@@ -0,0 +1,125 @@
+""" Caching of serialized GET responses by the data version of their university.
+
+    Responses are cached as the bytes of their body, keyed by their path, query
+    parameters and data versions (see `app.db.versions`), and are served with a
+    strong `ETag` of their body. Requests whose `If-None-Match` matches the cached
+    response of the current data versions are answered with a 304 from memory, only
+    reading the data versions from the database, without serializing anything.
+"""
+import hashlib
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Dict,
+    Hashable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+)
+
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.base_class import Base
+from app.db.events import on_university_change
+from app.db.session import SessionLocal
+from app.db.versions import load_data_versions
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    headers: Dict[str, str]
+
+
+response_cache: LRUCache[CachedResponse] = LRUCache(
+    "responses", settings.RESPONSE_CACHE_SIZE
+)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """ Whether an `If-None-Match` header matches an ETag, by weak comparison """
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag == "*" or tag.split("W/", 1)[-1] == etag for tag in tags)
+
+
+def _load_data_versions(university_ids: List[Optional[int]]) -> List[Optional[int]]:
+    with SessionLocal() as db:
+        return load_data_versions(db, university_ids)
+
+
+class CachedRoute(APIRoute):
+    """ A route whose GET responses are cached by the data versions of the
+        universities given by its path parameters ending with `university_id`, or
+        by the catalog version for routes without any, i.e the list of
+        universities. """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        if self.methods is None or "GET" not in self.methods:
+            return handler
+
+        async def cached_handler(request: Request) -> Response:
+            try:
+                university_ids: List[Optional[int]] = [
+                    int(value)
+                    for name, value in sorted(request.path_params.items())
+                    if name.endswith("university_id")
+                ] or [None]
+            except ValueError:
+                return await handler(request)
+            # taken before reading versions, so that responses built from data
+            # written after them aren't stored
+            generation = response_cache.generation
+            versions = await run_in_threadpool(_load_data_versions, university_ids)
+            if None in versions:
+                return await handler(request)
+            # the handler's session uses the same versions, see `app.api.deps.get_db`
+            request.state.data_versions = {
+                university_id: version
+                for university_id, version in zip(university_ids, versions)
+                if university_id is not None
+            }
+            key: Hashable = (
+                university_ids[0],
+                request.url.path,
+                tuple(sorted(request.query_params.multi_items())),
+                tuple(versions),
+            )
+            cached = response_cache.get(key)
+            if cached is None:
+                response = await handler(request)
+                # streamed responses have no body
+                if response.status_code != 200 or not hasattr(response, "body"):
+                    return response
+                headers = {
+                    name: value
+                    for name, value in response.headers.items()
+                    if name != "content-length"
+                }
+                digest = hashlib.blake2b(response.body, digest_size=16).hexdigest()
+                etag = f'"{digest}"'
+                cached = CachedResponse(response.body, etag, headers)
+                response_cache.put(key, cached, generation)
+            if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+                return Response(status_code=304, headers={"ETag": cached.etag})
+            headers = {**cached.headers, "ETag": cached.etag}
+            return Response(cached.body, headers=headers)
+
+        return cached_handler
+
+
+@on_university_change(Base)
+def _invalidate_responses(university_ids: Set[int]) -> None:
+    # responses of older versions are never served again
+    response_cache.invalidate_university(None)
+    for university_id in university_ids:
+        response_cache.invalidate_university(university_id)
@@ -1,24 +1,33 @@
-from typing import Generator
+from typing import Any, Dict, Generator, List, Optional, Type, cast
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.orm import Query as SQLQuery
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.core import security
 from app.core.config import settings
+from app.crud.base import CRUDBase, InvalidCursor
+from app.db.base_class import Base
 from app.db.session import SessionLocal
+from app.db.versions import use_data_versions
+from app.search import CourseFilters
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
 )
 
 
-def get_db() -> Generator:
+def get_db(request: Request) -> Generator:
     try:
         db = SessionLocal()
+        # the data versions a cached response is keyed by, see `app.api.caching`
+        use_data_versions(db, getattr(request.state, "data_versions", {}))
         yield db
     finally:
         db.close()
@@ -59,3 +68,134 @@ def get_current_active_superuser(
             status_code=400, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+class Pagination:
+    """ Pagination parameters of list endpoints. Pages are either requested by an
+        opaque `cursor`, as returned in the `X-Next-Cursor` header of the previous
+        page, or by the number of rows to `skip`, which is slower for later pages.
+        The header is only returned if there are more rows. """
+
+    NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+    def __init__(
+        self,
+        response: Response,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1),
+        cursor: Optional[str] = None,
+    ):
+        if cursor is not None and skip:
+            raise HTTPException(
+                status_code=422, detail="skip can't be used along with a cursor"
+            )
+        self.response = response
+        self.skip = skip
+        self.limit = limit
+        self.cursor = cursor
+
+    def page(
+        self, db: Session, crud_obj: CRUDBase, query: Optional[SQLQuery] = None
+    ) -> List[Any]:
+        try:
+            rows, next_cursor = crud_obj.get_page(
+                db, query=query, cursor=self.cursor, skip=self.skip, limit=self.limit
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if next_cursor is not None:
+            self.response.headers[self.NEXT_CURSOR_HEADER] = next_cursor
+        return rows
+
+
+class Fields:
+    """ Sparse fieldsets of list and detail endpoints: `fields` is a comma separated
+        list of the fields of the returned entities, e.g `id,name_translations`.
+        Other columns aren't loaded from the database, and other fields are omitted
+        from the response rather than serialized. All fields are returned by
+        default. """
+
+    def __init__(
+        self,
+        response: Response,
+        fields: Optional[str] = Query(
+            None, description="Comma separated fields to return, defaults to all"
+        ),
+    ):
+        self.response = response
+        self.fields = (
+            None
+            if fields is None
+            else list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        )
+
+    def load(
+        self, query: SQLQuery, model: Type[Base], schema: Type[BaseModel]
+    ) -> SQLQuery:
+        """ Applies the loading plan of the selected fields of `schema` to a query of
+            `model`, whose rows are returned as `schema`, restricting its columns to
+            the selected fields """
+        if self.fields is not None:
+            unknown = set(self.fields) - set(schema.__fields__)
+            if unknown:
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"Unknown fields {sorted(unknown)}, "
+                    f"expected some of {list(schema.__fields__)}",
+                )
+        fields = None if self.fields is None else tuple(self.fields)
+        # the stubs type the generative methods of queries as returning nothing
+        return cast(Any, query).options(*crud.loading_plan(model, schema, fields))
+
+    def render(self, content: Any, schema: Type[BaseModel]) -> Any:
+        """ Returns a row or a list of rows of a query restricted by `load` as a
+            response of their selected fields, or returns them as they are, for the
+            endpoint's response model, if all fields were selected """
+        if self.fields is None:
+            return content
+        if isinstance(content, list):
+            projected: Any = [self._project(row, schema) for row in content]
+        else:
+            projected = self._project(content, schema)
+        response = JSONResponse(jsonable_encoder(projected))
+        # headers set by other dependencies, such as the next page's cursor
+        for name, value in self.response.headers.items():
+            if name not in ("content-length", "content-type"):
+                response.headers[name] = value
+        return response
+
+    def _project(self, row: Any, schema: Type[BaseModel]) -> Dict[str, Any]:
+        assert self.fields is not None
+        projected = {}
+        for name in self.fields:
+            value = getattr(row, name)
+            nested = schema.__fields__[name].type_
+            if isinstance(nested, type) and issubclass(nested, BaseModel):
+                from_orm = nested.from_orm
+                if isinstance(value, list):
+                    value = [from_orm(item) for item in value]
+                elif value is not None:
+                    value = from_orm(value)
+            projected[name] = value
+        return projected
+
+
+def get_course_filters(
+    term_id: List[int] = Query([]),
+    min_credits: Optional[int] = Query(None, ge=0),
+    max_credits: Optional[int] = Query(None, ge=0),
+    faculty_id: List[str] = Query([]),
+    department_id: List[str] = Query([]),
+    track_id: List[str] = Query([]),
+) -> CourseFilters:
+    """ Filters of course list endpoints. Values of a repeated parameter are
+        alternatives, e.g courses of either term, while different parameters must
+        all match. Faculties, departments and tracks must match the same track. """
+    return CourseFilters(
+        term_ids=term_id,
+        min_credits=min_credits,
+        max_credits=max_credits,
+        faculty_ids=faculty_id,
+        department_ids=department_id,
+        track_ids=track_id,
+    )
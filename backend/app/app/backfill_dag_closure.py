@@ -0,0 +1,41 @@
+import argparse
+import logging
+from typing import List, Optional
+
+from app import models
+from app.dag import rebuild_closure, rebuild_course_index
+from app.db.session import SessionLocal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def backfill(university_ids: Optional[List[int]] = None) -> None:
+    db = SessionLocal()
+    if not university_ids:
+        university_ids = [uid for (uid,) in db.query(models.University.id)]
+    for university_id in university_ids:
+        rows = rebuild_closure(db.connection(), university_id)
+        index_rows = rebuild_course_index(db.connection(), university_id)
+        db.commit()
+        logger.info(
+            f"University {university_id}: {rows} closure rows, "
+            f"{index_rows} course index rows"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Rebuilds the transitive closure of the DAGs of universities, "
+        "and the course index derived from it"
+    )
+    parser.add_argument("university_ids", type=int, nargs="*")
+    args = parser.parse_args()
+
+    logger.info("Backfilling DAG closure")
+    backfill(args.university_ids)
+    logger.info("DAG closure backfilled")
+
+
+if __name__ == "__main__":
+    main()
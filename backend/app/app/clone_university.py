@@ -0,0 +1,142 @@
+""" Clones a university, e.g into a new university for the next academic year, which
+    is then updated rather than imported from scratch.
+
+    All rows of the university are copied server-side, with an INSERT ... SELECT per
+    table, within a single transaction. Derived data (DAG closure, course index and
+    merkle hashes) is copied as well rather than recomputed, as it doesn't depend on
+    ids which change: DAG node ids are global, so nodes are copied with new ids,
+    through a temporary table mapping every node to its copy, while course set ids
+    are only unique within a university, so they're kept.
+"""
+import argparse
+import logging
+from typing import Dict, Optional, Sequence
+
+from sqlalchemy import Column, Integer, MetaData, Table, func, literal, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db.base_class import table_of
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+dagnode = table_of(models.DAGNode)
+
+# Tables of a university's rows, in the order they're copied so that rows are
+# copied after the rows they reference, by their columns of DAG node ids
+TABLES = [
+    (table_of(models.Faculty), ()),
+    (table_of(models.Department), ()),
+    (table_of(models.Track), ()),
+    (models.track_department, ()),
+    (table_of(models.Course), ()),
+    (table_of(models.CourseSet), ()),
+    (table_of(models.CourseSetMembership), ()),
+    (dagnode, ("node_id",)),
+    (table_of(models.DAGRootNode), ("node_id",)),
+    (table_of(models.CourseSetNode), ("node_id",)),
+    (table_of(models.ORNode), ("node_id",)),
+    (models.dag_edge_assoc, ("from_node_id", "to_node_id")),
+    (models.dag_closure, ("ancestor_id", "descendant_id")),
+    (models.course_requirement_index, ("node_id",)),
+]
+
+# The id of every DAG node of the cloned university, and of its copy
+node_map = Table(
+    "clone_node_map",
+    MetaData(),
+    Column("old_id", Integer, primary_key=True),
+    Column("new_id", Integer, nullable=False),
+    prefixes=["TEMPORARY"],
+)
+
+
+def _copy(
+    conn: Connection,
+    table: Table,
+    node_columns: Sequence[str],
+    university_id: int,
+    new_university_id: int,
+) -> int:
+    """ Copies the rows of a university in `table`, or the rows of its DAG nodes for
+        tables without a university id, into the new university, returning their
+        number """
+    source = table
+    maps = {}
+    for name in node_columns:
+        maps[name] = node_map.alias(f"{name}_map")
+        source = source.join(maps[name], maps[name].c.old_id == table.c[name])
+    # computed columns are computed for the copies
+    columns = [column for column in table.c if column.computed is None]
+    values = [
+        maps[column.name].c.new_id
+        if column.name in maps
+        else literal(new_university_id, Integer)
+        if column.name == "university_id"
+        else column
+        for column in columns
+    ]
+    query = select(*values).select_from(source)
+    if "university_id" in table.c:
+        query = query.where(table.c.university_id == university_id)
+    return conn.execute(
+        table.insert().from_select([column.name for column in columns], query)
+    ).rowcount
+
+
+def clone_university(
+    db: Session, university_id: int, name_translations: Optional[Dict[str, str]] = None,
+) -> int:
+    """ Creates a copy of a university, within the session's transaction, named by
+        `name_translations` or like the original, and returns its id. Raises
+        `ValueError` if the university doesn't exist. """
+    university = db.query(models.University).get(university_id)
+    if university is None:
+        raise ValueError(f"University {university_id} doesn't exist")
+    clone = models.University(
+        name_translations=name_translations or university.name_translations,
+        extra_data=university.extra_data,
+    )
+    db.add(clone)
+    db.flush()
+
+    conn = db.connection()
+    node_map.create(conn)
+    node_id_sequence = func.pg_get_serial_sequence(dagnode.name, "node_id")
+    conn.execute(
+        node_map.insert().from_select(
+            ["old_id", "new_id"],
+            select(dagnode.c.node_id, func.nextval(node_id_sequence)).where(
+                dagnode.c.university_id == university_id
+            ),
+        )
+    )
+    conn.exec_driver_sql(f"ANALYZE {node_map.name}")
+    for table, node_columns in TABLES:
+        rows = _copy(conn, table, node_columns, university_id, clone.id)
+        logger.info(f"Copied {rows} rows of {table.name}")
+    node_map.drop(conn)
+    return clone.id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Copies a university into a new one, printing its id"
+    )
+    parser.add_argument("university_id", type=int)
+    parser.add_argument("--name", help="English name of the new university")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    clone_id = clone_university(
+        db, args.university_id, {"en": args.name} if args.name else None
+    )
+    db.commit()
+    print(clone_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+# All caches created in this process, by name, so their statistics can be inspected
+caches: Dict[str, "LRUCache[Any]"] = {}
+
+
+class LRUCache(Generic[V]):
+    """ A thread-safe, bounded, least-recently-used cache which keeps hit/miss counters.
+
+        Keys of caches holding university data are tuples whose first element is
+        the university id, which allows evicting all entries of a university at once.
+
+        The cache is per-process: invalidation only sees writes made via sessions
+        in this process. Writes of other processes are seen by storing values along
+        with the data version they were built from (see `app.db.versions`), and
+        only returning them for that version.
+    """
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, Tuple[Optional[int], V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped on every invalidation, so that values built from data read before
+        # an invalidation are never stored afterwards
+        self._generation = 0
+        caches[name] = self
+
+    @property
+    def generation(self) -> int:
+        """ The current generation, to be passed to `put` along with a value built
+            from data read afterwards """
+        return self._generation
+
+    def get(self, key: Hashable, version: Optional[int] = None) -> Optional[V]:
+        """ Returns the cached value for `key`, or None if there's none, or if
+            `version` is given and the value was built from another version. """
+        with self._lock:
+            try:
+                value_version, value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            if version is not None and value_version != version:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(
+        self,
+        key: Hashable,
+        value: V,
+        generation: Optional[int] = None,
+        version: Optional[int] = None,
+    ) -> None:
+        """ Stores a value, built from the given data `version`. If `generation` is
+            given and an invalidation happened since it was obtained, the value is
+            considered stale and isn't stored. """
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (version, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_build(
+        self,
+        key: Hashable,
+        build: Callable[[], Optional[V]],
+        version: Optional[int] = None,
+    ) -> Optional[V]:
+        """ Returns the cached value for `key` built from `version`, building and
+            caching it on a miss, in which case the version must have been read
+            before the data `build` reads. `None` results are returned but not
+            cached. """
+        value = self.get(key, version)
+        if value is not None:
+            return value
+        generation = self._generation
+        value = build()
+        if value is not None:
+            self.put(key, value, generation=generation, version=version)
+        return value
+
+    def invalidate_university(self, university_id: Optional[int]) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._data if k[0] == university_id]:  # type: ignore
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
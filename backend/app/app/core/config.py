@@ -89,6 +89,33 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER_PASSWORD: str
     USERS_OPEN_REGISTRATION: bool = False
 
+    # maximal number of compiled track DAGs kept in memory
+    DAG_CACHE_SIZE: int = 256
+    # maximal number of universities whose search vocabularies are kept in memory
+    SEARCH_VOCABULARY_CACHE_SIZE: int = 16
+    # maximal number of matches of a search which are ranked, per searched table
+    SEARCH_MAX_CANDIDATES: int = 200
+    # maximal number of universities whose course autocompletion indexes are kept in
+    # memory
+    AUTOCOMPLETE_CACHE_SIZE: int = 16
+    # maximal number of universities whose course catalogs are kept in memory for
+    # counting facets
+    COURSE_CATALOG_CACHE_SIZE: int = 16
+    # maximal number of serialized GET responses kept in memory
+    RESPONSE_CACHE_SIZE: int = 4096
+    # maximal depth, and number of rows, of a track's DAG returned as rows of nodes
+    # and their parents, of which there's one per path and hence exponentially many
+    TRACK_DAG_MAX_DEPTH: int = 100
+    TRACK_DAG_MAX_ROWS: int = 10000
+    # maximal number of students audited at once by the bulk audit endpoint
+    BULK_AUDIT_MAX_STUDENTS: int = 10000
+    # maximal number of courses requested at once from the batch endpoint
+    COURSE_BATCH_MAX_IDS: int = 5000
+    # maximal number of courses upserted at once by the bulk endpoint, and the number
+    # of courses upserted by each of its statements
+    COURSE_BULK_MAX_COURSES: int = 20000
+    COURSE_BULK_BATCH_SIZE: int = 1000
+
     class Config:
         case_sensitive = True
 
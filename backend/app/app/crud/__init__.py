@@ -1,5 +1,8 @@
+from .catalog_diff import catalog_diff
 from .crud_item import item
+from .crud_university import course, track, university
 from .crud_user import user
+from .loading import loading_plan
 
 # For a new basic set of CRUD operations you could just do
 
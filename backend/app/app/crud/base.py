@@ -1,8 +1,23 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import base64
+import binascii
+import json
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, tuple_
+from sqlalchemy.orm import Query, QueryableAttribute, Session
 
 from app.db.base_class import Base
 
@@ -11,8 +26,37 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    """ Encodes the key of the last row of a page as an opaque cursor """
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def decode_cursor(cursor: str, key: Sequence[QueryableAttribute]) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(f"Invalid cursor {cursor!r}")
+    if (
+        not isinstance(values, list)
+        or len(values) != len(key)
+        or not all(
+            isinstance(value, attr.type.python_type) for value, attr in zip(values, key)
+        )
+    ):
+        raise InvalidCursor(f"Invalid cursor {cursor!r}")
+    return values
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    def __init__(self, model: Type[ModelType]):
+    def __init__(
+        self,
+        model: Type[ModelType],
+        key: Optional[Sequence[QueryableAttribute]] = None,
+    ):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
 
@@ -20,8 +64,16 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
         * `model`: A SQLAlchemy model class
         * `schema`: A Pydantic model (schema) class
+        * `key`: Attributes uniquely identifying a row, by which pages are ordered.
+          Defaults to the primary key, composite keys should be ordered to match
+          an index.
         """
         self.model = model
+        mapper = inspect(model)
+        self.key: Sequence[QueryableAttribute] = key or [
+            getattr(model, mapper.get_property_by_column(column).key)
+            for column in mapper.primary_key
+        ]
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
         return db.query(self.model).filter(self.model.id == id).first()
@@ -31,6 +83,34 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> List[ModelType]:
         return db.query(self.model).offset(skip).limit(limit).all()
 
+    def get_page(
+        self,
+        db: Session,
+        *,
+        query: Optional[Query] = None,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """ Returns a page of rows ordered by key, following the row whose key is
+            encoded in `cursor` (or skipping `skip` rows, which takes time linear in
+            `skip`), along with the cursor of the next page, if there is one.
+            `query` may restrict the rows, and defaults to all rows. """
+        if query is None:
+            query = db.query(self.model)
+        # the stubs type the methods of queries as returning optional queries
+        page: Any = query.order_by(*self.key)
+        if cursor is not None:
+            values = decode_cursor(cursor, self.key)
+            page = page.filter(tuple_(*self.key) > tuple_(*values))
+        else:
+            page = page.offset(skip)
+        rows = page.limit(limit + 1).all()
+        if len(rows) <= limit or limit <= 0:
+            return rows[:limit], None
+        rows = rows[:limit]
+        return rows, encode_cursor([getattr(rows[-1], attr.key) for attr in self.key])
+
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model(**obj_in_data)  # type: ignore
@@ -44,7 +124,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db: Session,
         *,
         db_obj: ModelType,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
     ) -> ModelType:
         obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
@@ -0,0 +1,162 @@
+""" Differences between the catalogs of two universities, e.g snapshots of the same
+    university from different years.
+
+    Every kind of entity is compared with a single query, which full outer joins the
+    entity's rows of both universities on their natural keys, which are stable
+    between snapshots, and selects the rows which were added, removed, or whose
+    fields differ. Course sets have no natural key, so they're matched by their
+    courses. Rows are streamed from a server-side cursor, so neither catalog is
+    loaded into memory as a whole.
+
+    Changes to the DAGs of tracks are found by `app.dag.diff_track`.
+"""
+from typing import Any, Dict, Iterator, List, NamedTuple
+
+from sqlalchemy import Text, and_, cast, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, aggregate_order_by
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement, Select
+
+from app import models
+from app.db.base_class import table_of
+
+courseset = table_of(models.CourseSet)
+membership = table_of(models.CourseSetMembership)
+
+
+class Entity(NamedTuple):
+    name: str
+    keys: List[str]
+    fields: List[str]
+
+
+ENTITIES = [
+    Entity("faculty", ["id"], ["name_translations", "extra_data"]),
+    Entity("department", ["faculty_id", "id"], ["name_translations", "extra_data"]),
+    Entity("track", ["id"], ["name_translations", "degree", "extra_data"]),
+    Entity("track_department", ["track_id", "faculty_id", "department_id"], []),
+    Entity(
+        "course",
+        ["id"],
+        ["name_translations", "term_id", "course_credits", "extra_data"],
+    ),
+    # sets with the same courses are told apart by their order
+    Entity(
+        "course_set",
+        ["course_ids", "ordinal"],
+        ["min_subset_size", "max_subset_size", "min_credits", "max_credits"],
+    ),
+]
+
+_TABLES = {
+    "faculty": table_of(models.Faculty),
+    "department": table_of(models.Department),
+    "track": table_of(models.Track),
+    "track_department": models.track_department,
+    "course": table_of(models.Course),
+}
+
+
+def _column(column: ColumnElement) -> ColumnElement:
+    # JSON has no equality operator, unlike JSONB
+    if column.name in ("name_translations", "extra_data"):
+        return cast(column, JSONB).label(column.name)
+    return column
+
+
+def _rows(entity: Entity, university_id: int) -> Any:
+    """ The keys and fields of the entity's rows of a university """
+    if entity.name != "course_set":
+        table = _TABLES[entity.name]
+        return (
+            select(*(_column(table.c[name]) for name in entity.keys + entity.fields))
+            .where(table.c.university_id == university_id)
+            .subquery()
+        )
+    members = (
+        select(
+            membership.c.set_id,
+            func.array_agg(
+                aggregate_order_by(membership.c.course_id, membership.c.course_id)
+            ).label("course_ids"),
+        )
+        .where(membership.c.university_id == university_id)
+        .group_by(membership.c.set_id)
+        .subquery()
+    )
+    course_ids = func.coalesce(members.c.course_ids, literal([], ARRAY(Text)))
+    return (
+        select(
+            course_ids.label("course_ids"),
+            func.row_number()
+            .over(partition_by=course_ids, order_by=courseset.c.id)
+            .label("ordinal"),
+            *(courseset.c[name] for name in entity.fields),
+        )
+        .select_from(courseset.outerjoin(members, members.c.set_id == courseset.c.id))
+        .where(courseset.c.university_id == university_id)
+        .subquery()
+    )
+
+
+def _diff_query(entity: Entity, university_id: int, other_university_id: int) -> Select:
+    old = _rows(entity, university_id).alias("old")
+    new = _rows(entity, other_university_id).alias("new")
+    key = entity.keys[0]
+    keys = [func.coalesce(old.c[name], new.c[name]).label(name) for name in entity.keys]
+    return (
+        select(
+            *keys,
+            old.c[key].isnot(None).label("in_old"),
+            new.c[key].isnot(None).label("in_new"),
+            *(old.c[name].label(f"old_{name}") for name in entity.fields),
+            *(new.c[name].label(f"new_{name}") for name in entity.fields),
+        )
+        .select_from(
+            old.join(
+                new,
+                and_(*(old.c[name] == new.c[name] for name in entity.keys)),
+                full=True,
+            )
+        )
+        .where(
+            or_(
+                old.c[key].is_(None),
+                new.c[key].is_(None),
+                *(old.c[name].is_distinct_from(new.c[name]) for name in entity.fields),
+            )
+        )
+        .order_by(*entity.keys)
+    )
+
+
+def catalog_diff(
+    db: Session, university_id: int, other_university_id: int
+) -> Iterator[Dict[str, Any]]:
+    """ Yields the changes turning the catalog of a university into the catalog of
+        another, by kind of entity and by key. A change is either `added`, with the
+        fields of the new entity, `removed`, with the fields of the old one, or
+        `changed`, with the old and new values of the fields which changed. """
+    for entity in ENTITIES:
+        query = _diff_query(entity, university_id, other_university_id)
+        rows = db.execute(query, execution_options={"stream_results": True})
+        for row in rows:
+            values = row._mapping
+            change: Dict[str, Any] = {
+                "entity": entity.name,
+                "key": {name: values[name] for name in entity.keys},
+            }
+            old = {name: values[f"old_{name}"] for name in entity.fields}
+            new = {name: values[f"new_{name}"] for name in entity.fields}
+            if not values["in_new"]:
+                change.update(change="removed", old=old)
+            elif not values["in_old"]:
+                change.update(change="added", new=new)
+            else:
+                changed = [name for name in entity.fields if old[name] != new[name]]
+                change.update(
+                    change="changed",
+                    old={name: old[name] for name in changed},
+                    new={name: new[name] for name in changed},
+                )
+            yield change
@@ -0,0 +1,144 @@
+import json
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import (
+    JSON,
+    Integer,
+    Text,
+    any_,
+    cast,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, insert
+from sqlalchemy.orm import Session, contains_eager
+
+from app.crud.base import CRUDBase
+from app.db.base_class import table_of
+from app.db.events import touch_university
+from app.models import Course, Track, University
+from app.schemas import Course as CourseSchema
+from app.schemas import CourseRow
+from app.schemas import Track as TrackSchema
+from app.schemas import University as UniversitySchema
+
+# universities and their data are imported rather than created through the API,
+# so apart from upserting courses in bulk (e.g by scrapers), only reading is supported
+
+university = CRUDBase[University, UniversitySchema, UniversitySchema](University)
+
+
+class CRUDCourse(CRUDBase[Course, CourseSchema, CourseSchema]):
+    def get_many(
+        self, db: Session, *, university_id: int, ids: Sequence[str]
+    ) -> Tuple[List[Course], List[str]]:
+        """ Returns the courses of a university with the given ids, with their terms,
+            in the order of `ids`, along with the ids which weren't found. Takes a
+            single query, which passes the ids as one array rather than a parameter
+            per id. Repeated ids are returned once. """
+        ids = list(dict.fromkeys(ids))
+        found = {
+            course.id: course
+            for course in db.query(Course)
+            .join(Course.term)
+            .options(contains_eager(Course.term))  # type: ignore
+            .filter(
+                (Course.university_id == university_id)
+                & (Course.id == any_(literal(ids, ARRAY(Text))))
+            )
+        }
+        return (
+            [found[id] for id in ids if id in found],
+            [id for id in ids if id not in found],
+        )
+
+    def upsert_many(
+        self,
+        db: Session,
+        *,
+        university_id: int,
+        courses: Sequence[CourseRow],
+        batch_size: int,
+    ) -> List[Dict[str, int]]:
+        """ Creates the courses of a university, or replaces the fields of existing
+            courses with the same ids, within the session's transaction, with an
+            INSERT ... ON CONFLICT DO UPDATE per batch of `batch_size` courses.
+            Courses whose fields didn't change are skipped rather than rewritten.
+            Returns the number of inserted, updated and unchanged courses of every
+            batch. Ids must be unique. """
+        table = table_of(Course)
+        fields = ["name_translations", "term_id", "course_credits", "extra_data"]
+        batches = []
+        for start in range(0, len(courses), batch_size):
+            end = start + batch_size
+            batch = courses[start:end]
+            # a batch is passed as an array per column rather than a parameter per
+            # value, so that every batch is the same statement
+            rows = (
+                func.unnest(
+                    literal([course.id for course in batch], ARRAY(Text)),
+                    literal(
+                        [json.dumps(course.name_translations) for course in batch],
+                        ARRAY(Text),
+                    ),
+                    literal([course.term_id for course in batch], ARRAY(Integer)),
+                    literal(
+                        [course.course_credits for course in batch], ARRAY(Integer)
+                    ),
+                    literal(
+                        [json.dumps(course.extra_data or {}) for course in batch],
+                        ARRAY(Text),
+                    ),
+                )
+                .table_valued("id", *fields)
+                .render_derived()
+            )
+            stmt = insert(table).from_select(
+                ["university_id", "id", *fields],
+                select(
+                    literal(university_id, Integer),
+                    rows.c.id,
+                    cast(rows.c.name_translations, JSON),
+                    rows.c.term_id,
+                    rows.c.course_credits,
+                    cast(rows.c.extra_data, JSON),
+                ),
+            )
+            # JSON has no equality operator, unlike JSONB
+            changed = [
+                cast(table.c[name], JSONB).is_distinct_from(
+                    cast(stmt.excluded[name], JSONB)
+                )
+                if name in ("name_translations", "extra_data")
+                else table.c[name].is_distinct_from(stmt.excluded[name])
+                for name in fields
+            ]
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.university_id, table.c.id],
+                set_={name: stmt.excluded[name] for name in fields},
+                where=or_(*changed),
+            ).returning(literal_column("xmax = 0").label("inserted"))
+            # skipped rows aren't returned, and only updated rows have an xmax, as
+            # their previous version was deleted by this transaction
+            written = [row.inserted for row in db.execute(stmt)]
+            inserted = sum(written)
+            batches.append(
+                {
+                    "inserted": inserted,
+                    "updated": len(written) - inserted,
+                    "unchanged": len(batch) - len(written),
+                }
+            )
+        if any(batch["inserted"] or batch["updated"] for batch in batches):
+            touch_university(db, Course, university_id)
+        return batches
+
+
+# keyed by the index on (university_id, id), as pages are within a university
+course = CRUDCourse(Course, key=[Course.university_id, Course.id])
+track = CRUDBase[Track, TrackSchema, TrackSchema](
+    Track, key=[Track.university_id, Track.id]
+)
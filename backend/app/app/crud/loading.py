@@ -0,0 +1,82 @@
+""" Loading plans of response schemas.
+
+    Serializing ORM objects with a schema reads every relationship the schema nests,
+    e.g `schemas.University` reads the faculties of each university and the
+    departments of each faculty. If these are loaded lazily, serializing a list
+    takes a query per object. A loading plan is the eager loading options of all
+    relationships nested by a schema, so a query's results are serialized with a
+    number of queries which only depends on the schema: one per nested relationship.
+"""
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from sqlalchemy import inspect, orm
+from sqlalchemy.orm import Load
+
+from app.db.base_class import Base
+
+
+def _nested_schema(schema: Type[BaseModel], name: str) -> Optional[Type[BaseModel]]:
+    nested = schema.__fields__[name].type_
+    if isinstance(nested, type) and issubclass(nested, BaseModel):
+        return nested
+    return None
+
+
+def _load(parent: Optional[Load], strategy: str, *attributes: Any) -> Load:
+    """ Applies a loader strategy, e.g `selectinload`, to attributes, under the path
+        of a parent option if given. Strategies are looked up by name, as the stubs
+        type them as options rather than as functions returning options. """
+    return getattr(orm if parent is None else parent, strategy)(*attributes)
+
+
+def _options(
+    model: Type[Base],
+    schema: Type[BaseModel],
+    fields: Optional[Tuple[str, ...]],
+    parent: Optional[Load],
+) -> List[Load]:
+    mapper = inspect(model)
+    options = []
+    for name in schema.__fields__:
+        relationship = mapper.relationships.get(name)
+        nested = _nested_schema(schema, name)
+        if relationship is None or nested is None:
+            continue
+        attribute = getattr(model, name)
+        if fields is not None and name not in fields:
+            # not serialized, so not loaded even if it's loaded eagerly by default
+            options.append(_load(None, "lazyload", attribute))
+            continue
+        # relationships joined by default are cheaper joined, others are loaded by a
+        # query per relationship
+        strategy = "joinedload" if relationship.lazy == "joined" else "selectinload"
+        option = _load(parent, strategy, attribute)
+        # every nested option loads its whole path, including this relationship
+        options.extend(
+            _options(relationship.mapper.class_, nested, None, option) or [option]
+        )
+    return options
+
+
+@lru_cache(maxsize=None)
+def loading_plan(
+    model: Type[Base],
+    schema: Type[BaseModel],
+    fields: Optional[Tuple[str, ...]] = None,
+) -> Tuple[Load, ...]:
+    """ Returns the loader options of a query of `model` whose results are serialized
+        with `schema`, or with the given top-level fields of `schema`, whose other
+        columns aren't loaded """
+    options = _options(model, schema, fields, None)
+    if fields is not None:
+        mapper = inspect(model)
+        columns = [
+            getattr(model, name) for name in fields if name in mapper.column_attrs
+        ]
+        # the primary key is always loaded, and a query must load some column
+        primary_key = mapper.get_property_by_column(mapper.primary_key[0])
+        columns = columns or [getattr(model, primary_key.key)]
+        options.append(_load(None, "load_only", *columns))
+    return tuple(options)
@@ -0,0 +1,24 @@
+from .audit import TrackRequirements, compile_track_requirements, get_track_requirements
+from .bulk_audit import BulkAudit, bulk_audit
+from .closure import (
+    add_edge,
+    descendants_query,
+    is_ancestor,
+    rebuild_closure,
+    remove_edges,
+)
+from .compiled import (
+    CompiledDAG,
+    compile_track_dag,
+    dag_cache,
+    get_compiled_dag,
+    track_graphs,
+)
+from .course_index import rebuild_course_index, required_by
+from .frontier import Frontier, get_frontier
+from .hydrate import load_track_dag
+from .ingest import NodeSpec, spec_hashes, sync_track_dag
+from .maintenance import insert_edges
+from .merkle import diff_track, update_hashes
+from .planner import Objective, Plan, plan_track
+from .topo import CycleError, DynamicTopologicalOrder, reorder_for_edge
@@ -0,0 +1,307 @@
+""" Degree audits: evaluating whether a set of completed courses satisfies the
+    requirements encoded in the DAG of a track.
+
+    The semantics of the DAG are:
+    - A `DAGRootNode` is satisfied if all of its children are.
+    - An `ORNode` is satisfied if any of its children is.
+    - A `CourseSetNode` is satisfied if the completed courses of its course set meet
+      the set's minimal subset size and minimal credits, and all of its children
+      (courses which follow it) are satisfied.
+"""
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.base_class import table_of
+from app.db.events import on_university_change
+from app.db.versions import get_data_version
+
+from .compiled import COURSE_SET, NODE_TYPES, OR, CompiledDAG, get_compiled_dag
+
+courseset = table_of(models.CourseSet)
+membership = table_of(models.CourseSetMembership)
+course = table_of(models.Course)
+
+
+def _popcount(mask: int) -> int:
+    return bin(mask).count("1")
+
+
+popcount = getattr(int, "bit_count", _popcount)
+
+
+def bits(mask: int) -> Iterator[int]:
+    """ Yields the indices of the set bits of a mask, in increasing order """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class SetBounds(NamedTuple):
+    min_subset_size: Optional[int]
+    max_subset_size: Optional[int]
+    min_credits: Optional[int]
+    max_credits: Optional[int]
+
+
+class NodeAudit(NamedTuple):
+    satisfied: bool
+    earned_credits: int
+    missing_credits: int
+
+
+class TrackRequirements:
+    """ The requirements of a track, compiled for fast evaluation.
+
+        Every course appearing in a course set of the track is given a dense
+        integer id, so that sets of courses can be represented as bitsets (ints).
+    """
+
+    def __init__(
+        self,
+        dag: CompiledDAG,
+        course_sets: Dict[int, SetBounds],
+        members: Iterable[Tuple[int, str, Optional[int]]],
+    ):
+        self.dag = dag
+        self.course_ids: List[str] = []
+        self.course_index: Dict[str, int] = {}
+        self.credits = array("i")
+        set_masks: Dict[int, int] = {}
+        for set_id, course_id, credits in members:
+            bit = self.course_index.get(course_id)
+            if bit is None:
+                bit = self.course_index[course_id] = len(self.course_ids)
+                self.course_ids.append(course_id)
+                self.credits.append(credits or 0)
+            set_masks[set_id] = set_masks.get(set_id, 0) | (1 << bit)
+
+        # for summing credits with bitset operations, courses are grouped by credits
+        credit_groups: Dict[int, int] = {}
+        for bit, credits in enumerate(self.credits):
+            credit_groups[credits] = credit_groups.get(credits, 0) | (1 << bit)
+
+        no_bounds = SetBounds(None, None, None, None)
+        self.masks: List[int] = []
+        self.bounds: List[SetBounds] = []
+        self.credit_masks: List[List[Tuple[int, int]]] = []
+        # (credits, bit) of the courses of every node's set, cheapest first
+        self.cheapest: List[List[Tuple[int, int]]] = []
+        for node_set_id in dag.course_set_ids:
+            if node_set_id is None:
+                mask, bounds = 0, no_bounds
+            else:
+                mask = set_masks.get(node_set_id, 0)
+                bounds = course_sets.get(node_set_id, no_bounds)
+            self.masks.append(mask)
+            self.bounds.append(bounds)
+            self.credit_masks.append(
+                [(c, m & mask) for c, m in credit_groups.items() if m & mask]
+            )
+            self.cheapest.append(
+                sorted((self.credits[bit], 1 << bit) for bit in bits(mask))
+            )
+
+        self.children = [tuple(dag.children(i)) for i in range(len(dag))]
+        self.order = self._bottom_up_order()
+        self._course_nodes: Optional[List[List[int]]] = None
+
+    def _bottom_up_order(self) -> List[int]:
+        """ Orders the nodes so that every node appears after all of its children """
+        order: List[int] = []
+        visited = bytearray(len(self.dag))
+        stack = [(0, iter(self.children[0]))]
+        visited[0] = 1
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if not visited[child]:
+                    visited[child] = 1
+                    stack.append((child, iter(self.children[child])))
+                    break
+            else:
+                stack.pop()
+                order.append(node)
+        return order
+
+    def course_nodes(self) -> List[List[int]]:
+        """ The course set nodes containing every course, by the course's bit """
+        if self._course_nodes is None:
+            course_nodes: List[List[int]] = [[] for _ in self.course_ids]
+            for node, mask in enumerate(self.masks):
+                for bit in bits(mask):
+                    course_nodes[bit].append(node)
+            self._course_nodes = course_nodes
+        return self._course_nodes
+
+    def encode(self, course_ids: Iterable[str]) -> int:
+        """ Returns the bitset of the given courses, ignoring those not in the track """
+        mask = 0
+        index = self.course_index
+        for course_id in course_ids:
+            bit = index.get(course_id)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def credits_of(self, node: int, completed: int) -> int:
+        return sum(c * popcount(m & completed) for c, m in self.credit_masks[node])
+
+    def _missing_in_set(
+        self, node: int, completed: int, count: int, earned: int
+    ) -> int:
+        """ Minimal credits which still need to be taken in the course set of a node,
+            assuming the cheapest remaining courses are chosen """
+        bounds = self.bounds[node]
+        missing_courses = (bounds.min_subset_size or 0) - count
+        missing_credits = max(0, (bounds.min_credits or 0) - earned)
+        if missing_courses > 0:
+            cheapest = 0
+            for credits, bit in self.cheapest[node]:
+                if not completed & bit:
+                    cheapest += credits
+                    missing_courses -= 1
+                    if not missing_courses:
+                        break
+            missing_credits = max(missing_credits, cheapest)
+        return missing_credits
+
+    def audit(self, completed: int) -> List[NodeAudit]:
+        """ Evaluates every node of the track bottom-up against a bitset of completed
+            courses, returning the results indexed like the nodes of the DAG """
+        size = len(self.dag)
+        satisfied = [False] * size
+        missing = [0] * size
+        earned = [0] * size
+        node_types = self.dag.node_types
+        all_children = self.children
+        for node in self.order:
+            children = all_children[node]
+            node_type = node_types[node]
+            if node_type == OR:
+                if any(satisfied[c] for c in children):
+                    satisfied[node] = True
+                else:
+                    missing[node] = min((missing[c] for c in children), default=0)
+                continue
+
+            node_satisfied = all(satisfied[c] for c in children)
+            node_missing = sum(missing[c] for c in children) if children else 0
+            if node_type == COURSE_SET:
+                bounds = self.bounds[node]
+                taken = self.masks[node] & completed
+                count = credits = 0
+                if taken:
+                    count = popcount(taken)
+                    for c, m in self.credit_masks[node]:
+                        if m & taken:
+                            credits += c * popcount(m & taken)
+                    if bounds.max_credits is not None:
+                        credits = min(credits, bounds.max_credits)
+                if count < (bounds.min_subset_size or 0) or credits < (
+                    bounds.min_credits or 0
+                ):
+                    node_satisfied = False
+                    node_missing += self._missing_in_set(
+                        node, completed, count, credits
+                    )
+                earned[node] = credits
+            satisfied[node] = node_satisfied
+            missing[node] = node_missing
+        return [NodeAudit(*result) for result in zip(satisfied, earned, missing)]
+
+    def audit_courses(self, course_ids: Iterable[str]) -> Dict[str, Any]:
+        """ Audits a list of completed course ids, returning a summary of the track
+            and the results of each node """
+        course_ids = list(course_ids)
+        results = self.audit(self.encode(course_ids))
+        dag = self.dag
+        return {
+            "university_id": dag.university_id,
+            "track_id": dag.track_id,
+            "satisfied": results[0].satisfied,
+            "missing_credits": results[0].missing_credits,
+            "unknown_courses": [c for c in course_ids if c not in self.course_index],
+            "nodes": [
+                {
+                    "node_id": dag.node_ids[i],
+                    "node_type": NODE_TYPES[dag.node_types[i]],
+                    "course_set_id": dag.course_set_ids[i],
+                    "satisfied": result.satisfied,
+                    "earned_credits": result.earned_credits,
+                    "missing_credits": result.missing_credits,
+                }
+                for i, result in enumerate(results)
+            ],
+        }
+
+
+def compile_track_requirements(db: Session, dag: CompiledDAG) -> TrackRequirements:
+    """ Loads the course sets referenced by a compiled DAG, along with their member
+        courses and credits, in two queries """
+    set_ids = {set_id for set_id in dag.course_set_ids if set_id is not None}
+    in_track_sets = (courseset.c.university_id == dag.university_id) & (
+        courseset.c.id.in_(set_ids)
+    )
+    course_sets = {
+        row.id: SetBounds(
+            row.min_subset_size, row.max_subset_size, row.min_credits, row.max_credits
+        )
+        for row in db.execute(
+            select(
+                courseset.c.id,
+                courseset.c.min_subset_size,
+                courseset.c.max_subset_size,
+                courseset.c.min_credits,
+                courseset.c.max_credits,
+            ).where(in_track_sets)
+        )
+    }
+    members = db.execute(
+        select(membership.c.set_id, course.c.id, course.c.course_credits)
+        .join(
+            course,
+            (course.c.university_id == membership.c.university_id)
+            & (course.c.id == membership.c.course_id),
+        )
+        .where(
+            (membership.c.university_id == dag.university_id)
+            & membership.c.set_id.in_(set_ids)
+        )
+        .order_by(membership.c.set_id, course.c.id)
+    ).all()
+    return TrackRequirements(dag, course_sets, members)
+
+
+requirements_cache: LRUCache[TrackRequirements] = LRUCache(
+    "track_requirements", settings.DAG_CACHE_SIZE
+)
+
+
+def get_track_requirements(
+    db: Session, university_id: int, track_id: str
+) -> Optional[TrackRequirements]:
+    """ Returns the compiled requirements of a track, compiling them on first access,
+        or once the university's data version changed """
+
+    def build() -> Optional[TrackRequirements]:
+        dag = get_compiled_dag(db, university_id, track_id)
+        return compile_track_requirements(db, dag) if dag is not None else None
+
+    return requirements_cache.get_or_build(
+        (university_id, track_id), build, get_data_version(db, university_id)
+    )
+
+
+@on_university_change(
+    models.DAGNode, models.CourseSet, models.CourseSetMembership, models.Course
+)
+def _invalidate_requirements_cache(university_ids: Set[int]) -> None:
+    for university_id in university_ids:
+        requirements_cache.invalidate_university(university_id)
@@ -0,0 +1,148 @@
+""" Degree audits of many students at once.
+
+    Students are encoded as a boolean matrix over the courses of a track, and the
+    course set constraints of all nodes are evaluated for all students together with
+    matrix products, instead of auditing each student separately.
+"""
+from itertools import chain
+from typing import Iterable, List, NamedTuple, Sequence
+from weakref import WeakKeyDictionary
+
+import numpy as np
+
+from .audit import TrackRequirements
+from .compiled import COURSE_SET, OR
+
+
+class BulkAudit(NamedTuple):
+    """ Results of a bulk audit, indexed by student """
+
+    satisfied: np.ndarray
+    missing_credits: np.ndarray
+    # credits of the completed courses which are part of the track
+    earned_credits: np.ndarray
+
+
+class _Matrices(NamedTuple):
+    # set membership of courses, courses x course set nodes
+    sets: np.ndarray
+    # as above, weighted by course credits
+    set_credits: np.ndarray
+    # column in the matrices above of every course set node
+    columns: List[int]
+    # credits of every course
+    credits: np.ndarray
+    # course indices of every node's set, cheapest first, and their credits
+    cheapest: List[np.ndarray]
+    cheapest_credits: List[np.ndarray]
+
+
+# the matrices of requirements, which are dropped along with them
+_matrices_cache: "WeakKeyDictionary[TrackRequirements, _Matrices]" = (
+    WeakKeyDictionary()
+)
+
+
+def _matrices(requirements: TrackRequirements) -> _Matrices:
+    cached = _matrices_cache.get(requirements)
+    if cached is not None:
+        return cached
+    dag = requirements.dag
+    course_set_nodes = [i for i in range(len(dag)) if dag.node_types[i] == COURSE_SET]
+    columns = [-1] * len(dag)
+    # float32 products are computed with BLAS, and are exact for counts and credit
+    # sums well below 2**24
+    sets = np.zeros((len(requirements.course_ids), len(course_set_nodes)), np.float32)
+    for column, node in enumerate(course_set_nodes):
+        columns[node] = column
+        mask = requirements.masks[node]
+        bits = [bit for bit in range(mask.bit_length()) if mask >> bit & 1]
+        sets[bits, column] = 1
+    credits = np.asarray(requirements.credits, dtype=np.float32)
+    cheapest = [
+        np.array([credit_bit.bit_length() - 1 for _, credit_bit in node_cheapest], int)
+        for node_cheapest in requirements.cheapest
+    ]
+    cheapest_credits = [
+        np.array([credit for credit, _ in node_cheapest], np.int64)
+        for node_cheapest in requirements.cheapest
+    ]
+    matrices = _Matrices(
+        sets, sets * credits[:, None], columns, credits, cheapest, cheapest_credits
+    )
+    _matrices_cache[requirements] = matrices
+    return matrices
+
+
+def encode_students(
+    requirements: TrackRequirements, students: Sequence[Iterable[str]]
+) -> np.ndarray:
+    """ Returns a students x courses boolean matrix of completed courses """
+    course_lists = [list(course_ids) for course_ids in students]
+    completed = np.zeros((len(course_lists), len(requirements.course_ids)), dtype=bool)
+    get = requirements.course_index.get
+    cols = np.array([get(c, -1) for c in chain.from_iterable(course_lists)], np.int64)
+    rows = np.repeat(np.arange(len(course_lists)), [len(s) for s in course_lists])
+    known = cols >= 0
+    completed[rows[known], cols[known]] = True
+    return completed
+
+
+def bulk_audit(
+    requirements: TrackRequirements, students: Sequence[Iterable[str]]
+) -> BulkAudit:
+    """ Audits the completed courses of many students against a track. The results
+        are the same as auditing every student with `TrackRequirements.audit` """
+    m = _matrices(requirements)
+    completed = encode_students(requirements, students)
+    completed_f = completed.astype(np.float32)
+    counts = np.rint(completed_f @ m.sets).astype(np.int64)
+    credits = np.rint(completed_f @ m.set_credits).astype(np.int64)
+
+    dag = requirements.dag
+    n = len(students)
+    satisfied = np.zeros((len(dag), n), dtype=bool)
+    missing = np.zeros((len(dag), n), dtype=np.int64)
+    for node in requirements.order:
+        children = list(requirements.children[node])
+        node_type = dag.node_types[node]
+        if node_type == OR:
+            if children:
+                satisfied[node] = satisfied[children].any(axis=0)
+                missing[node] = np.where(
+                    satisfied[node], 0, missing[children].min(axis=0)
+                )
+            continue
+
+        if children:
+            satisfied[node] = satisfied[children].all(axis=0)
+            missing[node] = missing[children].sum(axis=0)
+        else:
+            satisfied[node] = True
+        if node_type != COURSE_SET:
+            continue
+
+        bounds = requirements.bounds[node]
+        column = m.columns[node]
+        count, node_credits = counts[:, column], credits[:, column]
+        if bounds.max_credits is not None:
+            node_credits = np.minimum(node_credits, bounds.max_credits)
+        missing_courses = (bounds.min_subset_size or 0) - count
+        missing_credits = np.maximum(0, (bounds.min_credits or 0) - node_credits)
+        unmet = (missing_courses > 0) | (missing_credits > 0)
+        if not unmet.any():
+            continue
+        if (missing_courses > 0).any():
+            # the cheapest remaining courses of the set, up to the missing count
+            remaining = ~completed[:, m.cheapest[node]]
+            chosen = remaining & (
+                np.cumsum(remaining, axis=1) <= missing_courses[:, None]
+            )
+            missing_credits = np.maximum(
+                missing_credits, chosen @ m.cheapest_credits[node]
+            )
+        satisfied[node] &= ~unmet
+        missing[node] += np.where(unmet, missing_credits, 0)
+
+    earned = np.rint(completed_f @ m.credits).astype(np.int64)
+    return BulkAudit(satisfied[0], missing[0], earned)
@@ -0,0 +1,206 @@
+""" Maintenance of the `dag_closure` table, which holds a row for every pair of DAG
+    nodes connected by a path, along with the length of the shortest path.
+
+    The table is updated incrementally whenever edges are added or removed through
+    the ORM (`DAGNode.children`/`parents`), or when DAG nodes are deleted, see
+    `app.dag.maintenance`. Code which writes to `dag_edge` directly must call
+    `add_edge`/`remove_edges` itself, or use `maintenance.insert_edges`.
+"""
+from typing import Any, Iterable, Set, Tuple
+
+from sqlalchemy import Integer, exists, func, literal, select, true, union_all
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app import models
+from app.db.base_class import table_of
+
+dag_edge = models.dag_edge_assoc
+dag_closure = models.dag_closure
+dagnode = table_of(models.DAGNode)
+
+Edge = Tuple[int, int]
+
+
+def _ancestors_or_self(node_id: int) -> Any:
+    return union_all(
+        select(literal(node_id, Integer).label("node_id"), literal(0).label("depth")),
+        select(dag_closure.c.ancestor_id, dag_closure.c.min_depth).where(
+            dag_closure.c.descendant_id == node_id
+        ),
+    ).subquery()
+
+
+def _descendants_or_self(node_id: int) -> Any:
+    return union_all(
+        select(literal(node_id, Integer).label("node_id"), literal(0).label("depth")),
+        select(dag_closure.c.descendant_id, dag_closure.c.min_depth).where(
+            dag_closure.c.ancestor_id == node_id
+        ),
+    ).subquery()
+
+
+def add_edge(conn: Connection, from_id: int, to_id: int) -> None:
+    """ Updates the closure after the edge `from_id -> to_id` was inserted: every
+        ancestor of `from_id` is now connected to every descendant of `to_id` """
+    ancestors = _ancestors_or_self(from_id)
+    descendants = _descendants_or_self(to_id)
+    stmt = insert(dag_closure).from_select(
+        ["ancestor_id", "descendant_id", "min_depth"],
+        select(
+            ancestors.c.node_id,
+            descendants.c.node_id,
+            ancestors.c.depth + descendants.c.depth + 1,
+        ).select_from(ancestors.join(descendants, true())),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[dag_closure.c.ancestor_id, dag_closure.c.descendant_id],
+        set_={
+            "min_depth": func.least(dag_closure.c.min_depth, stmt.excluded.min_depth)
+        },
+    )
+    conn.execute(stmt)
+
+
+def remove_edges(conn: Connection, edges: Iterable[Edge]) -> None:
+    """ Updates the closure after the given edges were deleted from `dag_edge`.
+
+        Only pairs (a, d) where `a` is an ancestor of the source of a removed edge
+        and `d` is a descendant of its target may have lost their shortest path.
+        These are deleted and re-derived from the remaining edges by relaxation,
+        which converges after as many rounds as the longest re-derived path.
+    """
+    sources = {from_id for from_id, _ in edges}
+    targets = {to_id for _, to_id in edges}
+    if not sources:
+        return
+    affected_ancestors: Set[int] = set(sources)
+    affected_ancestors.update(
+        conn.execute(
+            select(dag_closure.c.ancestor_id).where(
+                dag_closure.c.descendant_id.in_(sources)
+            )
+        ).scalars()
+    )
+    affected_descendants: Set[int] = set(targets)
+    affected_descendants.update(
+        conn.execute(
+            select(dag_closure.c.descendant_id).where(
+                dag_closure.c.ancestor_id.in_(targets)
+            )
+        ).scalars()
+    )
+    ancestor_ids, descendant_ids = list(affected_ancestors), list(affected_descendants)
+
+    conn.execute(
+        dag_closure.delete().where(
+            dag_closure.c.ancestor_id.in_(ancestor_ids)
+            & dag_closure.c.descendant_id.in_(descendant_ids)
+        )
+    )
+
+    targets_and_descendants = select(
+        func.unnest(literal(descendant_ids, ARRAY(Integer))).label("node_id")
+    ).subquery()
+    reachable = union_all(
+        select(
+            targets_and_descendants.c.node_id.label("ancestor_id"),
+            targets_and_descendants.c.node_id.label("descendant_id"),
+            literal(0).label("depth"),
+        ),
+        select(
+            dag_closure.c.ancestor_id,
+            dag_closure.c.descendant_id,
+            dag_closure.c.min_depth,
+        ).where(dag_closure.c.descendant_id.in_(descendant_ids)),
+    ).subquery()
+    stmt = insert(dag_closure).from_select(
+        ["ancestor_id", "descendant_id", "min_depth"],
+        select(
+            dag_edge.c.from_node_id,
+            reachable.c.descendant_id,
+            func.min(reachable.c.depth) + 1,
+        )
+        .select_from(
+            dag_edge.join(reachable, reachable.c.ancestor_id == dag_edge.c.to_node_id)
+        )
+        .where(dag_edge.c.from_node_id.in_(ancestor_ids))
+        .group_by(dag_edge.c.from_node_id, reachable.c.descendant_id),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[dag_closure.c.ancestor_id, dag_closure.c.descendant_id],
+        set_={"min_depth": stmt.excluded.min_depth},
+        where=stmt.excluded.min_depth < dag_closure.c.min_depth,
+    )
+    while conn.execute(stmt).rowcount:
+        pass
+
+
+def rebuild_closure(conn: Connection, university_id: int) -> int:
+    """ Recomputes the closure of all DAG nodes of a university from scratch,
+        breadth-first, one path length per round. Returns the number of rows. """
+    university_nodes = select(dagnode.c.node_id).where(
+        dagnode.c.university_id == university_id
+    )
+    conn.execute(
+        dag_closure.delete().where(dag_closure.c.ancestor_id.in_(university_nodes))
+    )
+    rows = conn.execute(
+        insert(dag_closure).from_select(
+            ["ancestor_id", "descendant_id", "min_depth"],
+            select(dag_edge.c.from_node_id, dag_edge.c.to_node_id, literal(1)).where(
+                dag_edge.c.from_node_id.in_(university_nodes)
+            ),
+        )
+    ).rowcount
+    depth, inserted = 1, rows
+    while inserted:
+        # pairs first discovered in this round have no shorter path
+        stmt = (
+            insert(dag_closure)
+            .from_select(
+                ["ancestor_id", "descendant_id", "min_depth"],
+                select(
+                    dag_closure.c.ancestor_id, dag_edge.c.to_node_id, literal(depth + 1)
+                )
+                .select_from(
+                    dag_closure.join(
+                        dag_edge, dag_edge.c.from_node_id == dag_closure.c.descendant_id
+                    )
+                )
+                .where(
+                    (dag_closure.c.min_depth == depth)
+                    & dag_closure.c.ancestor_id.in_(university_nodes)
+                )
+                .distinct(),
+            )
+            .on_conflict_do_nothing()
+        )
+        inserted = conn.execute(stmt).rowcount
+        rows += inserted
+        depth += 1
+    return rows
+
+
+def descendants_query(node_id: int) -> Select:
+    """ Selects the ids of all nodes reachable from a node, with their distance """
+    return select(dag_closure.c.descendant_id, dag_closure.c.min_depth).where(
+        dag_closure.c.ancestor_id == node_id
+    )
+
+
+def is_ancestor(db: Session, ancestor_id: int, descendant_id: int) -> bool:
+    """ Whether there's a path from `ancestor_id` to `descendant_id`, e.g, whether a
+        course set node is a (possibly indirect) prerequisite of another """
+    return bool(
+        db.execute(
+            select(
+                exists().where(
+                    (dag_closure.c.ancestor_id == ancestor_id)
+                    & (dag_closure.c.descendant_id == descendant_id)
+                )
+            )
+        ).scalar()
+    )
@@ -0,0 +1,308 @@
+import json
+from array import array
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+from sqlalchemy import func, select, union, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app import models
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.base_class import table_of
+from app.db.events import on_university_change
+from app.db.versions import get_data_version
+
+NODE_TYPES = ("DAGNode", "DAGRootNode", "CourseSetNode", "ORNode")
+ROOT, COURSE_SET, OR = (NODE_TYPES.index(t) for t in NODE_TYPES[1:])
+
+dag_edge = models.dag_edge_assoc
+dag_closure = models.dag_closure
+dagnode = table_of(models.DAGNode)
+dagrootnode = table_of(models.DAGRootNode)
+coursesetnode = table_of(models.CourseSetNode)
+
+
+def _csr(count: int, pairs: List[List[int]]) -> Tuple[array, array]:
+    """ Packs adjacency lists into compressed sparse row form: the neighbours of
+        node `i` are `targets[offsets[i]:offsets[i + 1]]` """
+    offsets = array("i", [0])
+    targets = array("i")
+    for i in range(count):
+        targets.extend(pairs[i])
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+class CompiledDAG:
+    """ A read-only, compact representation of the DAG of a track.
+
+        Nodes are re-numbered with dense integer indices (the root has index 0),
+        and edges are stored as integer adjacency arrays in both directions.
+    """
+
+    def __init__(
+        self,
+        university_id: int,
+        track_id: str,
+        nodes: Sequence[Mapping[str, Any]],
+        edges: List[Tuple[int, int]],
+    ):
+        self.university_id = university_id
+        self.track_id = track_id
+        nodes = sorted(nodes, key=lambda n: n["node_type"] != "DAGRootNode")
+
+        self.node_ids = array("l", (n["node_id"] for n in nodes))
+        self.index: Dict[int, int] = {nid: i for i, nid in enumerate(self.node_ids)}
+        self.node_types = array("b", (NODE_TYPES.index(n["node_type"]) for n in nodes))
+        self.course_set_ids: List[Optional[int]] = [n["course_set_id"] for n in nodes]
+        self.extra_data: List[Mapping[str, Any]] = [n["extra_data"] for n in nodes]
+
+        children: List[List[int]] = [[] for _ in nodes]
+        parents: List[List[int]] = [[] for _ in nodes]
+        for from_id, to_id in edges:
+            src, dst = self.index[from_id], self.index[to_id]
+            children[src].append(dst)
+            parents[dst].append(src)
+        self.child_offsets, self.child_targets = _csr(len(nodes), children)
+        self.parent_offsets, self.parent_targets = _csr(len(nodes), parents)
+        self._graph_json: Optional[bytes] = None
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    def children(self, i: int) -> array:
+        start, end = self.child_offsets[i], self.child_offsets[i + 1]
+        return self.child_targets[start:end]
+
+    def parents(self, i: int) -> array:
+        start, end = self.parent_offsets[i], self.parent_offsets[i + 1]
+        return self.parent_targets[start:end]
+
+    def node_row(self, i: int) -> Dict[str, Any]:
+        return {
+            "node_id": self.node_ids[i],
+            "university_id": self.university_id,
+            "node_type": NODE_TYPES[self.node_types[i]],
+            "extra_data": self.extra_data[i],
+        }
+
+    def graph(self) -> Dict[str, Any]:
+        """ Returns the DAG with every node appearing once, keyed by its id, and a
+            separate list of (from_node_id, to_node_id) edges """
+        nodes = {}
+        for i, node_id in enumerate(self.node_ids):
+            node = self.node_row(i)
+            node_type = self.node_types[i]
+            node["course_set_id"] = self.course_set_ids[i]
+            node["track_id"] = self.track_id if node_type == ROOT else None
+            nodes[node_id] = node
+        edges = [
+            (self.node_ids[i], self.node_ids[child])
+            for i in range(len(self))
+            for child in self.children(i)
+        ]
+        return {
+            "university_id": self.university_id,
+            "track_id": self.track_id,
+            "root_id": self.node_ids[0],
+            "nodes": nodes,
+            "edges": edges,
+        }
+
+    def graph_json(self) -> bytes:
+        """ The serialized form of `graph()`, computed once per compiled DAG """
+        if self._graph_json is None:
+            self._graph_json = json.dumps(
+                self.graph(), separators=(",", ":"), ensure_ascii=False
+            ).encode()
+        return self._graph_json
+
+    def descendant_rows(
+        self, max_depth: int = 10, skip: int = 0, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """ Returns the root and every node reachable from it, along with its parent
+            and distance from the root. As with a recursive query over the edges,
+            a node appears once per path leading to it, and paths are expanded
+            from nodes whose distance is at most `max_depth`.
+
+            Only the `limit` rows following the first `skip` ones are returned.
+            Repetitions of a row are counted rather than built, so the time taken
+            depends on the size of the DAG and the rows returned, but not on the
+            number of paths, which may be exponential in the depth.
+        """
+        end = None if limit is None else skip + limit
+        rows: List[Dict[str, Any]] = []
+        # index of the next row among all rows
+        position = 0
+
+        def add(row: Dict[str, Any], count: int) -> None:
+            nonlocal position
+            start, stop = max(position, skip), position + count
+            if end is not None:
+                stop = min(stop, end)
+            rows.extend(row for _ in range(stop - start))
+            position += count
+
+        add(dict(self.node_row(0), distance=0, parent_id=None), 1)
+        # number of distinct paths from the root to each node at the current level
+        level: Dict[int, int] = {0: 1}
+        distance = 0
+        while level and distance <= max_depth:
+            next_level: Dict[int, int] = {}
+            for parent, paths in level.items():
+                parent_id = self.node_ids[parent]
+                for child in self.children(parent):
+                    if end is not None and position >= end:
+                        return rows
+                    row = dict(
+                        self.node_row(child), distance=distance + 1, parent_id=parent_id
+                    )
+                    add(row, paths)
+                    next_level[child] = next_level.get(child, 0) + paths
+            level = next_level
+            distance += 1
+        return rows
+
+
+def compile_track_dag(
+    db: Session, university_id: int, track_id: str
+) -> Optional[CompiledDAG]:
+    """ Loads all nodes reachable from the root of a track (using the DAG's
+        transitive closure), and the edges between them, in two queries.
+        Returns None if the track has no DAG. """
+    root_id = select(dagrootnode.c.node_id).where(
+        (dagrootnode.c.university_id == university_id)
+        & (dagrootnode.c.track_id == track_id)
+    )
+    reachable = union_all(
+        root_id,
+        select(dag_closure.c.descendant_id).where(
+            dag_closure.c.ancestor_id.in_(root_id)
+        ),
+    )
+
+    nodes = (
+        db.execute(
+            select(
+                dagnode.c.node_id,
+                dagnode.c.node_type,
+                dagnode.c.extra_data,
+                coursesetnode.c.course_set_id,
+            )
+            .select_from(dagnode)
+            .outerjoin(coursesetnode, coursesetnode.c.node_id == dagnode.c.node_id)
+            .where(dagnode.c.node_id.in_(reachable))
+        )
+        .mappings()
+        .all()
+    )
+    if not nodes:
+        return None
+
+    node_ids = [n["node_id"] for n in nodes]
+    edges = db.execute(
+        select(dag_edge.c.from_node_id, dag_edge.c.to_node_id).where(
+            dag_edge.c.from_node_id.in_(node_ids)
+        )
+    ).all()
+    return CompiledDAG(
+        university_id, track_id, list(nodes), [(e[0], e[1]) for e in edges]
+    )
+
+
+def track_graphs(
+    db: Session, university_id: int, track_ids: Union[Iterable[str], Select]
+) -> Dict[str, Any]:
+    """ Loads the DAGs of many tracks in a single query, in the format of
+        `CompiledDAG.graph()`. Nodes shared by several tracks appear once, and
+        `roots` maps every track which has a DAG to the id of its root.
+        `track_ids` may also be a query selecting the ids. """
+    roots = (
+        select(dagrootnode.c.node_id)
+        .where(
+            (dagrootnode.c.university_id == university_id)
+            & dagrootnode.c.track_id.in_(track_ids)
+        )
+        .subquery()
+    )
+    reachable = union(
+        select(roots.c.node_id),
+        select(dag_closure.c.descendant_id).join(
+            roots, roots.c.node_id == dag_closure.c.ancestor_id
+        ),
+    )
+    # the edges of every node are aggregated into its row, saving a round trip
+    children = (
+        select(func.array_agg(dag_edge.c.to_node_id))
+        .where(dag_edge.c.from_node_id == dagnode.c.node_id)
+        .scalar_subquery()
+    )
+    rows = db.execute(
+        select(
+            dagnode.c.node_id,
+            dagnode.c.node_type,
+            dagnode.c.extra_data,
+            coursesetnode.c.course_set_id,
+            dagrootnode.c.track_id,
+            children.label("children"),
+        )
+        .select_from(dagnode)
+        .outerjoin(coursesetnode, coursesetnode.c.node_id == dagnode.c.node_id)
+        .outerjoin(dagrootnode, dagrootnode.c.node_id == dagnode.c.node_id)
+        .where(dagnode.c.node_id.in_(reachable))
+        .order_by(dagnode.c.node_id)
+    )
+    graph: Dict[str, Any] = {
+        "university_id": university_id,
+        "roots": {},
+        "nodes": {},
+        "edges": [],
+    }
+    for row in rows:
+        graph["nodes"][row.node_id] = {
+            "node_id": row.node_id,
+            "university_id": university_id,
+            "node_type": row.node_type,
+            "extra_data": row.extra_data,
+            "course_set_id": row.course_set_id,
+            "track_id": row.track_id,
+        }
+        if row.track_id is not None:
+            graph["roots"][row.track_id] = row.node_id
+        graph["edges"].extend(
+            (row.node_id, child) for child in sorted(row.children or ())
+        )
+    return graph
+
+
+dag_cache: LRUCache[CompiledDAG] = LRUCache("track_dag", settings.DAG_CACHE_SIZE)
+
+
+def get_compiled_dag(
+    db: Session, university_id: int, track_id: str
+) -> Optional[CompiledDAG]:
+    """ Returns the compiled DAG of a track, compiling it on first access, or once
+        the university's data version changed """
+    return dag_cache.get_or_build(
+        (university_id, track_id),
+        lambda: compile_track_dag(db, university_id, track_id),
+        get_data_version(db, university_id),
+    )
+
+
+@on_university_change(models.DAGNode)
+def _invalidate_dag_cache(university_ids: Set[int]) -> None:
+    for university_id in university_ids:
+        dag_cache.invalidate_university(university_id)
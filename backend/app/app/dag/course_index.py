@@ -0,0 +1,148 @@
+""" Maintenance of `course_requirement_index`, the inverted index from a course to
+    the course sets, DAG nodes and tracks which require it.
+
+    Within every transaction which writes to the DAG or course sets of a
+    university, just before it commits, the index rows of the written course sets,
+    and of the written nodes and the nodes reachable from them, are deleted and
+    re-derived from the closure table with a single INSERT ... SELECT. The index of
+    a university is only rebuilt entirely after writes which didn't go through the
+    ORM.
+"""
+from typing import Any, Collection, List, Set
+
+from sqlalchemy import Integer, any_, func, literal, select, union
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import Connection, Row
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app import models
+from app.db.base_class import table_of
+from app.db.events import on_university_write, touched_by_core
+
+from .maintenance import dag_writes
+
+course_index = models.course_requirement_index
+dag_closure = models.dag_closure
+dagrootnode = table_of(models.DAGRootNode)
+coursesetnode = table_of(models.CourseSetNode)
+membership = table_of(models.CourseSetMembership)
+
+
+def _referencing(university_id: int, *filters: Any) -> Select:
+    return (
+        select(
+            membership.c.university_id,
+            membership.c.course_id,
+            dagrootnode.c.track_id,
+            coursesetnode.c.node_id,
+            coursesetnode.c.course_set_id,
+            dag_closure.c.min_depth,
+        )
+        .select_from(dagrootnode)
+        .join(dag_closure, dag_closure.c.ancestor_id == dagrootnode.c.node_id)
+        .join(coursesetnode, coursesetnode.c.node_id == dag_closure.c.descendant_id)
+        .join(
+            membership,
+            (membership.c.university_id == coursesetnode.c.university_id)
+            & (membership.c.set_id == coursesetnode.c.course_set_id),
+        )
+        .where(dagrootnode.c.university_id == university_id, *filters)
+    )
+
+
+def _insert(conn: Connection, referencing: Select) -> int:
+    return conn.execute(
+        course_index.insert().from_select(
+            [
+                "university_id",
+                "course_id",
+                "track_id",
+                "node_id",
+                "course_set_id",
+                "depth",
+            ],
+            referencing,
+        )
+    ).rowcount
+
+
+def rebuild_course_index(conn: Connection, university_id: int) -> int:
+    """ Recomputes the index rows of a university, returning their number """
+    conn.execute(
+        course_index.delete().where(course_index.c.university_id == university_id)
+    )
+    return _insert(conn, _referencing(university_id))
+
+
+def update_course_index(
+    conn: Connection,
+    university_id: int,
+    node_ids: Collection[int],
+    course_set_ids: Collection[int],
+) -> int:
+    """ Recomputes the index rows of a university's course set nodes which are among
+        `node_ids` or reachable from them, or whose set is among `course_set_ids`,
+        returning their number """
+    if not node_ids and not course_set_ids:
+        return 0
+    ids = literal(list(node_ids), ARRAY(Integer))
+    nodes = union(
+        select(func.unnest(ids)),
+        select(dag_closure.c.descendant_id).where(
+            dag_closure.c.ancestor_id == any_(ids)
+        ),
+    )
+    sets = list(course_set_ids)
+    conn.execute(
+        course_index.delete().where(
+            (course_index.c.university_id == university_id)
+            & (
+                course_index.c.node_id.in_(nodes)
+                | course_index.c.course_set_id.in_(sets)
+            )
+        )
+    )
+    return _insert(
+        conn,
+        _referencing(
+            university_id,
+            coursesetnode.c.node_id.in_(nodes)
+            | coursesetnode.c.course_set_id.in_(sets),
+        ),
+    )
+
+
+def required_by(db: Session, university_id: int, course_id: str) -> List[Row]:
+    """ Returns the index rows of a course, ordered by track and depth """
+    return db.execute(
+        select(
+            course_index.c.track_id,
+            course_index.c.node_id,
+            course_index.c.course_set_id,
+            course_index.c.depth,
+        )
+        .where(
+            (course_index.c.university_id == university_id)
+            & (course_index.c.course_id == course_id)
+        )
+        .order_by(course_index.c.track_id, course_index.c.depth, course_index.c.node_id)
+    ).all()
+
+
+_MODELS = (models.DAGNode, models.CourseSet, models.CourseSetMembership)
+
+
+@on_university_write(*_MODELS)
+def _update_course_indices(session: Session, university_ids: Set[int]) -> None:
+    conn = session.connection()
+    writes = dag_writes(session)
+    # the index rows of a node only depend on its ancestors
+    node_ids = writes.nodes | {to_id for _, to_id in writes.edges}
+    rebuilt = touched_by_core(session, *_MODELS)
+    for university_id in sorted(university_ids):
+        if university_id in rebuilt:
+            rebuild_course_index(conn, university_id)
+        else:
+            course_set_ids = writes.course_sets.get(university_id, set())
+            update_course_index(conn, university_id, node_ids, course_set_ids)
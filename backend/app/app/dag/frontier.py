@@ -0,0 +1,184 @@
+""" The "frontier" of a student in a track: the course sets which the student may
+    take next, as all of their prerequisites (parents in the DAG) are passed, but
+    which the student hasn't completed yet.
+
+    The DAG is read as in `app.dag.audit`: a node follows its parents, and the
+    children of an `ORNode` are alternatives, any of which satisfies it. A node is
+    open (unlocked) when all of its parents are passed, and it's passed when:
+    - A `CourseSetNode`: the completed courses meet the minimal subset size and
+      minimal credits of its course set.
+    - An `ORNode`: it's open, as all of its alternatives become available at once,
+      and the student may choose any of them. Whether one of them was completed,
+      which satisfies the node in an audit, doesn't unlock anything.
+    - A `DAGRootNode`: always.
+
+    Completing courses can only cause nodes to become passed, so the frontier is
+    updated by propagating newly passed nodes to their children, without
+    re-evaluating the rest of the DAG.
+"""
+from typing import Any, Dict, Iterable, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.events import on_university_change
+from app.db.versions import get_data_version
+
+from .audit import TrackRequirements, bits, get_track_requirements, popcount
+from .compiled import COURSE_SET
+
+
+class Frontier:
+    """ The frontier of a set of completed courses in a track, which can be extended
+        with more completed courses """
+
+    def __init__(self, requirements: TrackRequirements, completed: int = 0):
+        dag = requirements.dag
+        self.requirements = requirements
+        self.completed = completed
+        self.parents = [tuple(dag.parents(i)) for i in range(len(dag))]
+        self.passed = bytearray(len(dag))
+        self.passed_parents = [0] * len(dag)
+        # open course set nodes which aren't passed
+        self.nodes: Set[int] = set()
+        for node in range(len(dag)):
+            self._refresh(node)
+
+    def copy(self) -> "Frontier":
+        frontier = Frontier.__new__(Frontier)
+        frontier.requirements = self.requirements
+        frontier.completed = self.completed
+        frontier.parents = self.parents
+        frontier.passed = self.passed[:]
+        frontier.passed_parents = self.passed_parents[:]
+        frontier.nodes = set(self.nodes)
+        return frontier
+
+    def _set_met(self, node: int) -> bool:
+        requirements = self.requirements
+        bounds = requirements.bounds[node]
+        taken = requirements.masks[node] & self.completed
+        if popcount(taken) < (bounds.min_subset_size or 0):
+            return False
+        if not bounds.min_credits:
+            return True
+        credits = sum(
+            c * popcount(m & taken) for c, m in requirements.credit_masks[node]
+        )
+        if bounds.max_credits is not None:
+            credits = min(credits, bounds.max_credits)
+        return credits >= bounds.min_credits
+
+    def _is_open(self, node: int) -> bool:
+        return self.passed_parents[node] == len(self.parents[node])
+
+    def _refresh(self, node: int) -> None:
+        """ Re-evaluates a node, propagating to its descendants if it became passed """
+        node_types = self.requirements.dag.node_types
+        children = self.requirements.children
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if self.passed[node]:
+                continue
+            is_open = self._is_open(node)
+            if node_types[node] == COURSE_SET:
+                passed = self._set_met(node)
+                if is_open and not passed:
+                    self.nodes.add(node)
+                else:
+                    self.nodes.discard(node)
+            else:
+                passed = is_open
+            if passed:
+                self.passed[node] = 1
+                for child in children[node]:
+                    self.passed_parents[child] += 1
+                    stack.append(child)
+
+    def complete(self, course_ids: Iterable[str]) -> None:
+        """ Marks more courses as completed, only re-evaluating the nodes containing
+            them and the children of nodes which become passed """
+        index = self.requirements.course_index
+        course_nodes = self.requirements.course_nodes()
+        for course_id in course_ids:
+            bit = index.get(course_id)
+            if bit is None or self.completed >> bit & 1:
+                continue
+            self.completed |= 1 << bit
+            for node in course_nodes[bit]:
+                self._refresh(node)
+
+    def courses(self) -> Dict[str, Any]:
+        """ Returns the frontier's course set nodes, with their courses which
+            weren't completed yet, and all of these courses """
+        requirements = self.requirements
+        dag = requirements.dag
+        nodes = []
+        all_courses: Dict[str, None] = {}
+        for node in sorted(self.nodes, key=dag.node_ids.__getitem__):
+            remaining = requirements.masks[node] & ~self.completed
+            course_ids = [requirements.course_ids[bit] for bit in bits(remaining)]
+            all_courses.update(dict.fromkeys(course_ids))
+            nodes.append(
+                {
+                    "node_id": dag.node_ids[node],
+                    "course_set_id": dag.course_set_ids[node],
+                    "course_ids": course_ids,
+                }
+            )
+        return {
+            "university_id": dag.university_id,
+            "track_id": dag.track_id,
+            "course_ids": list(all_courses),
+            "nodes": nodes,
+        }
+
+
+frontier_cache: LRUCache[Frontier] = LRUCache("track_frontier", settings.DAG_CACHE_SIZE)
+
+
+def get_frontier(
+    db: Session,
+    university_id: int,
+    track_id: str,
+    completed_courses: Iterable[str],
+    added_courses: Iterable[str] = (),
+) -> Optional[Frontier]:
+    """ Returns the frontier of the given completed courses. If the frontier without
+        the recently `added_courses` was requested before, it is extended with them
+        rather than computed from scratch. Frontiers are cached by the university's
+        data version, and the returned frontier is shared, and must not be
+        modified. """
+    version = get_data_version(db, university_id)
+    requirements = get_track_requirements(db, university_id, track_id)
+    if requirements is None:
+        return None
+    added_courses = list(added_courses)
+    completed = requirements.encode(completed_courses)
+    completed |= requirements.encode(added_courses)
+    # frontiers are only reused along with the requirements encoding their courses
+    key = (university_id, track_id, completed)
+    frontier = frontier_cache.get(key, version)
+    if frontier is not None and frontier.requirements is requirements:
+        return frontier
+
+    added = requirements.encode(added_courses)
+    base = frontier_cache.get((university_id, track_id, completed & ~added), version)
+    if base is not None and base.requirements is requirements:
+        frontier = base.copy()
+        frontier.complete(added_courses)
+    else:
+        frontier = Frontier(requirements, completed)
+    frontier_cache.put(key, frontier, version=version)
+    return frontier
+
+
+@on_university_change(
+    models.DAGNode, models.CourseSet, models.CourseSetMembership, models.Course
+)
+def _invalidate_frontier_cache(university_ids: Set[int]) -> None:
+    for university_id in university_ids:
+        frontier_cache.invalidate_university(university_id)
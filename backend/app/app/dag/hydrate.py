@@ -0,0 +1,96 @@
+""" Loading the whole DAG of a track into ORM objects with a fixed number of queries.
+
+    Walking a track through the lazy `children`, `parents` and `course_set`
+    relationships issues queries per node. Instead, `load_track_dag` loads all nodes
+    reachable from the track's root, their edges, course sets, memberships and
+    courses up front, and populates these relationships as if they were loaded
+    from the database, so walking the returned DAG doesn't issue any queries.
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import Session, attributes, selectinload, with_polymorphic
+
+from app import models
+from app.db.base_class import table_of
+
+dagrootnode = table_of(models.DAGRootNode)
+dag_edge = models.dag_edge_assoc
+dag_closure = models.dag_closure
+
+
+def load_track_dag(
+    db: Session, university_id: int, track_id: str
+) -> Optional[models.DAGRootNode]:
+    """ Loads the DAG of a track, returning its root, or None if the track has none.
+        Takes four queries regardless of the size of the DAG: nodes, edges, course
+        sets, and memberships with their courses. """
+    root_id = select(dagrootnode.c.node_id).where(
+        (dagrootnode.c.university_id == university_id)
+        & (dagrootnode.c.track_id == track_id)
+    )
+    reachable = union_all(
+        root_id,
+        select(dag_closure.c.descendant_id).where(
+            dag_closure.c.ancestor_id.in_(root_id)
+        ),
+    )
+    any_node = with_polymorphic(
+        models.DAGNode, [models.DAGRootNode, models.CourseSetNode, models.ORNode]
+    )
+    nodes: Dict[int, models.DAGNode] = {
+        node.node_id: node
+        for node in db.query(any_node).filter(any_node.node_id.in_(reachable))
+    }
+    root = next(
+        (node for node in nodes.values() if isinstance(node, models.DAGRootNode)), None
+    )
+    if root is None:
+        return None
+
+    children: Dict[int, List[models.DAGNode]] = defaultdict(list)
+    parents: Dict[int, List[models.DAGNode]] = defaultdict(list)
+    # parents outside of the track, whose nodes aren't loaded
+    outside: Set[int] = set()
+    for from_id, to_id in db.execute(
+        select(dag_edge.c.from_node_id, dag_edge.c.to_node_id)
+        .where(dag_edge.c.to_node_id.in_(list(nodes)))
+        .order_by(dag_edge.c.from_node_id, dag_edge.c.to_node_id)
+    ):
+        parent = nodes.get(from_id)
+        if parent is None:
+            outside.add(to_id)
+            continue
+        children[from_id].append(nodes[to_id])
+        parents[to_id].append(parent)
+
+    course_set_ids = {
+        node.course_set_id
+        for node in nodes.values()
+        if isinstance(node, models.CourseSetNode)
+    }
+    course_sets = {
+        course_set.id: course_set
+        for course_set in db.query(models.CourseSet)
+        .filter(
+            (models.CourseSet.university_id == university_id)
+            & models.CourseSet.id.in_(course_set_ids)
+        )
+        .options(
+            selectinload(  # type: ignore
+                models.CourseSet.course_memberships
+            ).joinedload(models.CourseSetMembership.course)
+        )
+    }
+
+    for node_id, node in nodes.items():
+        # every child of a reachable node is reachable, so its children are complete
+        attributes.set_committed_value(node, "children", children[node_id])
+        if node_id not in outside:
+            attributes.set_committed_value(node, "parents", parents[node_id])
+        if isinstance(node, models.CourseSetNode):
+            attributes.set_committed_value(
+                node, "course_set", course_sets[node.course_set_id]
+            )
+    return root
@@ -0,0 +1,224 @@
+""" Ingesting the DAG of a track, e.g, when importing the data of a university.
+
+    The DAG to ingest is described by `NodeSpec`s, and its merkle hashes are
+    computed like those stored for existing nodes (see `app.dag.merkle`). Subgraphs
+    which are identical to existing ones of the university are reused as they are,
+    so re-ingesting a mostly unchanged track only writes the nodes which changed.
+"""
+from typing import Any, Dict, Hashable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db.base_class import table_of
+
+from .audit import SetBounds
+from .merkle import content_hash, merkle_hash, update_written_hashes
+
+dagnode = table_of(models.DAGNode)
+dagrootnode = table_of(models.DAGRootNode)
+coursesetnode = table_of(models.CourseSetNode)
+dag_closure = models.dag_closure
+
+NO_BOUNDS = SetBounds(None, None, None, None)
+SINGLETON_BOUNDS = SetBounds(1, 1, None, None)
+
+
+class NodeSpec(NamedTuple):
+    """ A node of a DAG to ingest """
+
+    # 'DAGRootNode', 'CourseSetNode' or 'ORNode'
+    node_type: str
+    # keys of the node's children
+    children: Tuple[Hashable, ...] = ()
+    # the courses and bounds of the course set of a 'CourseSetNode'
+    course_ids: Tuple[str, ...] = ()
+    bounds: SetBounds = NO_BOUNDS
+
+
+# nodes by their keys, which may be of any hashable type
+NodeSpecs = Mapping[Any, NodeSpec]
+
+
+def _post_order(nodes: NodeSpecs, root: Hashable) -> List[Hashable]:
+    """ Orders the keys of the nodes reachable from the root, children first """
+    order: List[Hashable] = []
+    visited = {root}
+    stack = [(root, iter(nodes[root].children))]
+    while stack:
+        key, children = stack[-1]
+        for child in children:
+            if child not in visited:
+                visited.add(child)
+                stack.append((child, iter(nodes[child].children)))
+                break
+        else:
+            stack.pop()
+            order.append(key)
+    return order
+
+
+def spec_hashes(nodes: NodeSpecs, root: Hashable) -> Dict[Hashable, bytes]:
+    """ Computes the merkle hash of every node reachable from the root """
+    hashes: Dict[Hashable, bytes] = {}
+    for key in _post_order(nodes, root):
+        spec = nodes[key]
+        if spec.node_type == "CourseSetNode":
+            content = content_hash(spec.node_type, spec.bounds, spec.course_ids)
+        else:
+            content = content_hash(spec.node_type)
+        hashes[key] = merkle_hash(content, (hashes[child] for child in spec.children))
+    return hashes
+
+
+def sync_track_dag(
+    db: Session, university_id: int, track_id: str, nodes: NodeSpecs, root: Hashable,
+) -> int:
+    """ Makes the DAG of a track equal to the given one, without committing. Existing
+        subgraphs of the university with the same merkle hash are reused, and nodes
+        of the previous DAG of the track which are no longer reachable from any root
+        are deleted, along with their course sets which no other node uses. Returns
+        the number of created nodes. """
+    hashes = spec_hashes(nodes, root)
+    # the stored hashes don't reflect writes which weren't committed yet
+    db.flush()
+    update_written_hashes(db, [university_id])
+    root_node: Optional[models.DAGRootNode] = (
+        db.query(models.DAGRootNode)
+        .filter_by(university_id=university_id, track_id=track_id)
+        .one_or_none()
+    )
+    if root_node is not None:
+        db.refresh(root_node, ["merkle_hash"])
+        if root_node.merkle_hash == hashes[root]:
+            return 0
+
+    existing: Dict[bytes, int] = dict(
+        db.execute(
+            select(dagnode.c.merkle_hash, dagnode.c.node_id).where(
+                (dagnode.c.university_id == university_id)
+                & (dagnode.c.node_type != "DAGRootNode")
+                & dagnode.c.merkle_hash.in_(set(hashes.values()))
+            )
+        ).all()
+    )
+    course_ids = {course_id for key in hashes for course_id in nodes[key].course_ids}
+    courses = {
+        course.id: course
+        for course in db.query(models.Course).filter(
+            (models.Course.university_id == university_id)
+            & models.Course.id.in_(course_ids)
+        )
+    }
+    unknown = course_ids - set(courses)
+    if unknown:
+        raise ValueError(f"Unknown courses: {sorted(unknown)}")
+
+    university = db.query(models.University).get(university_id)
+    objects: Dict[Hashable, models.DAGNode] = {}
+    created = 0
+    for key in _post_order(nodes, root):
+        if key == root:
+            continue
+        node_id = existing.get(hashes[key])
+        if node_id is not None:
+            objects[key] = db.query(models.DAGNode).get(node_id)
+            continue
+        spec = nodes[key]
+        node: models.DAGNode
+        if (
+            spec.node_type == "CourseSetNode"
+            and spec.bounds == SINGLETON_BOUNDS
+            and len(spec.course_ids) == 1
+        ):
+            node = models.singleton_course_node(
+                courses[spec.course_ids[0]], intern=True
+            )
+        elif spec.node_type == "CourseSetNode":
+            course_set = models.CourseSet(
+                university=university, **spec.bounds._asdict()
+            )
+            for course_id in spec.course_ids:
+                course_set.courses.append(courses[course_id])
+            node = models.CourseSetNode(university=university, course_set=course_set)
+        elif spec.node_type == "ORNode":
+            node = models.ORNode(university=university)
+        else:
+            raise ValueError(f"Unexpected node type {spec.node_type} of node {key}")
+        node.children = [objects[child] for child in spec.children]
+        objects[key] = node
+        created += 1
+
+    previous: List[int] = []
+    if root_node is None:
+        track = (
+            db.query(models.Track)
+            .filter_by(university_id=university_id, id=track_id)
+            .one()
+        )
+        root_node = models.DAGRootNode(university=university, track=track)
+        db.add(root_node)
+    else:
+        previous = list(
+            db.execute(
+                select(dag_closure.c.descendant_id).where(
+                    dag_closure.c.ancestor_id == root_node.node_id
+                )
+            ).scalars()
+        )
+    root_node.children = [objects[child] for child in nodes[root].children]
+    db.flush()
+
+    if previous:
+        reachable = (
+            select(dag_closure.c.descendant_id)
+            .join(dagrootnode, dagrootnode.c.node_id == dag_closure.c.ancestor_id)
+            .where(dagrootnode.c.university_id == university_id)
+        )
+        orphan_sets: Set[int] = set()
+        for orphan in db.query(models.DAGNode).filter(
+            models.DAGNode.node_id.in_(previous)
+            & models.DAGNode.node_id.notin_(reachable)
+        ):
+            if isinstance(orphan, models.CourseSetNode):
+                orphan_sets.add(orphan.course_set_id)
+            db.delete(orphan)
+        db.flush()
+        _delete_unused_course_sets(db, university_id, orphan_sets)
+    return created
+
+
+def _delete_unused_course_sets(
+    db: Session, university_id: int, set_ids: Set[int]
+) -> None:
+    """ Deletes the given course sets which no node references anymore, along with
+        their memberships. Canonical singleton sets, of which there's one per
+        course, are kept for the next nodes requiring their course. """
+    if not set_ids:
+        return
+    unused = (
+        db.query(models.CourseSet)
+        .filter(
+            (models.CourseSet.university_id == university_id)
+            & models.CourseSet.id.in_(set_ids)
+            & models.CourseSet.singleton_course_id.is_(None)
+            & models.CourseSet.id.notin_(
+                select(coursesetnode.c.course_set_id).where(
+                    coursesetnode.c.university_id == university_id
+                )
+            )
+        )
+        .all()
+    )
+    if not unused:
+        return
+    for membership in db.query(models.CourseSetMembership).filter(
+        (models.CourseSetMembership.university_id == university_id)
+        & models.CourseSetMembership.set_id.in_([s.id for s in unused])
+    ):
+        db.delete(membership)
+    db.flush()
+    for course_set in unused:
+        db.delete(course_set)
+    db.flush()
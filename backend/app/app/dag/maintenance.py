@@ -0,0 +1,144 @@
+""" Keeps the derived DAG tables and columns (the closure table and the topological
+    order of nodes) consistent with `dag_edge`.
+
+    Edges added or removed through the ORM are handled by session hooks. Every added
+    edge is validated against the topological order before the closure is updated,
+    so a flush which would close a cycle fails with `CycleError`.
+
+    The nodes, edges and course sets written through the ORM are also recorded until
+    the transaction ends, see `dag_writes`, so that the tables derived from DAGs
+    and course sets can be updated where they changed.
+"""
+from typing import Any, Dict, Iterable, List, NamedTuple, Set, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, attributes
+
+from app import models
+from app.db.events import session_info, university_id_of
+
+from .closure import Edge, add_edge, rebuild_closure, remove_edges
+from .topo import load_order, reorder_for_edge, store_order
+
+dag_edge = models.dag_edge_assoc
+
+_DELETED_EDGES_KEY = "deleted_dag_edges"
+_WRITES_KEY = "dag_writes"
+# first key of the advisory locks serializing changes to the order of a university
+_ORDER_LOCK_NAMESPACE = 0x7D46
+
+
+def lock_university_dag(conn: Connection, university_id: int) -> None:
+    """ Serializes changes to the DAG of a university until the transaction ends, as
+        concurrent re-orderings of overlapping regions would conflict """
+    conn.execute(
+        select(func.pg_advisory_xact_lock(_ORDER_LOCK_NAMESPACE, university_id))
+    )
+
+
+def insert_edges(conn: Connection, university_id: int, edges: Iterable[Edge]) -> None:
+    """ Inserts many edges between existing nodes of a university at once, e.g, when
+        importing data. The edges are validated in memory against the whole DAG,
+        raising `CycleError` before anything is written. """
+    edges = list(edges)
+    if not edges:
+        return
+    lock_university_dag(conn, university_id)
+    topo = load_order(conn, university_id)
+    for from_id, to_id in edges:
+        topo.add_edge(from_id, to_id)
+    conn.execute(
+        dag_edge.insert(),
+        [{"from_node_id": from_id, "to_node_id": to_id} for from_id, to_id in edges],
+    )
+    store_order(conn, topo)
+    rebuild_closure(conn, university_id)
+
+
+class DAGWrites(NamedTuple):
+    # ids of the DAG nodes added, modified or deleted
+    nodes: Set[int]
+    # edges added or removed
+    edges: Set[Edge]
+    # ids of the course sets added, modified or deleted, or whose memberships were,
+    # by university
+    course_sets: Dict[int, Set[int]]
+
+
+def dag_writes(session: Session) -> DAGWrites:
+    """ What was written to DAGs and course sets through the ORM within the current
+        transaction, as of its last flush """
+    writes: DAGWrites = session_info(session).setdefault(
+        _WRITES_KEY, DAGWrites(set(), set(), {})
+    )
+    return writes
+
+
+def _edge_history(obj: models.DAGNode) -> Tuple[List[Edge], List[Edge]]:
+    # an edge is changed through the collection on one of its ends, which is
+    # therefore loaded; the other end is not loaded just for inspecting it
+    passive = attributes.PASSIVE_NO_INITIALIZE
+    added: List[Edge] = []
+    removed: List[Edge] = []
+    children = attributes.get_history(obj, "children", passive=passive)
+    added.extend((obj.node_id, child.node_id) for child in children.added or ())
+    removed.extend((obj.node_id, child.node_id) for child in children.deleted or ())
+    parents = attributes.get_history(obj, "parents", passive=passive)
+    added.extend((parent.node_id, obj.node_id) for parent in parents.added or ())
+    removed.extend((parent.node_id, obj.node_id) for parent in parents.deleted or ())
+    return added, removed
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_deleted_node_edges(
+    session: Session, flush_context: Any, instances: Any
+) -> None:
+    # the edges of deleted nodes are removed by the flush, so they must be
+    # collected while they can still be loaded
+    deleted: Set[Edge] = session_info(session).setdefault(_DELETED_EDGES_KEY, set())
+    for obj in session.deleted:
+        if isinstance(obj, models.DAGNode):
+            deleted.update((obj.node_id, child.node_id) for child in obj.children)
+            deleted.update((parent.node_id, obj.node_id) for parent in obj.parents)
+
+
+@event.listens_for(Session, "after_flush")
+def _update_derived_tables(session: Session, flush_context: Any) -> None:
+    added: Set[Edge] = set()
+    removed: Set[Edge] = session_info(session).pop(_DELETED_EDGES_KEY, set())
+    university_ids: Set[int] = set()
+    writes = dag_writes(session)
+    for obj in session.new | session.dirty:
+        if isinstance(obj, models.DAGNode):
+            obj_added, obj_removed = _edge_history(obj)
+            if obj_added:
+                university_ids.add(obj.university_id)
+            added.update(obj_added)
+            removed.update(obj_removed)
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, models.DAGNode):
+            writes.nodes.add(obj.node_id)
+        elif isinstance(obj, (models.CourseSet, models.CourseSetMembership)):
+            set_id = obj.id if isinstance(obj, models.CourseSet) else obj.set_id
+            uid = university_id_of(obj)
+            if uid is not None:
+                writes.course_sets.setdefault(uid, set()).add(set_id)
+    writes.edges.update(added ^ removed)
+    if not added and not removed:
+        return
+
+    conn = session.connection()
+    # removing edges never invalidates the order
+    remove_edges(conn, removed - added)
+    for university_id in sorted(university_ids):
+        lock_university_dag(conn, university_id)
+    for from_id, to_id in sorted(added - removed):
+        reorder_for_edge(conn, from_id, to_id)
+        add_edge(conn, from_id, to_id)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _discard_dag_writes(session: Session) -> None:
+    session_info(session).pop(_WRITES_KEY, None)
@@ -0,0 +1,342 @@
+""" Merkle hashes of DAG subgraphs.
+
+    Every node stores two hashes:
+    - `content_hash`, covering the node's type, and for a `CourseSetNode`, the
+      bounds and the course ids of its course set.
+    - `merkle_hash`, covering the node's `content_hash` and the merkle hashes of its
+      children, and therefore its whole subgraph.
+
+    Course ids are stable between yearly snapshots of a university, unlike node and
+    course set ids, so equal subgraphs of different snapshots have equal hashes.
+    This allows diffing a track between snapshots by only descending into subgraphs
+    whose hashes differ (`diff_track`), and re-ingesting a track while keeping its
+    unchanged subgraphs (`app.dag.ingest`).
+
+    Within every transaction writing to the DAG or course sets of a university,
+    just before it commits, the hashes of the written nodes, of the nodes of
+    written course sets, and of their ancestors, which are the only ones depending
+    on them, are recomputed. The hashes of a university are only recomputed
+    entirely after writes which didn't go through the ORM.
+"""
+import hashlib
+import json
+from collections import defaultdict
+from typing import Any, Collection, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Integer, any_, bindparam, func, literal, select, union
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.engine import Connection, Row
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db.base_class import table_of
+from app.db.events import on_university_write, touched_by_core
+
+from .audit import SetBounds
+from .maintenance import dag_writes
+
+dagnode = table_of(models.DAGNode)
+dagrootnode = table_of(models.DAGRootNode)
+coursesetnode = table_of(models.CourseSetNode)
+dag_edge = models.dag_edge_assoc
+dag_closure = models.dag_closure
+courseset = table_of(models.CourseSet)
+membership = table_of(models.CourseSetMembership)
+
+
+def content_hash(
+    node_type: str, bounds: Optional[SetBounds] = None, course_ids: Iterable[str] = ()
+) -> bytes:
+    digest = hashlib.sha256(node_type.encode())
+    if bounds is not None:
+        digest.update(json.dumps([list(bounds), sorted(course_ids)]).encode())
+    return digest.digest()
+
+
+def merkle_hash(content: bytes, child_hashes: Iterable[bytes]) -> bytes:
+    # children aren't ordered
+    digest = hashlib.sha256(content)
+    for child_hash in sorted(child_hashes):
+        digest.update(child_hash)
+    return digest.digest()
+
+
+def update_hashes(
+    conn: Connection,
+    university_id: int,
+    node_ids: Optional[Collection[int]] = None,
+    course_set_ids: Collection[int] = (),
+) -> int:
+    """ Recomputes the hashes of the DAG nodes of a university, bottom-up, storing
+        those which changed. If `node_ids` is given, only the hashes of these nodes,
+        of the nodes of `course_set_ids`, and of their ancestors are recomputed.
+        Returns the number of changed nodes. """
+    selected = dagnode.c.university_id == university_id
+    if node_ids is not None:
+        written = union(
+            select(
+                func.unnest(literal(list(node_ids), ARRAY(Integer))).label("node_id")
+            ),
+            select(coursesetnode.c.node_id).where(
+                (coursesetnode.c.university_id == university_id)
+                & coursesetnode.c.course_set_id.in_(list(course_set_ids))
+            ),
+        ).cte("written")
+        written_ids = select(written.c.node_id)
+        selected &= dagnode.c.node_id.in_(
+            union(
+                written_ids,
+                select(dag_closure.c.ancestor_id).where(
+                    dag_closure.c.descendant_id.in_(written_ids)
+                ),
+            )
+        )
+    nodes = conn.execute(
+        select(
+            dagnode.c.node_id,
+            dagnode.c.node_type,
+            coursesetnode.c.course_set_id,
+            dagnode.c.content_hash,
+            dagnode.c.merkle_hash,
+        )
+        .select_from(
+            dagnode.outerjoin(
+                coursesetnode, coursesetnode.c.node_id == dagnode.c.node_id
+            )
+        )
+        .where(selected)
+        # children are ordered after their parents
+        .order_by(dagnode.c.topo_order.desc())
+    ).all()
+    if not nodes:
+        return 0
+    # the stored hashes of the children which aren't recomputed are up to date
+    child_node = dagnode.alias("child")
+    children: Dict[int, List[int]] = defaultdict(list)
+    stored_hashes: Dict[int, bytes] = {}
+    for from_id, to_id, child_hash in conn.execute(
+        select(dag_edge.c.from_node_id, dag_edge.c.to_node_id, child_node.c.merkle_hash)
+        .join(dagnode, dagnode.c.node_id == dag_edge.c.from_node_id)
+        .join(child_node, child_node.c.node_id == dag_edge.c.to_node_id)
+        .where(selected)
+    ):
+        children[from_id].append(to_id)
+        stored_hashes[to_id] = child_hash
+    node_sets = literal(
+        [node.course_set_id for node in nodes if node.course_set_id is not None],
+        ARRAY(Integer),
+    )
+    bounds = {
+        row.id: SetBounds(
+            row.min_subset_size, row.max_subset_size, row.min_credits, row.max_credits
+        )
+        for row in conn.execute(
+            select(
+                courseset.c.id,
+                courseset.c.min_subset_size,
+                courseset.c.max_subset_size,
+                courseset.c.min_credits,
+                courseset.c.max_credits,
+            ).where(
+                (courseset.c.university_id == university_id)
+                & (courseset.c.id == any_(node_sets))
+            )
+        )
+    }
+    course_ids: Dict[int, List[str]] = defaultdict(list)
+    for set_id, course_id in conn.execute(
+        select(membership.c.set_id, membership.c.course_id).where(
+            (membership.c.university_id == university_id)
+            & (membership.c.set_id == any_(node_sets))
+        )
+    ):
+        course_ids[set_id].append(course_id)
+
+    merkle_hashes = dict(stored_hashes)
+    changed = []
+    for node in nodes:
+        content = content_hash(
+            node.node_type,
+            bounds.get(node.course_set_id) if node.course_set_id is not None else None,
+            course_ids.get(node.course_set_id, ()),
+        )
+        merkle = merkle_hashes[node.node_id] = merkle_hash(
+            content, (merkle_hashes[child] for child in children[node.node_id])
+        )
+        if content != node.content_hash or merkle != node.merkle_hash:
+            changed.append({"node": node.node_id, "content": content, "merkle": merkle})
+    if changed:
+        conn.execute(
+            dagnode.update()
+            .where(dagnode.c.node_id == bindparam("node"))
+            .values(content_hash=bindparam("content"), merkle_hash=bindparam("merkle")),
+            changed,
+        )
+    return len(changed)
+
+
+_MODELS = (models.DAGNode, models.CourseSet, models.CourseSetMembership)
+
+
+def update_written_hashes(session: Session, university_ids: Iterable[int]) -> None:
+    """ Recomputes the hashes which depend on what the current transaction wrote
+        to the DAGs and course sets of the given universities, as of its last
+        flush """
+    conn = session.connection()
+    writes = dag_writes(session)
+    # the hashes of a node only depend on its descendants
+    node_ids = writes.nodes | {from_id for from_id, _ in writes.edges}
+    rebuilt = touched_by_core(session, *_MODELS)
+    for university_id in sorted(university_ids):
+        if university_id in rebuilt:
+            update_hashes(conn, university_id)
+        else:
+            course_set_ids = writes.course_sets.get(university_id, set())
+            update_hashes(conn, university_id, node_ids, course_set_ids)
+
+
+@on_university_write(*_MODELS)
+def _update_university_hashes(session: Session, university_ids: Set[int]) -> None:
+    update_written_hashes(session, university_ids)
+
+
+_node_columns = (
+    dagnode.c.node_id,
+    dagnode.c.node_type,
+    coursesetnode.c.course_set_id,
+    dagnode.c.content_hash,
+    dagnode.c.merkle_hash,
+)
+
+
+def _children(db: Session, node_ids: Iterable[int]) -> Dict[int, List[Row]]:
+    """ Loads the children of many nodes, with their hashes, in a single query """
+    children: Dict[int, List[Row]] = defaultdict(list)
+    rows = db.execute(
+        select(dag_edge.c.from_node_id, *_node_columns)
+        .select_from(
+            dag_edge.join(
+                dagnode, dagnode.c.node_id == dag_edge.c.to_node_id
+            ).outerjoin(coursesetnode, coursesetnode.c.node_id == dagnode.c.node_id)
+        )
+        .where(dag_edge.c.from_node_id.in_(list(node_ids)))
+        .order_by(dagnode.c.node_id)
+    )
+    for row in rows:
+        children[row.from_node_id].append(row)
+    return children
+
+
+def _change(
+    change: str,
+    node: Optional[Row],
+    other: Optional[Row],
+    parent: Optional[Row] = None,
+    other_parent: Optional[Row] = None,
+) -> Dict[str, Any]:
+    return {
+        "change": change,
+        "node_type": (node or other).node_type,  # type: ignore
+        "node_id": node.node_id if node else None,
+        "other_node_id": other.node_id if other else None,
+        "course_set_id": node.course_set_id if node else None,
+        "other_course_set_id": other.course_set_id if other else None,
+        "parent_id": parent.node_id if parent else None,
+        "other_parent_id": other_parent.node_id if other_parent else None,
+    }
+
+
+def _pair_children(
+    children: List[Row], other_children: List[Row]
+) -> Tuple[List[Tuple[Row, Row]], List[Row], List[Row]]:
+    """ Pairs the children of two corresponding nodes whose subgraphs differ. Children
+        with equal subgraphs are skipped, then children are paired by equal content,
+        and then by type. Returns the pairs, and the unpaired children of each node. """
+    by_merkle: Dict[bytes, List[Row]] = defaultdict(list)
+    for other in other_children:
+        by_merkle[other.merkle_hash].append(other)
+    unmatched = []
+    for child in children:
+        if by_merkle.get(child.merkle_hash):
+            by_merkle[child.merkle_hash].pop()
+        else:
+            unmatched.append(child)
+    other_unmatched = [other for others in by_merkle.values() for other in others]
+
+    pairs = []
+    for key in ("content_hash", "node_type"):
+        by_key: Dict[Any, List[Row]] = defaultdict(list)
+        for other in other_unmatched:
+            by_key[getattr(other, key)].append(other)
+        remaining = []
+        for child in unmatched:
+            candidates = by_key.get(getattr(child, key))
+            if candidates:
+                pairs.append((child, candidates.pop(0)))
+            else:
+                remaining.append(child)
+        unmatched = remaining
+        other_unmatched = [other for others in by_key.values() for other in others]
+    return pairs, unmatched, other_unmatched
+
+
+def diff_track(
+    db: Session, university_id: int, other_university_id: int, track_id: str
+) -> Optional[List[Dict[str, Any]]]:
+    """ Compares the DAG of a track in two universities (e.g, snapshots of the same
+        university in different years), returning the changes needed to turn the
+        first into the second, or None if the track is missing from either.
+
+        Nodes are compared level by level with one query per level, only descending
+        into pairs of nodes whose subgraphs differ. Added and removed subgraphs are
+        reported by their topmost node, along with the pair of nodes they were added
+        to or removed from.
+    """
+    roots = {
+        row.university_id: row
+        for row in db.execute(
+            select(dagnode.c.university_id, *_node_columns)
+            .select_from(
+                dagrootnode.join(
+                    dagnode, dagnode.c.node_id == dagrootnode.c.node_id
+                ).outerjoin(coursesetnode, coursesetnode.c.node_id == dagnode.c.node_id)
+            )
+            .where(
+                dagrootnode.c.university_id.in_([university_id, other_university_id])
+                & (dagrootnode.c.track_id == track_id)
+            )
+        )
+    }
+    if university_id not in roots or other_university_id not in roots:
+        return None
+
+    changes: List[Dict[str, Any]] = []
+    visited: Set[Tuple[int, int]] = set()
+    level = [(roots[university_id], roots[other_university_id])]
+    while level:
+        level = [
+            (node, other)
+            for node, other in level
+            if node.merkle_hash != other.merkle_hash
+            and (node.node_id, other.node_id) not in visited
+        ]
+        if not level:
+            break
+        children = _children(db, [n.node_id for pair in level for n in pair])
+        next_level = []
+        for node, other in level:
+            visited.add((node.node_id, other.node_id))
+            if node.content_hash != other.content_hash:
+                changes.append(_change("changed", node, other))
+            pairs, removed, added = _pair_children(
+                children[node.node_id], children[other.node_id]
+            )
+            changes.extend(
+                _change("removed", child, None, node, other) for child in removed
+            )
+            changes.extend(
+                _change("added", None, child, node, other) for child in added
+            )
+            next_level.extend(pairs)
+        level = next_level
+    return changes
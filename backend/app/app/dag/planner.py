@@ -0,0 +1,323 @@
+""" Planning the cheapest way to complete a track: a set of courses satisfying the
+    track (see `app.dag.audit`) with minimal total credits, or which can be taken in
+    a minimal number of terms.
+
+    The search is a depth-first branch and bound over the decisions a plan makes:
+    which child of every required `ORNode` to satisfy, and which courses to take
+    in every required course set (a knapsack over the set's subset size and credit
+    bounds). Branches are ordered by cost estimates computed by a dynamic program
+    over the DAG, so the first plan found is a greedy one, which is then improved
+    upon until the search completes or its time budget runs out.
+
+    The courses of a course set node can only be taken after those of its parents,
+    so the number of terms of a plan is the length of the longest chain of course
+    set nodes in which new courses are taken.
+"""
+import enum
+import time
+from typing import Iterator, List, NamedTuple, Optional, Tuple
+
+from .audit import TrackRequirements, bits, popcount
+from .compiled import COURSE_SET, OR
+
+
+class Objective(str, enum.Enum):
+    credits = "credits"
+    terms = "terms"
+
+
+class Plan(NamedTuple):
+    course_ids: List[str]
+    credits: int
+    # the courses to take in every term
+    terms: List[List[str]]
+    # whether the search completed, rather than running out of time
+    optimal: bool
+
+
+class _State(NamedTuple):
+    # completed courses, and courses chosen so far
+    mask: int
+    # credits of the chosen courses
+    cost: int
+    # nodes which still need to be satisfied, with the length of the chain of
+    # their parents, as a stack
+    pending: Tuple[Tuple[int, int], ...]
+    # bitset of the nodes required by the plan
+    expanded: int
+    # the longest chain of course set nodes with new courses so far
+    longest: int
+
+
+class PlanSolver:
+    # how many search steps are taken between checks of the deadline
+    CHECK_INTERVAL = 256
+
+    def __init__(
+        self, requirements: TrackRequirements, completed: int, objective: Objective
+    ):
+        self.requirements = requirements
+        self.completed = completed
+        self.objective = objective
+        dag = requirements.dag
+        self.parents = [tuple(dag.parents(i)) for i in range(len(dag))]
+        self.estimates = self._estimates()
+        self.best: Optional[_State] = None
+        self.best_key: Tuple[float, float] = (float("inf"), float("inf"))
+        self.timed_out = False
+        self._deadline = float("inf")
+        self._steps = 0
+
+    def _shortfall(self, node: int, mask: int) -> Tuple[int, int]:
+        """ The number of courses and credits missing in the course set of a node """
+        requirements = self.requirements
+        bounds = requirements.bounds[node]
+        taken = requirements.masks[node] & mask
+        credits = sum(
+            c * popcount(m & taken) for c, m in requirements.credit_masks[node]
+        )
+        if bounds.max_credits is not None:
+            credits = min(credits, bounds.max_credits)
+        return (
+            (bounds.min_subset_size or 0) - popcount(taken),
+            (bounds.min_credits or 0) - credits,
+        )
+
+    def _missing_credits(self, node: int, mask: int) -> int:
+        """ A lower bound on the credits needed to complete the course set of a node """
+        missing_courses, missing_credits = self._shortfall(node, mask)
+        if missing_courses <= 0 and missing_credits <= 0:
+            return 0
+        cheapest = 0
+        for credits, bit in self.requirements.cheapest[node]:
+            if missing_courses <= 0:
+                break
+            if not mask & bit:
+                cheapest += credits
+                missing_courses -= 1
+        return max(missing_credits, cheapest)
+
+    def _estimates(self) -> List[int]:
+        """ The credits needed to satisfy every node, if its descendants shared no
+            courses. Used for ordering the choices of `ORNode`s """
+        requirements = self.requirements
+        node_types = requirements.dag.node_types
+        estimates = [0] * len(requirements.dag)
+        for node in requirements.order:
+            children = [estimates[c] for c in requirements.children[node]]
+            if node_types[node] == OR:
+                estimates[node] = min(children, default=0)
+                continue
+            estimates[node] = sum(children)
+            if node_types[node] == COURSE_SET:
+                estimates[node] += self._missing_credits(node, self.completed)
+        return estimates
+
+    def _expired(self) -> bool:
+        self._steps += 1
+        if self._steps % self.CHECK_INTERVAL == 0 and time.monotonic() > self._deadline:
+            self.timed_out = True
+        return self.timed_out
+
+    def _completions(
+        self,
+        node: int,
+        mask: int,
+        cost: int,
+        missing_courses: int,
+        missing_credits: int,
+    ) -> Iterator[Tuple[int, int]]:
+        """ Yields the minimal sets of courses completing the course set of a node
+            (as a bitset, and their credits), cheapest courses first """
+        bounds = self.requirements.bounds[node]
+        if (
+            bounds.max_credits is not None
+            and (bounds.min_credits or 0) > bounds.max_credits
+        ):
+            return
+        options = [
+            (credits, bit)
+            for credits, bit in self.requirements.cheapest[node]
+            if not mask & bit
+        ]
+        remaining_credits = [0] * (len(options) + 1)
+        for i in range(len(options) - 1, -1, -1):
+            remaining_credits[i] = remaining_credits[i + 1] + options[i][0]
+
+        def extend(
+            start: int, chosen: int, added: int, courses: int, credits: int
+        ) -> Iterator[Tuple[int, int]]:
+            if courses <= 0 and credits <= 0:
+                yield chosen, added
+                return
+            for i in range(start, len(options)):
+                if self._expired():
+                    return
+                course_credits, bit = options[i]
+                if (
+                    len(options) - i < courses
+                    or remaining_credits[i] < credits
+                    or self._cost_bound(cost + added + course_credits)
+                ):
+                    # options are ordered by credits, so later ones can't do better
+                    return
+                yield from extend(
+                    i + 1,
+                    chosen | bit,
+                    added + course_credits,
+                    courses - 1,
+                    credits - course_credits,
+                )
+
+        yield from extend(0, 0, 0, missing_courses, missing_credits)
+
+    def _cost_bound(self, cost: int) -> bool:
+        """ Whether plans costing `cost` or more can't improve on the best plan """
+        return self.objective == Objective.credits and cost >= self.best_key[0]
+
+    def _branches(self, state: _State) -> Iterator[_State]:
+        """ Satisfies the pending nodes of a state up to the next decision, yielding
+            a state for every choice, or the state itself if no decisions are left """
+        requirements = self.requirements
+        node_types = requirements.dag.node_types
+        mask, cost, _, expanded, longest = state
+        pending = list(state.pending)
+        while pending:
+            node, chain = pending.pop()
+            if expanded >> node & 1:
+                continue
+            expanded |= 1 << node
+            children = requirements.children[node]
+            node_type = node_types[node]
+            if node_type == OR:
+                if not children:
+                    # can't be satisfied, as in audits
+                    return
+                if any(expanded >> c & 1 for c in children):
+                    continue
+                rest = tuple(pending)
+                for child in sorted(children, key=self.estimates.__getitem__):
+                    yield _State(
+                        mask, cost, rest + ((child, chain),), expanded, longest
+                    )
+                return
+            if node_type != COURSE_SET:
+                pending.extend((c, chain) for c in reversed(children))
+                continue
+
+            missing_courses, missing_credits = self._shortfall(node, mask)
+            if missing_courses <= 0 and missing_credits <= 0:
+                chain += 1 if requirements.masks[node] & mask & ~self.completed else 0
+                longest = max(longest, chain)
+                pending.extend((c, chain) for c in reversed(children))
+                continue
+            pending_children = tuple((c, chain + 1) for c in reversed(children))
+            rest = tuple(pending)
+            longest = max(longest, chain + 1)
+            for courses, credits in self._completions(
+                node, mask, cost, missing_courses, missing_credits
+            ):
+                yield _State(
+                    mask | courses,
+                    cost + credits,
+                    rest + pending_children,
+                    expanded,
+                    longest,
+                )
+            return
+        yield _State(mask, cost, (), expanded, longest)
+
+    def _bound(self, state: _State) -> Tuple[int, int]:
+        """ A lower bound on the objective of the plans extending a state, computed in
+            constant time as it's evaluated at every step """
+        if self.objective == Objective.terms:
+            return state.longest, 0
+        node, _ = state.pending[-1]
+        missing = 0
+        if self.requirements.dag.node_types[node] == COURSE_SET:
+            missing = self._missing_credits(node, state.mask)
+        return state.cost + missing, 0
+
+    def chains(self, state: _State) -> List[int]:
+        """ The length of the longest chain of course set nodes with new courses
+            ending at every node required by a plan (0 for other nodes) """
+        requirements = self.requirements
+        node_types = requirements.dag.node_types
+        new_courses = state.mask & ~self.completed
+        chains = [0] * len(requirements.dag)
+        for node in reversed(requirements.order):
+            if not state.expanded >> node & 1:
+                continue
+            chain = max(
+                (chains[p] for p in self.parents[node] if state.expanded >> p & 1),
+                default=0,
+            )
+            if (
+                node_types[node] == COURSE_SET
+                and requirements.masks[node] & new_courses
+            ):
+                chain += 1
+            chains[node] = chain
+        return chains
+
+    def _evaluate(self, state: _State) -> None:
+        terms = max(self.chains(state))
+        key = (
+            (state.cost, terms)
+            if self.objective == Objective.credits
+            else (terms, state.cost)
+        )
+        if key < self.best_key:
+            self.best, self.best_key = state, key
+
+    def search(self, time_budget: float) -> None:
+        """ Searches for the best plan for at most `time_budget` seconds """
+        self._deadline = time.monotonic() + time_budget
+        # taking more courses never hurts, so there's no plan if taking all fails
+        every_course = (1 << len(self.requirements.course_ids)) - 1
+        if not self.requirements.audit(every_course)[0].satisfied:
+            return
+        stack = [self._branches(_State(self.completed, 0, ((0, 0),), 0, 0))]
+        while stack and not self._expired():
+            state = next(stack[-1], None)
+            if state is None:
+                stack.pop()
+            elif not state.pending:
+                self._evaluate(state)
+            elif self._bound(state) < self.best_key:
+                stack.append(self._branches(state))
+
+    def plan(self) -> Optional[Plan]:
+        """ The best plan found by the search, if any """
+        if self.best is None:
+            return None
+        requirements = self.requirements
+        new_courses = self.best.mask & ~self.completed
+        chains = self.chains(self.best)
+        course_nodes = requirements.course_nodes()
+        terms: List[List[str]] = [[] for _ in range(max(chains))]
+        for bit in bits(new_courses):
+            # a course follows the prerequisites of every node containing it
+            term = max(chains[node] for node in course_nodes[bit])
+            terms[term - 1].append(requirements.course_ids[bit])
+        return Plan(
+            [requirements.course_ids[bit] for bit in bits(new_courses)],
+            self.best.cost,
+            # the courses of a node may all be taken later, with those of descendants
+            [term for term in terms if term],
+            not self.timed_out,
+        )
+
+
+def plan_track(
+    requirements: TrackRequirements,
+    completed_courses: List[str],
+    objective: Objective = Objective.credits,
+    time_budget: float = 1.0,
+) -> Optional[Plan]:
+    """ Returns the cheapest plan completing a track, given the courses which were
+        already completed, or the best one found within `time_budget` seconds.
+        Returns None if no plan was found (or if there's none). """
+    solver = PlanSolver(requirements, requirements.encode(completed_courses), objective)
+    solver.search(time_budget)
+    return solver.plan()
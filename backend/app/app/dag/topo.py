@@ -0,0 +1,213 @@
+""" Incremental cycle detection for the DAG, by maintaining a topological order of
+    its nodes (stored in `DAGNode.topo_order`) with the dynamic topological sort
+    algorithm of Pearce & Kelly.
+
+    When an edge x -> y is added and x is already ordered before y, nothing needs to
+    be done. Otherwise, only the nodes whose order lies between y and x are visited:
+    the descendants of y ordered before x (if x is among them the edge closes a
+    cycle), and the ancestors of x ordered after y. These two regions are then
+    re-ordered among the positions they already occupy.
+"""
+from typing import Dict, Iterable, List, Mapping, Set, Tuple
+
+from sqlalchemy import bindparam, exists, select
+from sqlalchemy.engine import Connection
+
+from app import models
+from app.db.base_class import table_of
+
+dagnode = table_of(models.DAGNode)
+dag_edge = models.dag_edge_assoc
+dag_closure = models.dag_closure
+
+
+class CycleError(ValueError):
+    """ Raised when adding an edge would create a cycle in the DAG """
+
+    def __init__(self, from_id: int, to_id: int):
+        super().__init__(f"The edge {from_id} -> {to_id} would create a cycle")
+        self.from_id = from_id
+        self.to_id = to_id
+
+
+def _reordered(
+    backward: Iterable[Tuple[int, int]], forward: Iterable[Tuple[int, int]]
+) -> List[Tuple[int, int]]:
+    """ Given the (node, order) pairs of both affected regions, places the whole
+        backward region before the forward region, reusing their positions.
+        Returns the (node, order) pairs which changed. """
+    backward = sorted(backward, key=lambda pair: pair[1])
+    forward = sorted(forward, key=lambda pair: pair[1])
+    slots = sorted(order for _, order in backward + forward)
+    return [
+        (node, slot)
+        for (node, order), slot in zip(backward + forward, slots)
+        if order != slot
+    ]
+
+
+class DynamicTopologicalOrder:
+    """ An in-memory DAG along with a topological order of its nodes, for validating
+        many edges at once (e.g, when importing data) """
+
+    def __init__(self) -> None:
+        self.order: Dict[int, int] = {}
+        self.successors: Dict[int, Set[int]] = {}
+        self.predecessors: Dict[int, Set[int]] = {}
+        # nodes whose order changed since this was created
+        self.changed: Set[int] = set()
+
+    @classmethod
+    def from_graph(
+        cls, order: Mapping[int, int], edges: Iterable[Tuple[int, int]]
+    ) -> "DynamicTopologicalOrder":
+        """ Creates the structure from a valid topological order and the edges """
+        topo = cls()
+        for node, node_order in order.items():
+            topo.add_node(node, node_order)
+        for from_id, to_id in edges:
+            topo.successors[from_id].add(to_id)
+            topo.predecessors[to_id].add(from_id)
+        return topo
+
+    def add_node(self, node: int, order: int) -> None:
+        self.order[node] = order
+        self.successors[node] = set()
+        self.predecessors[node] = set()
+
+    def remove_node(self, node: int) -> None:
+        for successor in self.successors.pop(node):
+            self.predecessors[successor].discard(node)
+        for predecessor in self.predecessors.pop(node):
+            self.successors[predecessor].discard(node)
+        del self.order[node]
+        self.changed.discard(node)
+
+    def remove_edge(self, from_id: int, to_id: int) -> None:
+        # removing an edge never invalidates a topological order
+        self.successors[from_id].discard(to_id)
+        self.predecessors[to_id].discard(from_id)
+
+    def add_edge(self, from_id: int, to_id: int) -> None:
+        """ Adds an edge, re-ordering nodes as needed. Raises `CycleError` (leaving
+            the graph unchanged) if the edge would close a cycle. """
+        if from_id == to_id:
+            raise CycleError(from_id, to_id)
+        order = self.order
+        lower, upper = order[to_id], order[from_id]
+        if lower > upper:
+            self.successors[from_id].add(to_id)
+            self.predecessors[to_id].add(from_id)
+            return
+
+        forward = {to_id}
+        stack = [to_id]
+        while stack:
+            for node in self.successors[stack.pop()]:
+                if node == from_id:
+                    raise CycleError(from_id, to_id)
+                if node not in forward and order[node] < upper:
+                    forward.add(node)
+                    stack.append(node)
+
+        backward = {from_id}
+        stack = [from_id]
+        while stack:
+            for node in self.predecessors[stack.pop()]:
+                if node not in backward and order[node] > lower:
+                    backward.add(node)
+                    stack.append(node)
+
+        for node, node_order in _reordered(
+            ((n, order[n]) for n in backward), ((n, order[n]) for n in forward)
+        ):
+            order[node] = node_order
+            self.changed.add(node)
+        self.successors[from_id].add(to_id)
+        self.predecessors[to_id].add(from_id)
+
+
+def load_order(conn: Connection, university_id: int) -> DynamicTopologicalOrder:
+    """ Loads the stored topological order and edges of a university's DAG """
+    order = dict(
+        conn.execute(
+            select(dagnode.c.node_id, dagnode.c.topo_order).where(
+                dagnode.c.university_id == university_id
+            )
+        ).all()
+    )
+    edges = conn.execute(
+        select(dag_edge.c.from_node_id, dag_edge.c.to_node_id)
+        .join(dagnode, dagnode.c.node_id == dag_edge.c.from_node_id)
+        .where(dagnode.c.university_id == university_id)
+    ).all()
+    return DynamicTopologicalOrder.from_graph(order, edges)
+
+
+def store_order(conn: Connection, topo: DynamicTopologicalOrder) -> None:
+    """ Persists the order of the nodes whose order changed """
+    changed = [{"node": node, "order": topo.order[node]} for node in topo.changed]
+    _update_orders(conn, changed)
+    topo.changed.clear()
+
+
+def _update_orders(conn: Connection, changed: List[Dict[str, int]]) -> None:
+    if changed:
+        conn.execute(
+            dagnode.update()
+            .where(dagnode.c.node_id == bindparam("node"))
+            .values(topo_order=bindparam("order")),
+            changed,
+        )
+
+
+def reorder_for_edge(conn: Connection, from_id: int, to_id: int) -> None:
+    """ Validates an edge which is being added to the database, and updates the
+        stored order accordingly. Raises `CycleError` if it would close a cycle.
+
+        The affected regions are found with the DAG's closure table, which must not
+        include the edge yet: as every node on a path is ordered before its end,
+        the nodes reachable from `to_id` through nodes ordered before `from_id` are
+        exactly its descendants ordered before `from_id`.
+    """
+    if from_id == to_id:
+        raise CycleError(from_id, to_id)
+    order = dict(
+        conn.execute(
+            select(dagnode.c.node_id, dagnode.c.topo_order).where(
+                dagnode.c.node_id.in_([from_id, to_id])
+            )
+        ).all()
+    )
+    lower, upper = order[to_id], order[from_id]
+    if lower > upper:
+        return
+
+    closes_cycle = conn.execute(
+        select(
+            exists().where(
+                (dag_closure.c.ancestor_id == to_id)
+                & (dag_closure.c.descendant_id == from_id)
+            )
+        )
+    ).scalar()
+    if closes_cycle:
+        raise CycleError(from_id, to_id)
+
+    forward = conn.execute(
+        select(dag_closure.c.descendant_id, dagnode.c.topo_order)
+        .join(dagnode, dagnode.c.node_id == dag_closure.c.descendant_id)
+        .where((dag_closure.c.ancestor_id == to_id) & (dagnode.c.topo_order < upper))
+    ).all()
+    backward = conn.execute(
+        select(dag_closure.c.ancestor_id, dagnode.c.topo_order)
+        .join(dagnode, dagnode.c.node_id == dag_closure.c.ancestor_id)
+        .where(
+            (dag_closure.c.descendant_id == from_id) & (dagnode.c.topo_order > lower)
+        )
+    ).all()
+    changed = _reordered(
+        [(from_id, upper)] + [tuple(row) for row in backward],  # type: ignore
+        [(to_id, lower)] + [tuple(row) for row in forward],  # type: ignore
+    )
+    _update_orders(conn, [{"node": node, "order": order} for node, order in changed])
@@ -3,7 +3,7 @@
 from app.db.base_class import Base  # noqa
 from app.models.item import Item  # noqa
 from app.models.user import User  # noqa
-from app.models.university import University  # noqa
+from app.models.university import University, catalog_version  # noqa
 from app.models.faculty import Faculty  # noqa
 from app.models.department import Department  # noqa
 from app.models.track import Track, DegreeType  # noqa
@@ -11,4 +11,4 @@ from app.models.term import Term  # noqa
 from app.models.course import Course  # noqa
 from app.models.track_department import track_department  # noqa
 from app.models.course_set import CourseSet, CourseSetMembership  # noqa
-from app.models.course_dag import DAGNode, DAGRootNode, ORNode, CourseSetNode  # noqa
\ No newline at end of file
+from app.models.course_dag import DAGNode, DAGRootNode, ORNode, CourseSetNode, dag_closure, course_requirement_index  # noqa
\ No newline at end of file
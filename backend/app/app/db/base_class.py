@@ -1,6 +1,8 @@
 from typing import Any
-from typing import Mapping
-from sqlalchemy.orm import as_declarative, declared_attr, Mapped
+from typing import Mapping, Type, cast
+from sqlalchemy import Column, Computed, Index, Table
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import as_declarative, declared_attr, deferred, Mapped
 
 
 @as_declarative()
@@ -14,5 +16,36 @@ class Base:
         return cls.__name__.lower()
 
 
+def table_of(model: Type[Any]) -> Table:
+    """ The table of a mapped class, typed for Core queries """
+    return cast(Table, model.__table__)
+
+
 ExtraData = Mapped[Mapping[str, Any]]
 Translations = Mapped[Mapping[str, str]]
+
+
+# Words of all translations of an entity's name and of its id, along with the
+# stems of its English name, for searching by name, see app.search
+NAME_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name_translations->>'en', '')), 'A')"
+    " || setweight(jsonb_to_tsvector("
+    "'simple', name_translations::jsonb, '[\"string\"]'), 'A')"
+    " || setweight(to_tsvector('simple', id), 'B')"
+)
+
+
+def name_search_column() -> Any:
+    # deferred, as it's only used in queries
+    return deferred(Column(TSVECTOR, Computed(NAME_SEARCH_VECTOR, persisted=True)))
+
+
+def name_search_index(table_name: str) -> Index:
+    # catalogs are rarely written to, so rows are indexed as they're written rather
+    # than through the pending list, which searches would need to scan
+    return Index(
+        f"ix_{table_name}_name_search",
+        "name_search",
+        postgresql_using="gin",
+        postgresql_with={"fastupdate": "off"},
+    )
@@ -0,0 +1,134 @@
+""" Session hooks which track the universities whose rows were written to within a
+    transaction, and notify registered listeners just before that transaction commits
+    (to update derived tables within it), or once it has committed.
+"""
+from itertools import chain
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type, cast
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models import University
+
+UniversityListener = Callable[[Set[int]], None]
+UniversityWriteListener = Callable[[Session, Set[int]], None]
+
+_listeners: List[Tuple[Tuple[Type[Any], ...], UniversityListener]] = []
+_write_listeners: List[Tuple[Tuple[Type[Any], ...], UniversityWriteListener]] = []
+
+_TOUCHED_KEY = "touched_universities"
+_CORE_TOUCHED_KEY = "core_touched_universities"
+
+
+def on_university_change(
+    *models: Type[Any],
+) -> Callable[[UniversityListener], UniversityListener]:
+    """ Registers a function to be called after every commit which wrote instances of
+        one of the given models (or their subclasses), with the ids of the
+        universities those instances belong to.
+    """
+
+    def decorator(fn: UniversityListener) -> UniversityListener:
+        _listeners.append((models, fn))
+        return fn
+
+    return decorator
+
+
+def on_university_write(
+    *models: Type[Any],
+) -> Callable[[UniversityWriteListener], UniversityWriteListener]:
+    """ Registers a function to be called before every commit which wrote instances
+        of one of the given models (or their subclasses), with the session (already
+        flushed) and the ids of the universities those instances belong to.
+    """
+
+    def decorator(fn: UniversityWriteListener) -> UniversityWriteListener:
+        _write_listeners.append((models, fn))
+        return fn
+
+    return decorator
+
+
+def session_info(session: Session) -> Dict[str, Any]:
+    """ The `info` dictionary of a session, which the stubs type as a method """
+    return cast(Dict[str, Any], session.info)
+
+
+def touch_university(session: Session, model: Type[Any], university_id: int) -> None:
+    """ Records a write to rows of a model which didn't go through the ORM, e.g a Core
+        INSERT, so that listeners are notified as if instances were written """
+    for key in (_TOUCHED_KEY, _CORE_TOUCHED_KEY):
+        touched: Dict[Type[Any], Set[int]] = session_info(session).setdefault(key, {})
+        touched.setdefault(model, set()).add(university_id)
+
+
+def touched_by_core(session: Session, *models: Type[Any]) -> Set[int]:
+    """ The universities whose rows of the given models were written within the
+        current transaction without going through the ORM, so that listeners which
+        only update what ORM instances changed must update everything for them """
+    return _touched_by(session_info(session).get(_CORE_TOUCHED_KEY, {}), models)
+
+
+def _touched_by(
+    touched: Dict[Type[Any], Set[int]], models: Tuple[Type[Any], ...]
+) -> Set[int]:
+    university_ids: Set[int] = set()
+    for model, uids in touched.items():
+        if issubclass(model, models):
+            university_ids |= uids
+    return university_ids
+
+
+def university_id_of(obj: Any) -> Optional[int]:
+    """ Returns the id of the university an ORM instance belongs to, without emitting
+        any SQL. """
+    state = inspect(obj)
+    key = "id" if isinstance(obj, University) else "university_id"
+    uid = state.dict.get(key)
+    if uid is None:
+        committed = state.committed_state.get(key)
+        if isinstance(committed, int):
+            uid = committed
+    return uid
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_touched_universities(session: Session, flush_context: Any) -> None:
+    touched: Dict[Type[Any], Set[int]] = session_info(session).setdefault(
+        _TOUCHED_KEY, {}
+    )
+    for obj in chain(session.new, session.dirty, session.deleted):
+        uid = university_id_of(obj)
+        if uid is not None:
+            touched.setdefault(type(obj), set()).add(uid)
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_write_listeners(session: Session) -> None:
+    session.flush()
+    touched: Dict[Type[Any], Set[int]] = session_info(session).get(_TOUCHED_KEY, {})
+    if not touched:
+        return
+    for models, fn in _write_listeners:
+        university_ids = _touched_by(touched, models)
+        if university_ids:
+            fn(session, university_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_listeners(session: Session) -> None:
+    session_info(session).pop(_CORE_TOUCHED_KEY, None)
+    touched: Dict[Type[Any], Set[int]] = session_info(session).pop(_TOUCHED_KEY, {})
+    if not touched:
+        return
+    for models, fn in _listeners:
+        university_ids = _touched_by(touched, models)
+        if university_ids:
+            fn(university_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_touched(session: Session) -> None:
+    session_info(session).pop(_TOUCHED_KEY, None)
+    session_info(session).pop(_CORE_TOUCHED_KEY, None)
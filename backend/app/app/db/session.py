@@ -8,3 +8,8 @@ engine = create_engine(
     settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True, future=True, echo=settings.ECHO_SQL
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# registers the session hooks which keep derived DAG data (caches, closure) and data
+# versions up to date
+import app.dag  # noqa: F401,E402 isort:skip
+import app.db.versions  # noqa: F401,E402 isort:skip
@@ -0,0 +1,80 @@
+""" Data versions, which identify the state of a university's rows.
+
+    Every transaction writing to a university's rows increments its `data_version`
+    before committing, so responses built from a university's data can be cached
+    by its version. Since the update locks the university's row, transactions
+    writing to the same university commit their versions in order. The list of
+    universities, which all writes may change, is versioned by the
+    `catalog_version` sequence, which such transactions advance.
+
+    Versions aren't cached across transactions, but read by every request. Values in
+    per-process caches are stored with the version they were built from, and only
+    returned for that version, so writes made by other processes, which don't
+    invalidate these caches, are seen by the next request. A version is read before
+    the data a value is built from, so the data is at least as recent as the version.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+from sqlalchemy import event, literal_column, select, table
+from sqlalchemy.orm import Session
+
+from app.db.base_class import Base, table_of
+from app.db.events import on_university_write, session_info
+from app.models import University, catalog_version
+
+university = table_of(University)
+
+# the sequence's last value only counts once it's been advanced
+_catalog_version = select(
+    literal_column("CASE WHEN is_called THEN last_value ELSE 0 END")
+).select_from(table(catalog_version.name))
+
+
+def load_data_versions(
+    db: Session, university_ids: Sequence[Optional[int]]
+) -> List[Optional[int]]:
+    """ Reads the data versions of universities, with None for those which don't
+        exist, or the catalog version for None ids, with a single primary key lookup
+        per university """
+    versions = [
+        _catalog_version
+        if university_id is None
+        else select(university.c.data_version).where(university.c.id == university_id)
+        for university_id in university_ids
+    ]
+    return list(db.execute(select(*(v.scalar_subquery() for v in versions))).one())
+
+
+_VERSIONS_KEY = "data_versions"
+
+
+def get_data_version(db: Session, university_id: int) -> Optional[int]:
+    """ The data version of a university, read once per transaction, so that the
+        caches used by a request agree on it. Must be read before the data a cached
+        value is built from. """
+    versions: Dict[int, Optional[int]] = session_info(db).setdefault(_VERSIONS_KEY, {})
+    if university_id not in versions:
+        (versions[university_id],) = load_data_versions(db, [university_id])
+    return versions[university_id]
+
+
+def use_data_versions(db: Session, versions: Dict[int, Optional[int]]) -> None:
+    """ Makes the next transaction of a session use data versions which were read
+        before it began, e.g, those a cached response is keyed by, so that the values
+        cached while building the response are built from the same versions """
+    session_info(db).setdefault(_VERSIONS_KEY, {}).update(versions)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_data_versions(session: Session, transaction: Any) -> None:
+    session_info(session).pop(_VERSIONS_KEY, None)
+
+
+@on_university_write(Base)
+def _increment_data_versions(db: Session, university_ids: Set[int]) -> None:
+    db.execute(select(catalog_version.next_value()))
+    db.execute(
+        university.update()
+        .where(university.c.id.in_(university_ids))
+        .values(data_version=university.c.data_version + 1)
+    )
@@ -0,0 +1,502 @@
+""" Imports the complete catalog of a university from files, e.g one exported by a
+    university's own systems, into a new university.
+
+    A catalog is a directory with a file per kind of entity, named after it (see
+    `ENTITIES`), either in JSON Lines or in CSV, whose JSON columns (translations and
+    extra data) hold JSON text. Missing files have no rows. Files are streamed and
+    validated in batches, and every batch is loaded with a single `COPY` into a
+    temporary staging table of its entity. Once all files are loaded, staging tables
+    are merged into the university's tables with an INSERT ... SELECT per table,
+    within a single transaction.
+
+    Course sets and DAG nodes have no natural ids, so the catalog refers to them by
+    keys which are unique within it, and they're assigned new ids when merged,
+    through temporary tables mapping every key to its id. Derived data (DAG closure,
+    topological order, course index and merkle hashes) is then computed for the
+    whole university at once, rather than row by row by the session hooks.
+"""
+import argparse
+import csv
+import io
+import json
+import logging
+import time
+from enum import Enum
+from pathlib import Path
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import (
+    JSON,
+    Column,
+    Integer,
+    MetaData,
+    Table,
+    Text,
+    cast,
+    exists,
+    func,
+    literal,
+    select,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement, Select
+
+from app import models, schemas
+from app.dag import rebuild_closure, rebuild_course_index, update_hashes
+from app.db.base_class import table_of
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# rows validated and copied at once
+BATCH_SIZE = 5000
+# validation errors reported by a failed import
+MAX_ERRORS = 10
+
+JSON_FIELDS = ("name_translations", "extra_data")
+
+term = table_of(models.Term)
+courseset = table_of(models.CourseSet)
+dagnode = table_of(models.DAGNode)
+dag_closure = models.dag_closure
+
+
+class Entity(NamedTuple):
+    name: str
+    schema: Type[BaseModel]
+
+
+# Files of a catalog, in the order they're merged so that rows are merged after the
+# rows they reference
+ENTITIES = [
+    Entity("terms", schemas.TermRow),
+    Entity("faculties", schemas.FacultyRow),
+    Entity("departments", schemas.DepartmentRow),
+    Entity("tracks", schemas.TrackRow),
+    Entity("track_departments", schemas.TrackDepartmentRow),
+    Entity("courses", schemas.CourseRow),
+    Entity("course_sets", schemas.CourseSetRow),
+    Entity("course_set_memberships", schemas.CourseSetMembershipRow),
+    Entity("dag_nodes", schemas.DAGNodeRow),
+    Entity("dag_edges", schemas.DAGEdgeRow),
+]
+
+
+class CatalogImportError(ValueError):
+    """ Raised when a catalog is invalid, e.g has rows which fail validation, refer
+        to missing entities or form a cycle """
+
+
+class ImportReport(NamedTuple):
+    university_id: int
+    # number of rows of every file
+    rows: Dict[str, int]
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return sum(self.rows.values()) / self.seconds if self.seconds else 0.0
+
+
+_staging_metadata = MetaData()
+
+
+def _staging_table(entity: Entity) -> Table:
+    """ A table with a column per field of the entity's rows, along with the line of
+        every row within its file """
+    columns = [Column("line", Integer, nullable=False)]
+    for field in entity.schema.__fields__.values():
+        if field.name in JSON_FIELDS:
+            type_: Any = JSON
+        elif issubclass(field.type_, int):
+            type_ = Integer
+        else:
+            type_ = Text
+        columns.append(Column(field.name, type_))
+    return Table(
+        f"import_{entity.name}", _staging_metadata, *columns, prefixes=["TEMPORARY"]
+    )
+
+
+STAGING = {entity.name: _staging_table(entity) for entity in ENTITIES}
+
+
+def _key_map(name: str) -> Table:
+    return Table(
+        name,
+        _staging_metadata,
+        Column("key", Text, primary_key=True),
+        Column("id", Integer, nullable=False),
+        prefixes=["TEMPORARY"],
+    )
+
+
+# The id of every course set and DAG node of the catalog, by its key
+set_map = _key_map("import_set_map")
+node_map = _key_map("import_node_map")
+
+
+def _catalog_file(directory: Path, entity: Entity) -> Optional[Path]:
+    for suffix in (".jsonl", ".csv"):
+        path = directory / f"{entity.name}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def _read_rows(path: Path) -> Iterator[Tuple[int, Any]]:
+    """ Yields the line and fields of every row of a catalog file """
+
+    def parse(line: int, text: str) -> Any:
+        try:
+            return json.loads(text)
+        except ValueError as e:
+            raise CatalogImportError(f"{path.name}, line {line}: {e}") from e
+
+    with path.open(newline="", encoding="utf-8") as f:
+        if path.suffix == ".jsonl":
+            for line, text in enumerate(f, 1):
+                if text.strip():
+                    yield line, parse(line, text)
+            return
+        reader = csv.DictReader(f)
+        for fields in reader:
+            # empty columns are missing, rather than empty strings
+            row = {name: value for name, value in fields.items() if value != ""}
+            for name in JSON_FIELDS:
+                if name in row:
+                    row[name] = parse(reader.line_num, row[name])
+            yield reader.line_num, row
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+
+def _copy(conn: Connection, table: Table, rows: Sequence[Dict[str, Any]]) -> None:
+    # COPY reads empty fields, which both None and empty strings are written as, as
+    # NULL, just like empty columns of catalog files
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    names = [column.name for column in table.c]
+    for row in rows:
+        writer.writerow([_csv_value(row[name]) for name in names])
+    buffer.seek(0)
+    cursor = conn.connection.cursor()
+    cursor.copy_expert(
+        f"COPY {table.name} ({', '.join(names)}) FROM STDIN WITH CSV", buffer
+    )
+
+
+def _load(conn: Connection, entity: Entity, path: Path) -> int:
+    """ Validates the rows of a catalog file and copies them into the entity's
+        staging table, a batch at a time, returning their number """
+    table = STAGING[entity.name]
+    rows = 0
+    batch: List[Tuple[int, Any]] = []
+
+    def flush() -> None:
+        valid, errors = [], []
+        for line, fields in batch:
+            try:
+                valid.append({"line": line, **entity.schema.parse_obj(fields).dict()})
+            except ValidationError as e:
+                errors.append(f"{path.name}, line {line}: {e}")
+        if errors:
+            raise CatalogImportError("\n".join(errors[:MAX_ERRORS]))
+        _copy(conn, table, valid)
+        batch.clear()
+
+    for row in _read_rows(path):
+        batch.append(row)
+        rows += 1
+        if len(batch) == BATCH_SIZE:
+            flush()
+    if batch:
+        flush()
+    return rows
+
+
+def _extra_data(column: ColumnElement) -> ColumnElement:
+    return func.coalesce(column, cast({}, JSON)).label("extra_data")
+
+
+def _values(
+    source: Table, table: Table, university_id: int, exclude: Sequence[str] = ()
+) -> List[ColumnElement]:
+    """ The columns of `table` selected from the staging table `source` """
+    values: List[ColumnElement] = [
+        literal(university_id, Integer).label("university_id")
+    ]
+    for column in source.c:
+        if column.name == "line" or column.name in exclude:
+            continue
+        target = table.c[column.name]
+        if column.name == "extra_data":
+            values.append(_extra_data(column))
+        elif not isinstance(target.type, type(column.type)):
+            values.append(cast(column, target.type).label(column.name))
+        else:
+            values.append(column)
+    return values
+
+
+def _insert(conn: Connection, table: Table, query: Select) -> int:
+    names = [column.name for column in query.subquery().c]
+    return conn.execute(table.insert().from_select(names, query)).rowcount
+
+
+def _check_keys(conn: Connection, entity: str, column: str, key_map: Table) -> None:
+    """ Raises if rows of an entity refer to a key which isn't in `key_map` """
+    source = STAGING[entity]
+    missing = conn.execute(
+        select(source.c.line, source.c[column])
+        .where(source.c[column].isnot(None))
+        .where(~exists().where(key_map.c.key == source.c[column]))
+        .order_by(source.c.line)
+        .limit(MAX_ERRORS)
+    ).all()
+    if missing:
+        raise CatalogImportError(
+            "\n".join(
+                f"{entity}, line {line}: unknown {column} {key!r}"
+                for line, key in missing
+            )
+        )
+
+
+def _map_keys(conn: Connection, entity: str, key_map: Table, id_table: Table) -> None:
+    """ Assigns a new id from the sequence of `id_table` to every key of an entity """
+    source = STAGING[entity]
+    id_column = next(column for column in id_table.primary_key if column.autoincrement)
+    sequence = func.pg_get_serial_sequence(id_table.name, id_column.name)
+    conn.execute(
+        key_map.insert().from_select(
+            ["key", "id"],
+            select(source.c.key, func.nextval(sequence)).order_by(source.c.line),
+        )
+    )
+    conn.exec_driver_sql(f"ANALYZE {key_map.name}")
+
+
+def _merge(conn: Connection, university_id: int) -> None:
+    uid = literal(university_id, Integer).label("university_id")
+    terms = STAGING["terms"]
+    conn.execute(
+        insert(term)
+        .from_select(
+            ["id", "name_translations"], select(terms.c.id, terms.c.name_translations)
+        )
+        .on_conflict_do_nothing()
+    )
+    for entity, table in [
+        ("faculties", table_of(models.Faculty)),
+        ("departments", table_of(models.Department)),
+        ("tracks", table_of(models.Track)),
+        ("track_departments", models.track_department),
+        ("courses", table_of(models.Course)),
+    ]:
+        source = STAGING[entity]
+        _insert(conn, table, select(*_values(source, table, university_id)))
+
+    sets = STAGING["course_sets"]
+    _map_keys(conn, "course_sets", set_map, courseset)
+    _insert(
+        conn,
+        courseset,
+        select(set_map.c.id, *_values(sets, courseset, university_id, ["key"]))
+        .select_from(sets)
+        .join(set_map, set_map.c.key == sets.c.key),
+    )
+    members = STAGING["course_set_memberships"]
+    _check_keys(conn, "course_set_memberships", "set_key", set_map)
+    _insert(
+        conn,
+        table_of(models.CourseSetMembership),
+        select(
+            uid,
+            set_map.c.id.label("set_id"),
+            members.c.course_id,
+            _extra_data(members.c.extra_data),
+        )
+        .select_from(members)
+        .join(set_map, set_map.c.key == members.c.set_key),
+    )
+
+    nodes = STAGING["dag_nodes"]
+    _check_keys(conn, "dag_nodes", "course_set_key", set_map)
+    _map_keys(conn, "dag_nodes", node_map, dagnode)
+    nodes_with_ids = nodes.join(node_map, node_map.c.key == nodes.c.key)
+    # topological order is assigned once the DAG is complete, see `_reorder`
+    _insert(
+        conn,
+        dagnode,
+        select(
+            node_map.c.id.label("node_id"),
+            uid,
+            nodes.c.node_type,
+            _extra_data(nodes.c.extra_data),
+        )
+        .select_from(nodes_with_ids)
+        .order_by(nodes.c.line),
+    )
+    _insert(
+        conn,
+        table_of(models.DAGRootNode),
+        select(node_map.c.id.label("node_id"), uid, nodes.c.track_id)
+        .select_from(nodes_with_ids)
+        .where(nodes.c.node_type == "DAGRootNode"),
+    )
+    _insert(
+        conn,
+        table_of(models.CourseSetNode),
+        select(node_map.c.id.label("node_id"), uid, set_map.c.id.label("course_set_id"))
+        .select_from(
+            nodes_with_ids.join(set_map, set_map.c.key == nodes.c.course_set_key)
+        )
+        .where(nodes.c.node_type == "CourseSetNode"),
+    )
+    _insert(
+        conn,
+        table_of(models.ORNode),
+        select(node_map.c.id.label("node_id"))
+        .select_from(nodes_with_ids)
+        .where(nodes.c.node_type == "ORNode"),
+    )
+    edges = STAGING["dag_edges"]
+    _check_keys(conn, "dag_edges", "from_key", node_map)
+    _check_keys(conn, "dag_edges", "to_key", node_map)
+    from_map, to_map = node_map.alias("from_map"), node_map.alias("to_map")
+    _insert(
+        conn,
+        models.dag_edge_assoc,
+        select(from_map.c.id.label("from_node_id"), to_map.c.id.label("to_node_id"))
+        .select_from(edges)
+        .join(from_map, from_map.c.key == edges.c.from_key)
+        .join(to_map, to_map.c.key == edges.c.to_key),
+    )
+
+
+def _reorder(conn: Connection, university_id: int) -> None:
+    """ Reorders the nodes of a university by their number of ancestors, which every
+        node has more of than its parents, among the positions they already occupy
+        in the topological order. Requires the closure of the DAG. """
+    nodes = (
+        select(
+            dagnode.c.node_id,
+            dagnode.c.topo_order,
+            func.count(dag_closure.c.ancestor_id).label("ancestors"),
+        )
+        .select_from(
+            dagnode.outerjoin(
+                dag_closure, dag_closure.c.descendant_id == dagnode.c.node_id
+            )
+        )
+        .where(dagnode.c.university_id == university_id)
+        .group_by(dagnode.c.node_id)
+        .subquery()
+    )
+    # unnesting both arrays side by side pairs the i-th node with the i-th position
+    orders = select(
+        func.unnest(
+            func.array_agg(
+                aggregate_order_by(nodes.c.node_id, nodes.c.ancestors, nodes.c.node_id)
+            )
+        ).label("node_id"),
+        func.unnest(
+            func.array_agg(aggregate_order_by(nodes.c.topo_order, nodes.c.topo_order))
+        ).label("topo_order"),
+    ).subquery()
+    conn.execute(
+        dagnode.update()
+        .where(dagnode.c.node_id == orders.c.node_id)
+        .values(topo_order=orders.c.topo_order)
+    )
+
+
+def import_catalog(
+    db: Session, directory: Union[str, Path], name_translations: Dict[str, str],
+) -> ImportReport:
+    """ Imports the catalog in `directory` into a new university, within the
+        session's transaction, and reports the number of rows imported. Raises
+        `CatalogImportError` if the catalog is invalid, after which the session must
+        be rolled back. """
+    start = time.perf_counter()
+    directory = Path(directory)
+    university = models.University(name_translations=name_translations)
+    db.add(university)
+    db.flush()
+
+    conn = db.connection()
+    for table in _staging_metadata.sorted_tables:
+        table.create(conn)
+    rows: Dict[str, int] = {}
+    for entity in ENTITIES:
+        path = _catalog_file(directory, entity)
+        rows[entity.name] = _load(conn, entity, path) if path else 0
+        logger.info(f"Loaded {rows[entity.name]} rows of {entity.name}")
+    for table in STAGING.values():
+        conn.exec_driver_sql(f"ANALYZE {table.name}")
+    try:
+        _merge(conn, university.id)
+        closure_rows = rebuild_closure(conn, university.id)
+    except IntegrityError as e:
+        constraint = getattr(getattr(e.orig, "diag", None), "constraint_name", None)
+        if constraint in ("no_self_loops", "no_reflexive_paths"):
+            raise CatalogImportError("The DAG of the catalog has a cycle") from e
+        raise CatalogImportError(str(e.orig).strip()) from e
+    _reorder(conn, university.id)
+    index_rows = rebuild_course_index(conn, university.id)
+    update_hashes(conn, university.id)
+    _staging_metadata.drop_all(conn)
+    logger.info(f"{closure_rows} closure rows, {index_rows} course index rows")
+
+    report = ImportReport(university.id, rows, time.perf_counter() - start)
+    logger.info(
+        f"Imported {sum(rows.values())} rows into university {university.id} in "
+        f"{report.seconds:.2f}s ({report.rows_per_second:.0f} rows/s)"
+    )
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Imports the catalog in a directory into a new university, "
+        "printing its id"
+    )
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--name", required=True, help="English name of the university")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        report = import_catalog(db, args.directory, {"en": args.name})
+    except CatalogImportError as e:
+        db.rollback()
+        parser.exit(1, f"Invalid catalog: {e}\n")
+    db.commit()
+    print(report.university_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+""" Merges duplicate singleton course sets: sets requiring exactly one course, which
+    `singleton_course_node` used to create for every node. The nodes of every course
+    are pointed to a single canonical set, and the other sets are deleted. Sets
+    created with `intern=False` are marked as independent, and are kept.
+
+    The sets are written without the ORM, and the writes are recorded with
+    `touch_university`, so that the data versions of the universities are
+    incremented, and their derived tables are rebuilt, when the transaction
+    commits. """
+import argparse
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Text, bindparam, cast, func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db.base_class import table_of
+from app.db.events import touch_university
+from app.db.session import SessionLocal
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+courseset = table_of(models.CourseSet)
+membership = table_of(models.CourseSetMembership)
+coursesetnode = table_of(models.CourseSetNode)
+
+# adds the canonical set and independent set columns to databases created before
+# they existed, by the column
+SCHEMA_MIGRATION = {
+    "singleton_course_id": [
+        "ALTER TABLE courseset ADD COLUMN singleton_course_id TEXT",
+        "ALTER TABLE courseset ADD FOREIGN KEY (university_id, singleton_course_id) "
+        "REFERENCES course (university_id, id)",
+        "CREATE UNIQUE INDEX ix_courseset_singleton_course "
+        "ON courseset (university_id, singleton_course_id) "
+        "WHERE singleton_course_id IS NOT NULL",
+    ],
+    "independent": [
+        "ALTER TABLE courseset ADD COLUMN independent BOOLEAN NOT NULL DEFAULT false"
+    ],
+}
+
+
+def migrate_schema(conn: Connection) -> None:
+    for column, statements in SCHEMA_MIGRATION.items():
+        has_column = conn.exec_driver_sql(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_name = 'courseset' AND column_name = %(column)s",
+            {"column": column},
+        ).first()
+        if not has_column:
+            for statement in statements:
+                conn.exec_driver_sql(statement)
+
+
+def singleton_sets(conn: Connection, university_id: int) -> Dict[str, List[int]]:
+    """ Returns the ids of the singleton sets of every course, canonical set first """
+    members = (
+        select(
+            membership.c.set_id, func.min(membership.c.course_id).label("course_id"),
+        )
+        .where(membership.c.university_id == university_id)
+        .group_by(membership.c.set_id)
+        .having(func.count() == 1)
+        .subquery()
+    )
+    rows = conn.execute(
+        select(courseset.c.id, members.c.course_id)
+        .join(members, members.c.set_id == courseset.c.id)
+        .where(
+            (courseset.c.university_id == university_id)
+            & (courseset.c.min_subset_size == 1)
+            & (courseset.c.max_subset_size == 1)
+            & courseset.c.min_credits.is_(None)
+            & courseset.c.max_credits.is_(None)
+            & (cast(courseset.c.extra_data, Text) == "{}")
+            & ~courseset.c.independent
+            & (
+                courseset.c.singleton_course_id.is_(None)
+                | (courseset.c.singleton_course_id == members.c.course_id)
+            )
+        )
+        # an existing canonical set stays canonical, otherwise the oldest set is
+        .order_by(courseset.c.singleton_course_id.is_(None), courseset.c.id)
+    )
+    sets: Dict[str, List[int]] = defaultdict(list)
+    for set_id, course_id in rows:
+        sets[course_id].append(set_id)
+    return sets
+
+
+def merge_singleton_sets(db: Session, university_id: int) -> Tuple[int, int]:
+    """ Merges the singleton sets of a university's courses into canonical ones,
+        without committing. Returns the number of canonical sets, and the number of
+        deleted sets. """
+    conn = db.connection()
+    sets = singleton_sets(conn, university_id)
+    canonical_ids = [set_ids[0] for set_ids in sets.values()]
+    # sets which aren't marked as canonical yet
+    unmarked = set(
+        conn.execute(
+            select(courseset.c.id).where(
+                (courseset.c.university_id == university_id)
+                & courseset.c.id.in_(canonical_ids)
+                & courseset.c.singleton_course_id.is_(None)
+            )
+        ).scalars()
+    )
+    canonical = [
+        {"set_id": set_ids[0], "course_id": course_id}
+        for course_id, set_ids in sets.items()
+        if set_ids[0] in unmarked
+    ]
+    duplicates = [
+        {"set_id": set_id, "canonical_id": set_ids[0]}
+        for set_ids in sets.values()
+        for set_id in set_ids[1:]
+    ]
+    if canonical:
+        conn.execute(
+            courseset.update()
+            .where(
+                (courseset.c.university_id == university_id)
+                & (courseset.c.id == bindparam("set_id"))
+            )
+            .values(singleton_course_id=bindparam("course_id")),
+            canonical,
+        )
+        touch_university(db, models.CourseSet, university_id)
+    if duplicates:
+        conn.execute(
+            coursesetnode.update()
+            .where(
+                (coursesetnode.c.university_id == university_id)
+                & (coursesetnode.c.course_set_id == bindparam("set_id"))
+            )
+            .values(course_set_id=bindparam("canonical_id")),
+            duplicates,
+        )
+        duplicate_ids = [d["set_id"] for d in duplicates]
+        conn.execute(
+            membership.delete().where(
+                (membership.c.university_id == university_id)
+                & membership.c.set_id.in_(duplicate_ids)
+            )
+        )
+        conn.execute(
+            courseset.delete().where(
+                (courseset.c.university_id == university_id)
+                & courseset.c.id.in_(duplicate_ids)
+            )
+        )
+        for model in (
+            models.CourseSet,
+            models.CourseSetMembership,
+            models.CourseSetNode,
+        ):
+            touch_university(db, model, university_id)
+    return len(sets), len(duplicates)
+
+
+def merge(university_ids: Optional[List[int]] = None) -> None:
+    db = SessionLocal()
+    migrate_schema(db.connection())
+    db.commit()
+    if not university_ids:
+        university_ids = [uid for (uid,) in db.query(models.University.id)]
+    for university_id in university_ids:
+        canonical, deleted = merge_singleton_sets(db, university_id)
+        db.commit()
+        logger.info(
+            f"University {university_id}: {canonical} singleton course sets, "
+            f"{deleted} duplicates deleted"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Merges duplicate singleton course sets of universities"
+    )
+    parser.add_argument("university_ids", type=int, nargs="*")
+    args = parser.parse_args()
+
+    logger.info("Merging singleton course sets")
+    merge(args.university_ids)
+    logger.info("Singleton course sets merged")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
+from app.api import deps
 from app.api.api_v1.api import api_router
 from app.core.config import settings
 
@@ -23,6 +24,7 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[deps.Pagination.NEXT_CURSOR_HEADER],
     )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -1,6 +1,6 @@
 from .item import Item
 from .user import User
-from .university import University  
+from .university import University, catalog_version
 from .faculty import Faculty  
 from .department import Department
 from .track import Track, DegreeType  
@@ -8,4 +8,4 @@ from .term import Term
 from .course import Course
 from .track_department import track_department
 from .course_set import CourseSet, CourseSetMembership
-from .course_dag import DAGNode, DAGRootNode, CourseSetNode, ORNode, singleton_course_node, dag_edge_assoc
\ No newline at end of file
+from .course_dag import DAGNode, DAGRootNode, CourseSetNode, ORNode, singleton_course_node, dag_edge_assoc, dag_closure, course_requirement_index
\ No newline at end of file
@@ -1,19 +1,26 @@
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, List, Optional
 from sqlalchemy import (
     Table,
     Column,
     ForeignKey,
     ForeignKeyConstraint,
     CheckConstraint,
+    Index,
     Integer,
     Text,
 )
 from sqlalchemy.orm import relationship, Mapped
 from sqlalchemy.dialects.postgresql import JSON
-from app.db.base_class import Base, Translations, ExtraData
+from app.db.base_class import (
+    Base,
+    Translations,
+    ExtraData,
+    name_search_column,
+    name_search_index,
+)
 
 if TYPE_CHECKING:
-    from .course_set import CourseSetMembership  # noqa: F401
+    from .course_set import CourseSet, CourseSetMembership  # noqa: F401
     from .university import University  # noqa: F401
     from .track import Track  # noqa: F401
     from .term import Term  # noqa: F401
@@ -29,6 +36,7 @@ class Course(Base):
     term_id: Mapped[int] = Column(Integer, ForeignKey("term.id"))
     extra_data: ExtraData = Column(JSON, nullable=False, default=lambda: {})
     course_credits: Mapped[int] = Column(Integer)
+    name_search = name_search_column()
 
     university: Mapped["University"] = relationship(
         "University", back_populates="courses"
@@ -38,4 +46,13 @@ class Course(Base):
 
     memberships: Mapped[List["CourseSetMembership"]] = relationship(
         "CourseSetMembership", back_populates="course"
-    )
\ No newline at end of file
+    )
+    # the canonical singleton set of the course, see `singleton_course_node`
+    singleton_set: Mapped[Optional["CourseSet"]]
+
+    # the primary key is ordered by id, while pages of a university's courses are
+    # ordered by this index, see app.crud.crud_university
+    __table_args__ = (
+        Index("ix_course_university_id_id", "university_id", "id", unique=True),
+        name_search_index("course"),
+    )
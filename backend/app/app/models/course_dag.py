@@ -2,20 +2,24 @@ from __future__ import annotations
 from sqlalchemy import (
     Table,
     Column,
+    BigInteger,
     Integer,
+    LargeBinary,
+    Sequence,
     Text,
     Enum,
     ForeignKeyConstraint,
     ForeignKey,
     CheckConstraint,
     UniqueConstraint,
+    Index,
 )
 import enum
 from sqlalchemy.orm import Mapped, relationship, foreign, remote
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.dialects.postgresql import JSON
 from app.db.base_class import Base, ExtraData
-from typing import Optional, List
+from typing import Any, Optional, List, Tuple
 
 from .university import University
 from .course import Course
@@ -30,6 +34,48 @@ dag_edge_assoc = Table(
     CheckConstraint("from_node_id != to_node_id", name="no_self_loops"),
 )
 
+# Transitive closure of dag_edge: a row for every pair of nodes connected by a path,
+# with the length of the shortest such path. Maintained by app.dag.closure
+dag_closure = Table(
+    "dag_closure",
+    Base.metadata,
+    Column(
+        "ancestor_id",
+        Integer,
+        ForeignKey("dagnode.node_id", deferrable=True, initially="DEFERRED"),
+        primary_key=True,
+    ),
+    Column(
+        "descendant_id",
+        Integer,
+        ForeignKey("dagnode.node_id", deferrable=True, initially="DEFERRED"),
+        primary_key=True,
+    ),
+    Column("min_depth", Integer, nullable=False),
+    CheckConstraint("ancestor_id != descendant_id", name="no_reflexive_paths"),
+    Index("ix_dag_closure_descendant", "descendant_id", "ancestor_id"),
+)
+
+# Every (course, track, DAG node) such that the course belongs to the course set of a
+# node reachable from the track's root, with the node's distance from the root.
+# Derived from the tables above, and rebuilt on every write by app.dag.course_index
+course_requirement_index = Table(
+    "course_requirement_index",
+    Base.metadata,
+    Column("university_id", Integer, primary_key=True),
+    Column("course_id", Text, primary_key=True),
+    Column("track_id", Text, primary_key=True),
+    Column("node_id", Integer, primary_key=True),
+    Column("course_set_id", Integer, nullable=False),
+    Column("depth", Integer, nullable=False),
+    # for updating the rows of written nodes and course sets
+    Index("ix_course_requirement_index_node", "university_id", "node_id"),
+    Index("ix_course_requirement_index_course_set", "university_id", "course_set_id"),
+)
+
+# New nodes are ordered after all existing nodes, see app.dag.topo
+dagnode_topo_order_seq = Sequence("dagnode_topo_order_seq", metadata=Base.metadata)
+
 
 class DAGNode(Base):
     node_id: Mapped[int] = Column(Integer, primary_key=True, autoincrement=True)
@@ -38,6 +84,18 @@ class DAGNode(Base):
     )
     node_type: Mapped[str] = Column(Text, nullable=False)
     extra_data: ExtraData = Column(JSON, nullable=False, default=lambda: {})
+    # position of the node in a topological order of its university's DAG
+    topo_order: Mapped[int] = Column(
+        BigInteger,
+        dagnode_topo_order_seq,
+        server_default=dagnode_topo_order_seq.next_value(),
+        nullable=False,
+    )
+
+    # hash of the node's type and course set, and a hash of it along with the
+    # merkle hashes of the node's children, see app.dag.merkle
+    content_hash: Mapped[Optional[bytes]] = Column(LargeBinary, nullable=True)
+    merkle_hash: Mapped[Optional[bytes]] = Column(LargeBinary, nullable=True)
 
     university: Mapped[University] = relationship(University)
     parents: Mapped[List[DAGNode]] = relationship(
@@ -49,6 +107,9 @@ class DAGNode(Base):
     )
 
     children: Mapped[List[DAGNode]]
+    __table_args__: Tuple[Any, ...] = (
+        Index("ix_dagnode_university_merkle_hash", "university_id", "merkle_hash"),
+    )
     __mapper_args__ = {"polymorphic_identity": "DAGNode", "polymorphic_on": node_type}
 
 
@@ -90,12 +151,22 @@ class CourseSetNode(DAGNode):
     }
 
 
-def singleton_course_node(course: Course) -> CourseSetNode:
-    """ Creates a new, singleton course set and node object """
-    course_set = CourseSet(
-        university=course.university, min_subset_size=1, max_subset_size=1,
-    )
-    course_set.courses.append(course)
+def singleton_course_node(course: Course, intern: bool = False) -> CourseSetNode:
+    """ Creates a new node requiring a single course. By default, the node has a new
+        singleton course set, which may be modified independently of other nodes.
+        With `intern`, the node uses the course's canonical singleton course set
+        instead, which is created on first use. """
+    course_set = course.singleton_set if intern else None
+    if course_set is None:
+        course_set = CourseSet(
+            university=course.university,
+            min_subset_size=1,
+            max_subset_size=1,
+            independent=not intern,
+        )
+        course_set.courses.append(course)
+        if intern:
+            course_set.singleton_course = course
     node = CourseSetNode(university=course.university, course_set=course_set)
     return node
 
@@ -1,4 +1,5 @@
 from sqlalchemy import (
+    Boolean,
     Column,
     Integer,
     Text,
@@ -6,8 +7,11 @@ from sqlalchemy import (
     ForeignKeyConstraint,
     ForeignKey,
     CheckConstraint,
+    Index,
+    and_,
+    false,
 )
-from sqlalchemy.orm import Mapped, relationship, foreign, remote
+from sqlalchemy.orm import Mapped, backref, relationship, foreign, remote
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.dialects.postgresql import JSON
 from app.db.base_class import Base, ExtraData
@@ -44,7 +48,24 @@ class CourseSet(Base):
     max_credits: Mapped[Optional[int]] = Column(Integer, nullable=True)
     extra_data: ExtraData = Column(JSON, nullable=False, default=lambda: {})
 
+    # the course of the canonical singleton set of a course, which is shared by all
+    # nodes requiring just that course, see `singleton_course_node`
+    singleton_course_id: Mapped[Optional[str]] = Column(Text, nullable=True)
+    # whether this is a singleton set created for a single node, which may be modified
+    # independently of other nodes, so it's never merged into the canonical set
+    independent: Mapped[bool] = Column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )
+
     university: Mapped[University] = relationship(University)
+    singleton_course: Mapped[Optional[Course]] = relationship(
+        Course,
+        primaryjoin=lambda: and_(
+            remote(Course.university_id) == CourseSet.university_id,
+            remote(Course.id) == foreign(CourseSet.singleton_course_id),
+        ),
+        backref=backref("singleton_set", uselist=False),
+    )
 
     # leafs (individual courses that are members of this set)
     course_memberships: Mapped[List["CourseSetMembership"]] = relationship(
@@ -56,6 +77,17 @@ class CourseSet(Base):
         CheckConstraint(
             (min_subset_size <= max_subset_size) & (min_credits <= max_credits)
         ),
+        ForeignKeyConstraint(
+            ["university_id", "singleton_course_id"],
+            ["course.university_id", "course.id"],
+        ),
+        Index(
+            "ix_courseset_singleton_course",
+            "university_id",
+            "singleton_course_id",
+            unique=True,
+            postgresql_where=singleton_course_id.isnot(None),
+        ),
     )
 
 
@@ -3,7 +3,13 @@ from typing import TYPE_CHECKING, List
 from sqlalchemy import Column, ForeignKeyConstraint, Integer, Text
 from sqlalchemy.orm import relationship, Mapped
 from sqlalchemy.dialects.postgresql import JSON
-from app.db.base_class import Base, Translations, ExtraData
+from app.db.base_class import (
+    Base,
+    Translations,
+    ExtraData,
+    name_search_column,
+    name_search_index,
+)
 from .track_department import track_department
 
 if TYPE_CHECKING:
@@ -19,6 +25,7 @@ class Department(Base):
     faculty_id: Mapped[str] = Column(Text, primary_key=True)
     name_translations: Translations = Column(JSON, nullable=False, default=lambda: {})
     extra_data: ExtraData = Column(JSON, nullable=False, default=lambda: {})
+    name_search = name_search_column()
 
     tracks: Mapped[List["Track"]] = relationship(
         "Track", secondary=track_department, back_populates="departments"
@@ -29,4 +36,5 @@ class Department(Base):
         ForeignKeyConstraint(
             ["faculty_id", "university_id"], ["faculty.id", "faculty.university_id"]
         ),
+        name_search_index("department"),
     )
@@ -3,7 +3,13 @@ from typing import TYPE_CHECKING, List
 from sqlalchemy import Column, ForeignKey, Integer, Text
 from sqlalchemy.orm import relationship, Mapped
 from sqlalchemy.dialects.postgresql import JSON
-from app.db.base_class import Base, Translations, ExtraData
+from app.db.base_class import (
+    Base,
+    Translations,
+    ExtraData,
+    name_search_column,
+    name_search_index,
+)
 
 if TYPE_CHECKING:
     from .university import University  # noqa: F401
@@ -20,6 +26,7 @@ class Faculty(Base):
     )
     name_translations: Translations = Column(JSON, nullable=False, default=lambda: {})
     extra_data: ExtraData = Column(JSON, nullable=False, default=lambda: {})
+    name_search = name_search_column()
 
     university: Mapped["University"] = relationship(
         "University", back_populates="faculties"
@@ -28,3 +35,5 @@ class Faculty(Base):
     departments: Mapped[List["Department"]] = relationship(
         "Department", back_populates="faculty"
     )
+
+    __table_args__ = (name_search_index("faculty"),)
@@ -1,10 +1,16 @@
 from typing import TYPE_CHECKING, List
 import enum
 
-from sqlalchemy import Column, Integer, Text, Enum, ForeignKey
+from sqlalchemy import Column, Index, Integer, Text, Enum, ForeignKey
 from sqlalchemy.orm import relationship, Mapped
 from sqlalchemy.dialects.postgresql import JSON
-from app.db.base_class import Base, ExtraData, Translations
+from app.db.base_class import (
+    Base,
+    ExtraData,
+    Translations,
+    name_search_column,
+    name_search_index,
+)
 
 from .track_department import track_department
 
@@ -38,6 +44,7 @@ class Track(Base):
     name_translations: Translations = Column(JSON, nullable=False, default=lambda: {})
     degree: Mapped[DegreeType] = Column(Enum(DegreeType), nullable=False)
     extra_data: ExtraData = Column(JSON, nullable=False, default=lambda: {})
+    name_search = name_search_column()
 
     university: Mapped["University"] = relationship(
         "University", back_populates="tracks"
@@ -47,3 +54,10 @@ class Track(Base):
     departments: Mapped[List["Department"]] = relationship(
         "Department", secondary=track_department, back_populates="tracks"
     )
+
+    # the primary key is ordered by id, while pages of a university's tracks are
+    # ordered by this index, see app.crud.crud_university
+    __table_args__ = (
+        Index("ix_track_university_id_id", "university_id", "id", unique=True),
+        name_search_index("track"),
+    )
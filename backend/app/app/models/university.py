@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING, List
 
-from sqlalchemy import Column, Integer
+from sqlalchemy import BigInteger, Column, Integer, Sequence
 from sqlalchemy.orm import relationship, Mapped
 from sqlalchemy.dialects.postgresql import JSON
 from app.db.base_class import Base, Translations, ExtraData
@@ -11,12 +11,20 @@ if TYPE_CHECKING:
     from .track import Track  # noqa: F401
 
 
+# Advanced by every transaction writing to any university, see `app.db.versions`
+catalog_version = Sequence("catalog_version", metadata=Base.metadata)
+
+
 class University(Base):
     """ A university/college is a collection of faculties and courses """
 
     id: Mapped[int] = Column(Integer, primary_key=True, index=True)
     name_translations: Translations = Column(JSON, nullable=False, default=lambda: {})
     extra_data: ExtraData = Column(JSON, nullable=False, default=lambda: {})
+    # incremented by every transaction writing to the university's rows
+    data_version: Mapped[int] = Column(
+        BigInteger, nullable=False, default=0, server_default="0"
+    )
 
     courses: Mapped[List["Course"]] = relationship(
         "Course", back_populates="university"
@@ -2,6 +2,25 @@ from .item import Item, ItemCreate, ItemInDB, ItemUpdate
 from .msg import Msg
 from .token import Token, TokenPayload
 from .user import User, UserCreate, UserInDB, UserUpdate
-from .course import Course, Term
+from .course import Course, Term, CourseRequirement, CourseRequiredBy, CourseSuggestion, CourseBatchRequest, CourseBatch, CourseBulkUpsert, CourseBulkBatch, CourseBulkResult
 from .track import Track
-from .university import University, UniversityWithTracks, Faculty, Department
\ No newline at end of file
+from .university import University, UniversityWithTracks, Faculty, Department
+from .cache import CacheStats
+from .audit import AuditRequest, NodeAudit, TrackAudit, BulkAuditRequest, StudentAudit, BulkAudit
+from .dag import DAGNode, TrackGraph, TrackGraphs, DAGNodeChange, TrackDiff
+from .frontier import FrontierRequest, FrontierNode, TrackFrontier
+from .plan import PlanRequest, TrackPlan
+from .search import SearchResult
+from .facet import CourseFacets
+from .catalog_import import (
+    FacultyRow,
+    DepartmentRow,
+    TermRow,
+    TrackRow,
+    TrackDepartmentRow,
+    CourseRow,
+    CourseSetRow,
+    CourseSetMembershipRow,
+    DAGNodeRow,
+    DAGEdgeRow,
+)
@@ -0,0 +1,65 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+
+
+class AuditRequest(BaseModel):
+    completed_courses: List[str] = Field(
+        ..., description="Ids of the courses completed by the student"
+    )
+
+
+class NodeAudit(BaseModel):
+    """ The result of evaluating a single node of a track's DAG """
+
+    node_id: int
+    node_type: str
+    course_set_id: Optional[int]
+    satisfied: bool
+    earned_credits: int = Field(
+        ..., description="Credits earned in the course set of the node (if any)"
+    )
+    missing_credits: int = Field(
+        ...,
+        description="Minimal number of credits which still need to be taken in "
+        "order to satisfy the node",
+    )
+
+
+class TrackAudit(BaseModel):
+    """ The result of auditing a set of completed courses against a track """
+
+    university_id: int
+    track_id: str
+    satisfied: bool
+    missing_credits: int
+    unknown_courses: List[str] = Field(
+        ..., description="Completed courses which aren't part of the track"
+    )
+    nodes: List[NodeAudit]
+
+
+class BulkAuditRequest(BaseModel):
+    students: List[AuditRequest] = Field(
+        ..., max_items=settings.BULK_AUDIT_MAX_STUDENTS
+    )
+
+
+class StudentAudit(BaseModel):
+    """ The result of auditing the completed courses of a single student """
+
+    satisfied: bool
+    missing_credits: int
+    earned_credits: int = Field(
+        ..., description="Credits of the completed courses which are part of the track"
+    )
+
+
+class BulkAudit(BaseModel):
+    university_id: int
+    track_id: str
+    results: List[StudentAudit] = Field(
+        ..., description="The audit of every student, in request order"
+    )
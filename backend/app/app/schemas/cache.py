@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+
+
+class CacheStats(BaseModel):
+    """ Usage statistics of an in-memory cache """
+
+    name: str
+    size: int = Field(..., description="Number of entries currently in the cache")
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int = Field(
+        ..., description="Number of entries dropped to keep the cache within its size"
+    )
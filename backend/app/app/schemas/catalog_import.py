@@ -0,0 +1,94 @@
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field, root_validator
+
+from app.models.track import DegreeType
+
+from .common import ExtraData, ExtraDataField, Translations, TranslationsField
+
+# Rows of the files of a catalog to import, see `app.import_catalog`. Entities are
+# flat, and refer to each other by their ids, or for course sets and DAG nodes,
+# whose ids are assigned on import, by keys which are unique within the catalog.
+
+
+class FacultyRow(BaseModel):
+    id: str
+    name_translations: Translations = TranslationsField
+    extra_data: ExtraData = ExtraDataField
+
+
+class DepartmentRow(BaseModel):
+    faculty_id: str
+    id: str
+    name_translations: Translations = TranslationsField
+    extra_data: ExtraData = ExtraDataField
+
+
+class TermRow(BaseModel):
+    """ Terms are shared by all universities, so existing terms are kept """
+
+    id: int
+    name_translations: Translations = TranslationsField
+
+
+class TrackRow(BaseModel):
+    id: str
+    degree: DegreeType
+    name_translations: Translations = TranslationsField
+    extra_data: ExtraData = ExtraDataField
+
+
+class TrackDepartmentRow(BaseModel):
+    track_id: str
+    faculty_id: str
+    department_id: str
+
+
+class CourseRow(BaseModel):
+    id: str
+    term_id: int
+    course_credits: int = Field(..., ge=0)
+    name_translations: Translations = TranslationsField
+    extra_data: ExtraData = ExtraDataField
+
+
+class CourseSetRow(BaseModel):
+    key: str
+    min_subset_size: Optional[int] = Field(None, ge=0)
+    max_subset_size: Optional[int] = Field(None, ge=0)
+    min_credits: Optional[int] = Field(None, ge=0)
+    max_credits: Optional[int] = Field(None, ge=0)
+    singleton_course_id: Optional[str] = Field(
+        None, description="The course of a canonical singleton set"
+    )
+    extra_data: ExtraData = ExtraDataField
+
+
+class CourseSetMembershipRow(BaseModel):
+    set_key: str
+    course_id: str
+    extra_data: ExtraData = ExtraDataField
+
+
+class DAGNodeRow(BaseModel):
+    key: str
+    node_type: str = Field(..., regex="^(DAGRootNode|CourseSetNode|ORNode)$")
+    course_set_key: Optional[str] = Field(
+        None, description="The course set of a 'CourseSetNode'"
+    )
+    track_id: Optional[str] = Field(None, description="The track of a 'DAGRootNode'")
+    extra_data: ExtraData = ExtraDataField
+
+    @root_validator(skip_on_failure=True)
+    def check_node_type(cls, values: Dict[str, Any]) -> Dict[str, Any]:
+        node_type = values["node_type"]
+        if (node_type == "CourseSetNode") != (values["course_set_key"] is not None):
+            raise ValueError("Exactly course set nodes must have a course_set_key")
+        if (node_type == "DAGRootNode") != (values["track_id"] is not None):
+            raise ValueError("Exactly root nodes must have a track_id")
+        return values
+
+
+class DAGEdgeRow(BaseModel):
+    from_key: str
+    to_key: str
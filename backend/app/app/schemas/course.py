@@ -1,5 +1,7 @@
+from .catalog_import import CourseRow
 from .common import ExtraData, Translations, ExtraDataField, TranslationsField
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
+from typing import List
 
 
 class Term(BaseModel):
@@ -37,3 +39,73 @@ class Course(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class CourseBatchRequest(BaseModel):
+    ids: List[str] = Field(..., description="Ids of courses to get")
+
+
+class CourseBatch(BaseModel):
+    """ The courses of a university with the requested ids, in the requested order """
+
+    university_id: int
+    courses: List[Course]
+    missing_ids: List[str] = Field(
+        ..., description="Requested ids which don't belong to any course"
+    )
+
+
+class CourseBulkUpsert(BaseModel):
+    courses: List[CourseRow] = Field(
+        ..., description="Courses to create, or to replace the fields of, by id"
+    )
+
+    @validator("courses")
+    def check_unique_ids(cls, courses: List[CourseRow]) -> List[CourseRow]:
+        if len({course.id for course in courses}) != len(courses):
+            raise ValueError("Course ids must be unique")
+        return courses
+
+
+class CourseBulkBatch(BaseModel):
+    """ The number of courses of a batch which were created, updated, or left as they
+        were since none of their fields changed """
+
+    inserted: int
+    updated: int
+    unchanged: int
+
+
+class CourseBulkResult(BaseModel):
+    university_id: int
+    batches: List[CourseBulkBatch]
+
+
+class CourseSuggestion(BaseModel):
+    """ A course completing what was typed into a course picker """
+
+    id: str
+    university_id: int
+    name_translations: Translations = TranslationsField
+
+
+class CourseRequirement(BaseModel):
+    """ A reference to a course from the requirements DAG of a track """
+
+    track_id: str
+    node_id: int = Field(..., description="A 'CourseSetNode' whose set has the course")
+    course_set_id: int
+    depth: int = Field(
+        ..., description="Length of the shortest path from the track's root to the node"
+    )
+
+    class Config:
+        orm_mode = True
+
+
+class CourseRequiredBy(BaseModel):
+    """ The tracks, DAG nodes and course sets which require a course """
+
+    university_id: int
+    course_id: str
+    required_by: List[CourseRequirement]
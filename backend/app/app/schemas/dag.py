@@ -0,0 +1,72 @@
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from .common import ExtraData, ExtraDataField
+
+
+class DAGNode(BaseModel):
+    """ A node in the requirements DAG of a track """
+
+    node_id: int
+    university_id: int
+    node_type: str = Field(
+        ..., description="One of 'DAGRootNode', 'CourseSetNode' or 'ORNode'"
+    )
+    course_set_id: Optional[int] = Field(
+        None, description="The course set of a 'CourseSetNode'"
+    )
+    track_id: Optional[str] = Field(None, description="The track of a 'DAGRootNode'")
+    extra_data: ExtraData = ExtraDataField
+
+
+class TrackGraph(BaseModel):
+    """ The requirements DAG of a track, where every node appears once """
+
+    university_id: int
+    track_id: str
+    root_id: int
+    nodes: Dict[int, DAGNode] = Field(..., description="All nodes, keyed by node_id")
+    edges: List[Tuple[int, int]] = Field(
+        ..., description="Pairs of (from_node_id, to_node_id)"
+    )
+
+
+class TrackGraphs(BaseModel):
+    """ The requirements DAGs of many tracks, where nodes shared by several tracks
+        appear once """
+
+    university_id: int
+    roots: Dict[str, int] = Field(
+        ..., description="The root node_id of every track, keyed by track_id"
+    )
+    nodes: Dict[int, DAGNode] = Field(..., description="All nodes, keyed by node_id")
+    edges: List[Tuple[int, int]] = Field(
+        ..., description="Pairs of (from_node_id, to_node_id)"
+    )
+
+
+class DAGNodeChange(BaseModel):
+    """ A difference between the DAGs of a track in two universities """
+
+    change: str = Field(..., description="One of 'added', 'removed' or 'changed'")
+    node_type: str
+    node_id: Optional[int] = Field(
+        None, description="The node in the first university, unless it was added"
+    )
+    other_node_id: Optional[int] = Field(
+        None, description="The node in the other university, unless it was removed"
+    )
+    course_set_id: Optional[int]
+    other_course_set_id: Optional[int]
+    parent_id: Optional[int] = Field(
+        None, description="The node which an added or removed node is a child of"
+    )
+    other_parent_id: Optional[int]
+
+
+class TrackDiff(BaseModel):
+    university_id: int
+    other_university_id: int
+    track_id: str
+    changes: List[DAGNodeChange]
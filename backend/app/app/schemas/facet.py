@@ -0,0 +1,47 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from .course import Course
+
+
+class TermFacet(BaseModel):
+    term_id: int
+    count: int
+
+
+class CreditsFacet(BaseModel):
+    course_credits: int
+    count: int
+
+
+class FacultyFacet(BaseModel):
+    faculty_id: str
+    count: int
+
+
+class DepartmentFacet(BaseModel):
+    faculty_id: str
+    department_id: str
+    count: int
+
+
+class TrackFacet(BaseModel):
+    track_id: str
+    count: int
+
+
+class CourseFacets(BaseModel):
+    """ A page of the courses of a university matching filters, along with the values
+        of every filter and their number of courses. The counts of a filter's values
+        apply all other filters, so they're the number of courses found by changing
+        that filter to each value. Values are ordered by count, descending. """
+
+    university_id: int
+    total: int = Field(..., description="Number of courses matching all filters")
+    courses: List[Course]
+    terms: List[TermFacet]
+    credits: List[CreditsFacet]
+    faculties: List[FacultyFacet]
+    departments: List[DepartmentFacet]
+    tracks: List[TrackFacet]
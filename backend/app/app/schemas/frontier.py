@@ -0,0 +1,33 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class FrontierRequest(BaseModel):
+    completed_courses: List[str] = Field(
+        ..., description="Ids of the courses completed by the student"
+    )
+    added_courses: List[str] = Field(
+        [],
+        description="Courses completed since the previous request, whose completed "
+        "courses were `completed_courses`. Allows updating the previous frontier "
+        "instead of computing it from scratch",
+    )
+
+
+class FrontierNode(BaseModel):
+    """ A course set which can be taken next """
+
+    node_id: int
+    course_set_id: int
+    course_ids: List[str] = Field(..., description="Courses of the set not completed")
+
+
+class TrackFrontier(BaseModel):
+    """ The course sets of a track whose prerequisites are all passed, but which
+        weren't completed yet """
+
+    university_id: int
+    track_id: str
+    course_ids: List[str] = Field(..., description="All courses of the frontier's sets")
+    nodes: List[FrontierNode]
@@ -0,0 +1,36 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from app.dag.planner import Objective
+
+
+class PlanRequest(BaseModel):
+    completed_courses: List[str] = Field(
+        [], description="Ids of the courses already completed by the student"
+    )
+    objective: Objective = Field(
+        Objective.credits,
+        description="Whether to minimize the total credits of the plan, or the "
+        "number of terms it takes (breaking ties by credits)",
+    )
+
+
+class TrackPlan(BaseModel):
+    """ A set of courses which completes a track along with the completed courses """
+
+    university_id: int
+    track_id: str
+    objective: Objective
+    course_ids: List[str] = Field(..., description="The courses to take")
+    total_credits: int
+    terms: List[List[str]] = Field(
+        ...,
+        description="The courses to take in every term, so that the prerequisites "
+        "of a course are taken in earlier terms",
+    )
+    optimal: bool = Field(
+        ...,
+        description="Whether the plan is known to be optimal, or is the best plan "
+        "found within the time budget",
+    )
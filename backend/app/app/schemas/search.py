@@ -0,0 +1,18 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from .common import Translations, TranslationsField
+
+
+class SearchResult(BaseModel):
+    """ A course, track, faculty or department matching a search """
+
+    kind: str = Field(
+        ..., description="One of 'course', 'track', 'faculty' or 'department'"
+    )
+    id: str
+    university_id: int
+    faculty_id: Optional[str] = Field(None, description="The faculty of a department")
+    name_translations: Translations = TranslationsField
+    rank: float = Field(..., description="Higher ranks are better matches")
@@ -0,0 +1,3 @@
+from .autocomplete import CoursePrefixIndex, autocomplete_courses, get_prefix_index
+from .facets import CourseFilters, facet_counts, filtered_course_ids
+from .fulltext import KINDS, Vocabulary, get_vocabulary, search_names
@@ -0,0 +1,175 @@
+""" Autocompletion of course ids and names, served from memory.
+
+    Typing in a course picker sends a request per keystroke, so rather than querying
+    the database, every university's courses are indexed in a `CoursePrefixIndex`,
+    which is built on first use and rebuilt on the first use after its university's
+    courses change.
+"""
+import re
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.events import on_university_change
+from app.db.versions import get_data_version
+
+_WORD_START = re.compile(r"\b\w")
+# positions within texts are packed into integers, as `text_index << _OFFSET_BITS |
+# offset`, which unlike tuples aren't tracked by the garbage collector, and words
+# starting at larger offsets aren't indexed
+_OFFSET_BITS = 16
+_OFFSET_MASK = (1 << _OFFSET_BITS) - 1
+
+
+def normalize(text: str) -> str:
+    """ Case folds a text and collapses its whitespace """
+    return " ".join(text.casefold().split())
+
+
+def _suffix(texts: List[str], position: int, length: Optional[int] = None) -> str:
+    """ The text following a position, or its first `length` characters """
+    offset = position & _OFFSET_MASK
+    end = None if length is None else offset + length
+    return texts[position >> _OFFSET_BITS][offset:end]
+
+
+class _SortedSuffixes:
+    """ Positions within a list of texts, sorted by the text following them, so the
+        positions followed by a given prefix are found by binary search. Positions are
+        kept in an array of integers, rather than as the suffixes themselves. """
+
+    def __init__(self, texts: List[str], positions: Iterable[int]):
+        self._texts = texts
+        self._positions = array("Q", sorted(positions, key=lambda p: _suffix(texts, p)))
+
+    def _prefix(self, i: int, length: int) -> str:
+        return _suffix(self._texts, self._positions[i], length)
+
+    def matches(self, prefix: str) -> Iterator[int]:
+        """ Yields the indices of the texts in which `prefix` occurs at a position,
+            ordered by the text following it """
+        low, high = 0, len(self._positions)
+        while low < high:
+            middle = (low + high) // 2
+            if self._prefix(middle, len(prefix)) < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        for i in range(low, len(self._positions)):
+            if self._prefix(i, len(prefix)) != prefix:
+                break
+            yield self._positions[i] >> _OFFSET_BITS
+
+
+class CoursePrefixIndex:
+    """ The courses of a university, by the prefixes of their ids, of their names in
+        every language, and of the words within their names.
+
+        Completions of a prefix are ranked by what the prefix matched: ids, then
+        names, then words within names, and alphabetically among those. Finding the
+        top completions takes a binary search and a scan of as many entries as
+        there are completions, so it doesn't depend on the size of the catalog.
+    """
+
+    def __init__(self, courses: Iterable[Tuple[str, Dict[str, str]]]):
+        self._courses: List[Tuple[str, Dict[str, str]]] = []
+        # normalized ids and names, and the ordinal of the course of each
+        texts: List[str] = []
+        text_courses = array("I")
+        ids: List[int] = []
+        names: List[int] = []
+        words: List[int] = []
+        for ordinal, (course_id, name_translations) in enumerate(courses):
+            self._courses.append((course_id, name_translations))
+            ids.append(len(texts) << _OFFSET_BITS)
+            texts.append(normalize(course_id))
+            text_courses.append(ordinal)
+            for name in set(map(normalize, name_translations.values())):
+                position = len(texts) << _OFFSET_BITS
+                names.append(position)
+                # words but the first, which is matched as the name itself
+                words.extend(
+                    position | match.start()
+                    for match in _WORD_START.finditer(name, 1, _OFFSET_MASK + 1)
+                )
+                texts.append(name)
+                text_courses.append(ordinal)
+        self._texts = texts
+        self._text_courses = text_courses
+        self._tiers = [
+            _SortedSuffixes(texts, ids),
+            _SortedSuffixes(texts, names),
+            _SortedSuffixes(texts, words),
+        ]
+
+    def __len__(self) -> int:
+        return len(self._courses)
+
+    def complete(
+        self, prefix: str, limit: int = 10
+    ) -> List[Tuple[str, Dict[str, str]]]:
+        """ Returns the ids and name translations of the best `limit` courses whose
+            id, name or a word in their name starts with a prefix """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        seen: Set[int] = set()
+        completions = []
+        for tier in self._tiers:
+            for text_index in tier.matches(prefix):
+                ordinal = self._text_courses[text_index]
+                if ordinal in seen:
+                    continue
+                seen.add(ordinal)
+                completions.append(self._courses[ordinal])
+                if len(completions) == limit:
+                    return completions
+        return completions
+
+
+def build_prefix_index(db: Session, university_id: int) -> CoursePrefixIndex:
+    rows = db.execute(
+        select(models.Course.id, models.Course.name_translations).where(
+            models.Course.university_id == university_id
+        )
+    )
+    return CoursePrefixIndex((course_id, names or {}) for course_id, names in rows)
+
+
+prefix_index_cache: LRUCache[CoursePrefixIndex] = LRUCache(
+    "course_prefix_index", settings.AUTOCOMPLETE_CACHE_SIZE
+)
+
+
+def get_prefix_index(db: Session, university_id: int) -> CoursePrefixIndex:
+    """ Returns the prefix index of a university's courses, building it on first use,
+        or once the university's data version changed """
+    index = prefix_index_cache.get_or_build(
+        (university_id,),
+        lambda: build_prefix_index(db, university_id),
+        get_data_version(db, university_id),
+    )
+    assert index is not None
+    return index
+
+
+def autocomplete_courses(
+    db: Session, university_id: int, prefix: str, limit: int = 10
+) -> List[Dict[str, Any]]:
+    return [
+        {"id": course_id, "university_id": university_id, "name_translations": names}
+        for course_id, names in get_prefix_index(db, university_id).complete(
+            prefix, limit
+        )
+    ]
+
+
+@on_university_change(models.Course)
+def _invalidate_prefix_index_cache(university_ids: Set[int]) -> None:
+    for university_id in university_ids:
+        prefix_index_cache.invalidate_university(university_id)
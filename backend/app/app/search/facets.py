@@ -0,0 +1,295 @@
+""" Filtering the courses of a university, and counting the courses of every value of
+    every filter.
+
+    Courses are filtered by term, by a range of credits, and by the tracks requiring
+    them (see `app.dag.course_index`) and those tracks' faculties and departments.
+    Track, faculty and department filters apply to the same track, e.g filtering by
+    a department and a track finds the courses of that track, if it belongs to that
+    department.
+
+    Facet counts are computed as the UI needs them to offer changing a filter: the
+    counts of the values of a facet apply every filter but the facet's own, so
+    picking another value of a facet shows how many courses it'd find.
+    Counting all facets in SQL needs a distinct count per facet over every (course,
+    track, department) row of the university, which is slower than loading those
+    rows once into columnar arrays (`CourseCatalog`), cached until the university
+    changes, and counting all facets with a few vectorized passes over them.
+"""
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import and_, select, true
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement, Select
+
+from app import models
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.base_class import table_of
+from app.db.events import on_university_change
+from app.db.versions import get_data_version
+
+course = table_of(models.Course)
+course_index = models.course_requirement_index
+track_department = models.track_department
+
+
+# Facets, by the columns of their values
+FACETS = {
+    "terms": ("term_id",),
+    "credits": ("course_credits",),
+    "faculties": ("faculty_id",),
+    "departments": ("faculty_id", "department_id"),
+    "tracks": ("track_id",),
+}
+
+
+class CourseFilters(NamedTuple):
+    """ Filters of a university's courses. Empty sequences and None don't filter """
+
+    term_ids: Sequence[int] = ()
+    min_credits: Optional[int] = None
+    max_credits: Optional[int] = None
+    faculty_ids: Sequence[str] = ()
+    department_ids: Sequence[str] = ()
+    track_ids: Sequence[str] = ()
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.term_ids
+            or self.min_credits is not None
+            or self.max_credits is not None
+            or self.faculty_ids
+            or self.department_ids
+            or self.track_ids
+        )
+
+
+def _course_rows(university_id: int) -> Any:
+    """ The (course, track, faculty, department) rows of a university, with a row of
+        null track, faculty and department for courses not required by any track,
+        or by tracks of no department """
+    tracks = (
+        select(course_index.c.course_id, course_index.c.track_id)
+        .where(course_index.c.university_id == university_id)
+        .distinct()
+        .subquery()
+    )
+    return (
+        select(
+            course.c.id.label("course_id"),
+            course.c.term_id,
+            course.c.course_credits,
+            tracks.c.track_id,
+            track_department.c.faculty_id,
+            track_department.c.department_id,
+        )
+        .select_from(
+            course.outerjoin(tracks, tracks.c.course_id == course.c.id).outerjoin(
+                track_department,
+                (track_department.c.university_id == university_id)
+                & (track_department.c.track_id == tracks.c.track_id),
+            )
+        )
+        .where(course.c.university_id == university_id)
+        .subquery()
+    )
+
+
+def _conditions(rows: Any, filters: CourseFilters) -> Dict[str, ColumnElement]:
+    """ The condition of every facet, on the rows of `_course_rows` """
+    return {
+        "terms": rows.c.term_id.in_(filters.term_ids) if filters.term_ids else true(),
+        "credits": and_(
+            rows.c.course_credits >= filters.min_credits
+            if filters.min_credits is not None
+            else true(),
+            rows.c.course_credits <= filters.max_credits
+            if filters.max_credits is not None
+            else true(),
+        ),
+        "faculties": rows.c.faculty_id.in_(filters.faculty_ids)
+        if filters.faculty_ids
+        else true(),
+        "departments": rows.c.department_id.in_(filters.department_ids)
+        if filters.department_ids
+        else true(),
+        "tracks": rows.c.track_id.in_(filters.track_ids)
+        if filters.track_ids
+        else true(),
+    }
+
+
+def filtered_course_ids(university_id: int, filters: CourseFilters) -> Select:
+    """ Selects the ids of the courses of a university matching every filter """
+    rows = _course_rows(university_id)
+    return select(rows.c.course_id).where(and_(*_conditions(rows, filters).values()))
+
+
+def _encode(values: Sequence[Hashable]) -> Tuple[List[Any], np.ndarray]:
+    """ Returns the distinct non-null values, and the index of every value among them,
+        or -1 for nulls """
+    distinct: Dict[Hashable, int] = {}
+    codes = [
+        -1 if value is None else distinct.setdefault(value, len(distinct))
+        for value in values
+    ]
+    return list(distinct), np.array(codes, dtype=np.int64)
+
+
+def _isin(values: List[Any], codes: np.ndarray, selected: Sequence[Any]) -> np.ndarray:
+    """ Returns whether every code is of one of the selected values """
+    selected_values = set(selected)
+    # nulls, of code -1, index the last element, which is never selected
+    wanted = np.array([value in selected_values for value in values] + [False])
+    return wanted[codes]
+
+
+def _count(codes: np.ndarray, values: int, mask: np.ndarray) -> np.ndarray:
+    return np.bincount(codes[mask & (codes >= 0)], minlength=values)
+
+
+class CourseCatalog:
+    """ The (course, track, faculty, department) rows of a university, as described in
+        `_course_rows`, as arrays of integer codes of every column's values. Terms and
+        credits, which are the same for all rows of a course, are kept per course. """
+
+    def __init__(self, rows: Sequence[Sequence[Any]]):
+        course_ids, term_ids, credits, track_ids, faculty_ids, department_ids = (
+            zip(*rows) if rows else ((),) * 6
+        )
+        self.course_ids, self.row_courses = _encode(course_ids)
+        # courses are encoded in order of appearance, so these are the first rows
+        # of every course, in order
+        _, first = np.unique(self.row_courses, return_index=True)
+        self.terms, row_terms = _encode(term_ids)
+        self.credits, row_credits = _encode(credits)
+        self.course_terms, self.course_credits = row_terms[first], row_credits[first]
+        self._credit_amounts = np.array(self.credits, np.int64)[self.course_credits]
+        self.faculties, self.row_faculties = _encode(faculty_ids)
+        self.departments, self.row_departments = _encode(
+            [
+                None if department_id is None else (faculty_id, department_id)
+                for faculty_id, department_id in zip(faculty_ids, department_ids)
+            ]
+        )
+        self.tracks, self.row_tracks = _encode(track_ids)
+
+    def _count_rows(
+        self, codes: np.ndarray, values: int, mask: np.ndarray
+    ) -> np.ndarray:
+        """ Counts the courses of every value among the rows in `mask`, where rows of
+            a course with the same value count once """
+        mask = mask & (codes >= 0)
+        pairs = np.unique(self.row_courses[mask] * values + codes[mask])
+        return np.bincount(pairs % values, minlength=values)
+
+    def facet_counts(self, filters: CourseFilters) -> Dict[str, Any]:
+        """ See `facet_counts` """
+        courses = np.ones(len(self.course_ids), dtype=bool)
+        term_ok = courses
+        if filters.term_ids:
+            term_ok = _isin(self.terms, self.course_terms, filters.term_ids)
+        credits_ok = courses
+        if filters.min_credits is not None:
+            credits_ok = credits_ok & (self._credit_amounts >= filters.min_credits)
+        if filters.max_credits is not None:
+            credits_ok = credits_ok & (self._credit_amounts <= filters.max_credits)
+
+        rows = np.ones(len(self.row_courses), dtype=bool)
+        faculty_ok = department_ok = track_ok = rows
+        if filters.faculty_ids:
+            faculty_ok = _isin(self.faculties, self.row_faculties, filters.faculty_ids)
+        if filters.department_ids:
+            department_ids = [department_id for _, department_id in self.departments]
+            department_ok = _isin(
+                department_ids, self.row_departments, filters.department_ids
+            )
+        if filters.track_ids:
+            track_ok = _isin(self.tracks, self.row_tracks, filters.track_ids)
+        # courses with a row matching the filters of tracks
+        in_tracks = courses
+        if filters.faculty_ids or filters.department_ids or filters.track_ids:
+            in_tracks = np.zeros(len(self.course_ids), dtype=bool)
+            in_tracks[self.row_courses[faculty_ok & department_ok & track_ok]] = True
+        rows_of_courses = (term_ok & credits_ok)[self.row_courses]
+
+        counts = {
+            "terms": _count(self.course_terms, len(self.terms), credits_ok & in_tracks),
+            "credits": _count(
+                self.course_credits, len(self.credits), term_ok & in_tracks
+            ),
+            "faculties": self._count_rows(
+                self.row_faculties,
+                len(self.faculties),
+                rows_of_courses & department_ok & track_ok,
+            ),
+            "departments": self._count_rows(
+                self.row_departments,
+                len(self.departments),
+                rows_of_courses & faculty_ok & track_ok,
+            ),
+            "tracks": self._count_rows(
+                self.row_tracks,
+                len(self.tracks),
+                rows_of_courses & faculty_ok & department_ok,
+            ),
+        }
+        result: Dict[str, Any] = {
+            "total": int(np.count_nonzero(term_ok & credits_ok & in_tracks))
+        }
+        for facet, columns in FACETS.items():
+            values = [
+                (int(count), value if len(columns) > 1 else (value,))
+                for value, count in zip(getattr(self, facet), counts[facet])
+                if count
+            ]
+            values.sort(key=lambda value: (-value[0], value[1]))
+            result[facet] = [
+                {**dict(zip(columns, value)), "count": count} for count, value in values
+            ]
+        return result
+
+
+def load_catalog(db: Session, university_id: int) -> CourseCatalog:
+    return CourseCatalog(db.execute(select(_course_rows(university_id))).all())
+
+
+catalog_cache: LRUCache[CourseCatalog] = LRUCache(
+    "course_catalog", settings.COURSE_CATALOG_CACHE_SIZE
+)
+
+
+def get_catalog(db: Session, university_id: int) -> CourseCatalog:
+    """ Returns the catalog of a university's courses, loading it on first use, or
+        once the university's data version changed """
+    catalog = catalog_cache.get_or_build(
+        (university_id,),
+        lambda: load_catalog(db, university_id),
+        get_data_version(db, university_id),
+    )
+    assert catalog is not None
+    return catalog
+
+
+def facet_counts(
+    db: Session, university_id: int, filters: CourseFilters
+) -> Dict[str, Any]:
+    """ Returns the number of courses of a university matching every filter, as
+        `total`, and for every facet, its values among courses matching every other
+        filter, with their number of courses, most common first. Null values, such
+        as the track of courses which aren't required by any track, aren't counted. """
+    return get_catalog(db, university_id).facet_counts(filters)
+
+
+@on_university_change(
+    models.Course,
+    models.Track,
+    models.Department,
+    models.DAGNode,
+    models.CourseSet,
+    models.CourseSetMembership,
+)
+def _invalidate_catalog_cache(university_ids: Set[int]) -> None:
+    for university_id in university_ids:
+        catalog_cache.invalidate_university(university_id)
@@ -0,0 +1,234 @@
+""" Searching the courses, tracks, faculties and departments of a university by name.
+
+    Every searchable table has a generated `name_search` column with a GIN index
+    (see `app.db.base_class`), containing the words of all translations of the
+    entity's name and of its id, and the stems of its English name.
+
+    A query matches entities containing every one of its terms: either as a prefix
+    of a word, as a prefix of an English stem, or up to a single typo. Typos are
+    matched by looking up the words of the university's names within one edit of
+    every term (`Vocabulary`), which are then searched like the term itself.
+"""
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import (
+    Text,
+    bindparam,
+    case,
+    cast,
+    func,
+    literal,
+    null,
+    select,
+    text,
+    union_all,
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app import models
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.base_class import table_of
+from app.db.events import on_university_change
+from app.db.versions import get_data_version
+
+KINDS = ("course", "track", "faculty", "department")
+_models = {
+    "course": models.Course,
+    "track": models.Track,
+    "faculty": models.Faculty,
+    "department": models.Department,
+}
+
+# words as split by the default text search parser, which splits on underscores
+_WORD_RE = re.compile(r"[^\W_]+")
+# terms shorter than this are only matched as prefixes, as most short words are
+# within a single typo of each other
+MIN_FUZZY_LENGTH = 4
+
+
+def _deletions(word: str) -> Iterator[str]:
+    for i in range(len(word)):
+        end = i + 1
+        yield word[:i] + word[end:]
+
+
+class Vocabulary:
+    """ The words of the names of a university's entities, indexed by the words which
+        are obtained by deleting one of their letters. Two words are within a
+        single insertion, deletion, substitution or transposition of each other
+        if they're equal, or one of them is a deletion of the other, or they share
+        a deletion. """
+
+    def __init__(self, words: Iterable[str]):
+        # words are distinct, so a word is added to each of its deletions at most once
+        self._index: Dict[str, List[str]] = defaultdict(list)
+        for word in words:
+            self._index[word].append(word)
+            if len(word) >= MIN_FUZZY_LENGTH - 1:
+                for deletion in set(_deletions(word)):
+                    self._index[deletion].append(word)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def similar(self, term: str) -> Set[str]:
+        """ Returns the words within a single typo of a term """
+        similar = set(self._index.get(term, ()))
+        for deletion in _deletions(term):
+            similar.update(self._index.get(deletion, ()))
+        return similar
+
+
+def load_vocabulary(db: Session, university_id: int) -> Vocabulary:
+    """ Loads the distinct words of the stored `name_search` vectors, without ids and
+        other words containing digits, which are rarely mistyped """
+    statements = " UNION ALL ".join(
+        f"SELECT name_search FROM {table_of(model).name} "
+        f"WHERE university_id = {int(university_id)}"
+        for model in _models.values()
+    )
+    words = db.execute(
+        select(text("word"))
+        .select_from(func.ts_stat(statements))
+        .where(text("word !~ '[0-9]'"))
+    )
+    return Vocabulary(word for (word,) in words)
+
+
+vocabulary_cache: LRUCache[Vocabulary] = LRUCache(
+    "search_vocabulary", settings.SEARCH_VOCABULARY_CACHE_SIZE
+)
+
+
+def get_vocabulary(db: Session, university_id: int) -> Vocabulary:
+    """ Returns the vocabulary of a university, loading it on first use, or once the
+        university's data version changed """
+    vocabulary = vocabulary_cache.get_or_build(
+        (university_id,),
+        lambda: load_vocabulary(db, university_id),
+        get_data_version(db, university_id),
+    )
+    assert vocabulary is not None
+    return vocabulary
+
+
+@on_university_change(models.Course, models.Track, models.Faculty, models.Department)
+def _invalidate_vocabulary_cache(university_ids: Set[int]) -> None:
+    for university_id in university_ids:
+        vocabulary_cache.invalidate_university(university_id)
+
+
+def _lexeme(word: str) -> str:
+    return "'" + word.replace("'", "''") + "'"
+
+
+def search_terms(query: str) -> List[str]:
+    return _WORD_RE.findall(query.lower())
+
+
+@lru_cache(maxsize=None)
+def _search_statement(kinds: Tuple[str, ...]) -> Select:
+    """ The statement searching the given kinds of entities, which only depends on the
+        query through its parameters, so that it's built and compiled once """
+    english_prefixes = func.to_tsquery("english", bindparam("prefixes"))
+    exact_query = func.to_tsquery("simple", bindparam("exact"))
+    prefix_query = english_prefixes.op("||")(
+        func.to_tsquery("simple", bindparam("prefixes"))
+    )
+    # the fuzzy alternatives of every term already contain its simple prefix
+    ts_query = english_prefixes.op("||")(func.to_tsquery("simple", bindparam("fuzzy")))
+
+    selects = []
+    for kind in kinds:
+        table = table_of(_models[kind])
+        # the matches are materialized, so that they're always found through the GIN
+        # index rather than by scanning the table until enough are found. Only the
+        # first `SEARCH_MAX_CANDIDATES` of them are ranked, after ordering them by
+        # what they matched, which is cheaper than ranking them, so exact and id
+        # matches are always among them.
+        columns = [table.c.id, table.c.name_translations, table.c.name_search]
+        if kind == "department":
+            columns.append(table.c.faculty_id)
+        matches = (
+            select(*columns)
+            .where(
+                (table.c.university_id == bindparam("university_id"))
+                & table.c.name_search.op("@@")(ts_query)
+            )
+            .cte(f"{kind}_matches")
+            .prefix_with("MATERIALIZED")
+        )
+        tier = (
+            case((matches.c.name_search.op("@@")(exact_query), 2.0), else_=0.0)
+            + case((matches.c.name_search.op("@@")(prefix_query), 1.0), else_=0.0)
+            + case((func.lower(matches.c.id) == bindparam("id"), 4.0), else_=0.0)
+        ).label("tier")
+        candidates = (
+            select(matches, tier)
+            .order_by(tier.desc())
+            .limit(settings.SEARCH_MAX_CANDIDATES)
+            .subquery()
+        )
+        faculty_id = (
+            candidates.c.faculty_id if kind == "department" else cast(null(), Text)
+        )
+        rank = (
+            func.ts_rank(candidates.c.name_search, ts_query) + candidates.c.tier
+        ).label("rank")
+        selects.append(
+            select(
+                literal(kind).label("kind"),
+                candidates.c.id,
+                faculty_id.label("faculty_id"),
+                candidates.c.name_translations,
+                rank,
+            )
+            .order_by(rank.desc())
+            .limit(bindparam("limit"))
+        )
+    results = union_all(*selects).subquery()
+    return (
+        select(results)
+        .order_by(results.c.rank.desc(), results.c.id)
+        .limit(bindparam("limit"))
+    )
+
+
+def search_names(
+    db: Session,
+    university_id: int,
+    query: str,
+    kinds: Optional[Sequence[str]] = None,
+    limit: int = 20,
+) -> List[Dict[str, Any]]:
+    """ Returns the entities of a university whose names or ids match a query, best
+        matches first. Entities matching exactly rank above those matching by
+        prefix, which rank above those matching with typos. """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    vocabulary = get_vocabulary(db, university_id)
+
+    def alternatives(term: str) -> str:
+        similar = vocabulary.similar(term) if len(term) >= MIN_FUZZY_LENGTH else ()
+        # words starting with the term are already matched by its prefix
+        words = sorted(word for word in similar if not word.startswith(term))
+        return "(" + " | ".join([f"{_lexeme(term)}:*", *map(_lexeme, words)]) + ")"
+
+    rows = db.execute(
+        _search_statement(tuple(kinds or KINDS)),
+        {
+            "university_id": university_id,
+            "exact": " & ".join(_lexeme(term) for term in terms),
+            "prefixes": " & ".join(f"{_lexeme(term)}:*" for term in terms),
+            "fuzzy": " & ".join(alternatives(term) for term in terms),
+            "id": query.strip().lower(),
+            "limit": limit,
+        },
+    ).mappings()
+    return [dict(row, university_id=university_id) for row in rows]
@@ -0,0 +1,333 @@
+from typing import Any, Dict, List
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.config import settings
+from app.tests.utils.university import (
+    COURSE_NAMES,
+    create_random_term,
+    create_random_university,
+)
+from app.tests.utils.user import (
+    create_random_user,
+    superuser_authentication_headers,
+    token_authentication_headers,
+)
+from app.tests.utils.utils import count_queries, random_lower_string
+
+
+def test_course_required_by(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    track = uni.tracks[0]
+    base = f"{settings.API_V1_STR}/universities/{uni.id}/courses"
+
+    r = client.get(f"{base}/C_IML/required-by")
+    assert r.status_code == 200
+    result = r.json()
+    assert result["course_id"] == "C_IML"
+    [requirement] = result["required_by"]
+    assert requirement["track_id"] == track.id
+    # root -> Infi1 -> Infi2 -> IML
+    assert requirement["depth"] == 3
+
+    # the index is updated when the DAG changes
+    root = db.query(models.DAGRootNode).filter_by(university_id=uni.id).one()
+    iml = db.query(models.CourseSetNode).get(requirement["node_id"])
+    root.children.append(iml)
+    db.commit()
+    [requirement] = client.get(f"{base}/C_IML/required-by").json()["required_by"]
+    assert requirement["depth"] == 1
+
+    r = client.get(f"{base}/missing/required-by")
+    assert r.status_code == 404
+
+
+def test_read_courses_pages(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/courses/"
+    expected = sorted(f"C_{name.upper()}" for name in COURSE_NAMES)
+
+    course_ids: List[str] = []
+    params: Dict[str, Any] = {"limit": 4}
+    while True:
+        r = client.get(url, params=params)
+        assert r.status_code == 200
+        course_ids.extend(course["id"] for course in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params["cursor"] = cursor
+    assert course_ids == expected
+
+    # offset pages are ordered the same way
+    r = client.get(url, params={"skip": 4, "limit": 4})
+    assert [course["id"] for course in r.json()] == expected[4:8]
+    assert "X-Next-Cursor" in r.headers
+
+    assert client.get(url, params={"cursor": "invalid"}).status_code == 422
+    r = client.get(url, params={"cursor": params["cursor"], "skip": 1})
+    assert r.status_code == 422
+
+
+def test_autocomplete_courses(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/courses/autocomplete"
+
+    r = client.get(url, params={"q": "linalg"})
+    assert r.status_code == 200
+    assert r.json() == [
+        {
+            "id": f"C_LINALG{i}",
+            "university_id": uni.id,
+            "name_translations": {"en": f"LinAlg{i}"},
+        }
+        for i in (1, 2)
+    ]
+    assert [c["id"] for c in client.get(url, params={"q": "c_infi"}).json()] == [
+        "C_INFI1",
+        "C_INFI2",
+    ]
+
+    # the index is rebuilt once the university's courses change
+    db.add(
+        models.Course(
+            university=uni,
+            id="C_LINALG3",
+            name_translations={"en": "Linear Algebra 3"},
+            term=uni.courses[0].term,
+            course_credits=2,
+        )
+    )
+    db.commit()
+    r = client.get(url, params={"q": "lin", "limit": 2})
+    assert [c["id"] for c in r.json()] == ["C_LINALG1", "C_LINALG2"]
+    r = client.get(url, params={"q": "linear"})
+    assert [c["id"] for c in r.json()] == ["C_LINALG3"]
+
+
+def test_read_course_batch(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/courses:batch"
+    ids = ["C_IML", "C_MISSING", "C_INFI1", "C_IML", "C_LOGIC1"]
+
+    with count_queries(db) as statements:
+        r = client.get(url, params={"ids": ids})
+    assert r.status_code == 200
+    # the university's data version, and the courses
+    assert len(statements) == 2
+    batch = r.json()
+    assert [c["id"] for c in batch["courses"]] == ["C_IML", "C_INFI1", "C_LOGIC1"]
+    assert batch["courses"][0]["term"]["name_translations"] == {"en": "Semester 1"}
+    assert batch["missing_ids"] == ["C_MISSING"]
+
+    r = client.post(url, json={"ids": ids})
+    assert r.status_code == 200
+    assert r.json() == batch
+
+    r = client.post(url, json={"ids": []})
+    assert r.json() == {"university_id": uni.id, "courses": [], "missing_ids": []}
+
+    too_many = [str(i) for i in range(settings.COURSE_BATCH_MAX_IDS + 1)]
+    assert client.post(url, json={"ids": too_many}).status_code == 422
+
+
+def test_read_course_facets(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    track = uni.tracks[0]
+    courses = {
+        course.id: course
+        for course in db.query(models.Course).filter_by(university_id=uni.id)
+    }
+    courses["C_IML"].course_credits = courses["C_PROBABILITY"].course_credits = 2
+    term = courses["C_IML"].term
+    other_term = create_random_term(db)
+    db.add(
+        models.Course(
+            university=uni,
+            id="C_ELECTIVE",
+            term=other_term,
+            course_credits=6,
+            name_translations={},
+        )
+    )
+    # a second track, of no department, requiring Infi1 -> Infi2 -> IML
+    root = db.query(models.DAGRootNode).filter_by(university_id=uni.id).one()
+    other = models.Track(
+        university=uni, id=random_lower_string(), degree=models.DegreeType.Masters
+    )
+    other_root = models.DAGRootNode(university=uni, track=other)
+    [infi1] = [
+        node
+        for node in root.children
+        if isinstance(node, models.CourseSetNode)
+        and node.course_set.singleton_course_id == "C_INFI1"
+    ]
+    other_root.children.append(infi1)
+    db.add(other_root)
+    db.commit()
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/courses"
+
+    r = client.get(f"{url}/facets")
+    assert r.status_code == 200
+    facets = r.json()
+    assert facets["total"] == 10 and len(facets["courses"]) == 10
+    assert facets["terms"] == [
+        {"term_id": term.id, "count": 9},
+        {"term_id": other_term.id, "count": 1},
+    ]
+    assert facets["credits"] == [
+        {"course_credits": 4, "count": 7},
+        {"course_credits": 2, "count": 2},
+        {"course_credits": 6, "count": 1},
+    ]
+    assert facets["faculties"] == [{"faculty_id": "facCSE", "count": 9}]
+    assert facets["departments"] == [
+        {"faculty_id": "facCSE", "department_id": "521", "count": 9}
+    ]
+    assert facets["tracks"] == [
+        {"track_id": track.id, "count": 9},
+        {"track_id": other.id, "count": 3},
+    ]
+
+    # the counts of a facet's values apply all other filters, and are counted over
+    # the catalog cached by the previous request, so only the data version and the
+    # page are queried
+    params = {"track_id": other.id, "max_credits": 3}
+    with count_queries(db) as statements:
+        r = client.get(f"{url}/facets", params=params)
+    assert len(statements) == 2
+    facets = r.json()
+    assert facets["total"] == 1
+    assert [course["id"] for course in facets["courses"]] == ["C_IML"]
+    assert facets["terms"] == [{"term_id": term.id, "count": 1}]
+    assert facets["credits"] == [
+        {"course_credits": 4, "count": 2},
+        {"course_credits": 2, "count": 1},
+    ]
+    assert facets["faculties"] == facets["departments"] == []
+    assert facets["tracks"] == [
+        {"track_id": track.id, "count": 2},
+        {"track_id": other.id, "count": 1},
+    ]
+
+    # the catalog is reloaded once the university changes
+    courses["C_INFI2"].course_credits = 3
+    db.commit()
+    facets = client.get(f"{url}/facets", params=params).json()
+    assert facets["total"] == 2
+    assert {"course_credits": 3, "count": 1} in facets["credits"]
+
+    r = client.get(url, params={"department_id": "521", "min_credits": 3})
+    assert sorted(course["id"] for course in r.json()) == sorted(
+        f"C_{name.upper()}"
+        for name in COURSE_NAMES
+        if name not in ("IML", "Probability")
+    )
+    r = client.get(url, params={"term_id": [other_term.id, -1]})
+    assert [course["id"] for course in r.json()] == ["C_ELECTIVE"]
+
+
+def test_read_courses_fields(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/courses"
+
+    with count_queries(db) as statements:
+        r = client.get(url, params={"fields": "id,name_translations", "limit": 2})
+    assert r.status_code == 200
+    assert r.json() == [
+        {"id": "C_IML", "name_translations": {"en": "IML"}},
+        {"id": "C_INFI1", "name_translations": {"en": "Infi1"}},
+    ]
+    # other columns aren't loaded
+    [_, statement] = statements
+    assert "extra_data" not in statement and "course_credits" not in statement
+    # nor is the term, which is otherwise joined
+    assert "term_1" not in statement
+    assert "X-Next-Cursor" in r.headers
+
+    r = client.get(f"{url}/C_IML", params={"fields": "term, id"})
+    assert r.json() == {
+        "term": client.get(f"{url}/C_IML").json()["term"],
+        "id": "C_IML",
+    }
+
+    assert client.get(url, params={"fields": "id,secret"}).status_code == 422
+
+
+def test_upsert_courses(client: TestClient, db: Session, monkeypatch: Any) -> None:
+    uni = create_random_university(db)
+    term_id = uni.courses[0].term_id
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/courses"
+    monkeypatch.setattr(settings, "COURSE_BULK_BATCH_SIZE", 2)
+    assert client.get(f"{url}/C_IML").json()["course_credits"] == 4
+    version = client.get(f"{url}/C_IML").headers["ETag"]
+
+    def course(id: str, name: str, credits: int = 4) -> Dict[str, Any]:
+        return {
+            "id": id,
+            "term_id": term_id,
+            "course_credits": credits,
+            "name_translations": {"en": name},
+        }
+
+    courses = [
+        course("C_IML", "IML", credits=6),
+        course("C_INFI1", "Infi1"),
+        course("C_ALGO", "Algorithms"),
+    ]
+    # only superusers may write courses
+    assert client.put(f"{url}:bulk", json={"courses": courses}).status_code == 401
+    user_headers = token_authentication_headers(create_random_user(db))
+    r = client.put(f"{url}:bulk", headers=user_headers, json={"courses": courses})
+    assert r.status_code == 400
+    headers = superuser_authentication_headers(db)
+    r = client.put(f"{url}:bulk", headers=headers, json={"courses": courses})
+    assert r.status_code == 200
+    assert r.json() == {
+        "university_id": uni.id,
+        "batches": [
+            {"inserted": 0, "updated": 1, "unchanged": 1},
+            {"inserted": 1, "updated": 0, "unchanged": 0},
+        ],
+    }
+    # cached responses are invalidated
+    r = client.get(f"{url}/C_IML")
+    assert r.json()["course_credits"] == 6 and r.headers["ETag"] != version
+    assert client.get(f"{url}/C_ALGO").json()["name_translations"] == {
+        "en": "Algorithms"
+    }
+
+    # writing the same courses again changes nothing
+    version = client.get(f"{url}/C_IML").headers["ETag"]
+    with count_queries(db) as statements:
+        r = client.put(f"{url}:bulk", headers=headers, json={"courses": courses})
+    assert [batch["unchanged"] for batch in r.json()["batches"]] == [2, 1]
+    assert not any(statement.startswith("UPDATE") for statement in statements)
+    assert client.get(f"{url}/C_IML").headers["ETag"] == version
+
+    duplicates = [course("C_X", "X"), course("C_X", "Y")]
+    assert (
+        client.put(
+            f"{url}:bulk", headers=headers, json={"courses": duplicates}
+        ).status_code
+        == 422
+    )
+    # nothing is written when a later batch fails
+    missing_term = [course("C_X", "X"), course("C_Y", "Y"), course("C_Z", "Z")]
+    missing_term[2]["term_id"] = -1
+    assert (
+        client.put(
+            f"{url}:bulk", headers=headers, json={"courses": missing_term}
+        ).status_code
+        == 422
+    )
+    assert client.get(f"{url}/C_Y").status_code == 404
+    missing_university = f"{settings.API_V1_STR}/universities/0/courses:bulk"
+    assert (
+        client.put(
+            missing_university, headers=headers, json={"courses": []}
+        ).status_code
+        == 404
+    )
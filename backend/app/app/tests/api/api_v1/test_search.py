@@ -0,0 +1,19 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.tests.utils.university import create_random_university
+
+
+def test_search(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/search/"
+
+    r = client.get(url, params={"q": "linalg", "kinds": ["course"]})
+    assert r.status_code == 200
+    results = r.json()
+    assert [result["id"] for result in results] == ["C_LINALG1", "C_LINALG2"]
+    assert results[0]["name_translations"] == {"en": "LinAlg1"}
+
+    r = client.get(url, params={"q": "linalg", "kinds": ["teacher"]})
+    assert r.status_code == 422
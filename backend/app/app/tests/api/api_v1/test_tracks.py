@@ -0,0 +1,270 @@
+from collections import Counter
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import models
+from app.api.caching import response_cache
+from app.core.config import settings
+from app.dag import dag_cache
+from app.tests.utils.university import create_random_university, increment_data_version
+from app.tests.utils.utils import count_queries, random_lower_string
+
+
+def test_get_track_dag(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    track = uni.tracks[0]
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/tracks/{track.id}/dag"
+
+    r = client.get(url)
+    assert r.status_code == 200
+    rows = r.json()
+    assert rows[0]["node_type"] == "DAGRootNode"
+    assert rows[0]["distance"] == 0
+    # IML is reached via Infi2 and LinAlg2 at distance 3, and via Probability at 4
+    iml = (
+        db.query(models.CourseSetMembership)
+        .filter_by(university_id=uni.id, course_id="C_IML")
+        .one()
+        .set.nodes[0]
+    )
+    distances = Counter(
+        row["distance"] for row in rows if row["node_id"] == iml.node_id
+    )
+    assert distances == {3: 2, 4: 1}
+
+    # the compiled DAG is reused once the serialized response is evicted
+    response_cache.clear()
+    hits = dag_cache.hits
+    assert client.get(url).json() == rows
+    assert dag_cache.hits == hits + 1
+
+    # rows are paged, and only expanded up to a bounded depth
+    assert client.get(f"{url}?skip=3&limit=5").json() == rows[3:8]
+    assert client.get(f"{url}?max_depth=1").json() == [
+        row for row in rows if row["distance"] <= 2
+    ]
+    r = client.get(f"{url}?max_depth={settings.TRACK_DAG_MAX_DEPTH + 1}")
+    assert r.status_code == 422
+
+
+def test_get_track_dag_invalidated_on_write(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    track = uni.tracks[0]
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/tracks/{track.id}/dag"
+    rows = client.get(url).json()
+
+    root = (
+        db.query(models.DAGRootNode)
+        .filter_by(university_id=uni.id, track_id=track.id)
+        .one()
+    )
+    or_node = models.ORNode()
+    or_node.university = uni
+    root.children.append(or_node)
+    db.commit()
+
+    new_rows = client.get(url).json()
+    assert len(new_rows) == len(rows) + 1
+    assert any(
+        row["node_id"] == or_node.node_id and row["parent_id"] == root.node_id
+        for row in new_rows
+    )
+
+
+def test_get_track_dag_rebuilt_on_version_change(
+    client: TestClient, db: Session
+) -> None:
+    uni = create_random_university(db)
+    db.commit()
+    track = uni.tracks[0]
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/tracks/{track.id}/dag"
+    rows = client.get(url).json()
+
+    root = (
+        db.query(models.DAGRootNode)
+        .filter_by(university_id=uni.id, track_id=track.id)
+        .one()
+    )
+    edges = models.dag_edge_assoc
+    db.execute(edges.delete().where(edges.c.from_node_id == root.node_id))
+    increment_data_version(db, uni.id)
+    db.commit()
+    response_cache.clear()
+    hits = dag_cache.hits
+    new_rows = client.get(url).json()
+    assert dag_cache.hits == hits
+    assert len(rows) > 1 and [row["node_id"] for row in new_rows] == [root.node_id]
+
+
+def test_get_track_dag_not_found(client: TestClient) -> None:
+    r = client.get(f"{settings.API_V1_STR}/universities/-1/tracks/missing/dag")
+    assert r.status_code == 404
+
+
+def test_audit_track(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    track = uni.tracks[0]
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/tracks/{track.id}/audit"
+
+    r = client.post(url, json={"completed_courses": []})
+    assert r.status_code == 200
+    result = r.json()
+    assert not result["satisfied"]
+    assert result["missing_credits"] > 0
+    assert result["track_id"] == track.id
+
+    r = client.post(
+        f"{settings.API_V1_STR}/universities/{uni.id}/tracks/missing/audit",
+        json={"completed_courses": []},
+    )
+    assert r.status_code == 404
+
+
+def test_bulk_audit_track(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    track = uni.tracks[0]
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/tracks/{track.id}/audit/bulk"
+    students = [{"completed_courses": []}, {"completed_courses": ["C_INFI1"]}]
+
+    r = client.post(url, json={"students": students})
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert len(results) == 2
+    assert not results[0]["satisfied"]
+    assert results[0]["earned_credits"] == 0
+    assert results[1]["earned_credits"] == 4
+    assert results[1]["missing_credits"] < results[0]["missing_credits"]
+
+    students = [{"completed_courses": []}] * (settings.BULK_AUDIT_MAX_STUDENTS + 1)
+    assert client.post(url, json={"students": students}).status_code == 422
+
+
+def test_get_track_graph(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    track = uni.tracks[0]
+    base = f"{settings.API_V1_STR}/universities/{uni.id}/tracks/{track.id}"
+    rows = client.get(f"{base}/dag").json()
+
+    r = client.get(f"{base}/graph")
+    assert r.status_code == 200
+    graph = r.json()
+    assert graph["track_id"] == track.id
+    assert set(graph["nodes"]) == {str(row["node_id"]) for row in rows}
+    assert len(graph["nodes"]) == 11
+    root = graph["nodes"][str(graph["root_id"])]
+    assert root["node_type"] == "DAGRootNode" and root["track_id"] == track.id
+    assert all(
+        (node["course_set_id"] is not None) == (node["node_type"] == "CourseSetNode")
+        for node in graph["nodes"].values()
+    )
+    edges = {tuple(edge) for edge in graph["edges"]}
+    assert len(edges) == len(graph["edges"]) == 13
+    assert edges == {(row["parent_id"], row["node_id"]) for row in rows[1:]}
+
+
+def test_track_frontier(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    track = uni.tracks[0]
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/tracks/{track.id}/frontier"
+
+    r = client.post(url, json={"completed_courses": ["C_INTRO2CS"]})
+    assert r.status_code == 200
+    frontier = r.json()
+    assert "C_LOGICCS" in frontier["course_ids"]
+    assert "C_INTRO2CS" not in frontier["course_ids"]
+
+    r = client.post(
+        url, json={"completed_courses": ["C_INTRO2CS"], "added_courses": ["C_INFI1"]}
+    )
+    assert r.status_code == 200
+    assert "C_INFI2" in r.json()["course_ids"]
+
+    r = client.post(
+        f"{settings.API_V1_STR}/universities/{uni.id}/tracks/missing/frontier",
+        json={"completed_courses": []},
+    )
+    assert r.status_code == 404
+
+
+def test_plan_track(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    track = uni.tracks[0]
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/tracks/{track.id}/plan"
+
+    r = client.post(
+        f"{url}?time_budget_ms=5000",
+        json={"completed_courses": ["C_INFI1"], "objective": "terms"},
+    )
+    assert r.status_code == 200
+    plan = r.json()
+    assert plan["optimal"]
+    assert plan["total_credits"] == 28
+    assert "C_INFI1" not in plan["course_ids"]
+    assert sum(len(term) for term in plan["terms"]) == len(plan["course_ids"])
+
+    r = client.post(
+        f"{settings.API_V1_STR}/universities/{uni.id}/tracks/missing/plan", json={}
+    )
+    assert r.status_code == 404
+
+
+def test_diff_track(client: TestClient, db: Session) -> None:
+    track_id = random_lower_string()
+    uni = create_random_university(db, track_id)
+    other = create_random_university(db, track_id)
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/tracks/{track_id}/diff"
+
+    r = client.get(f"{url}/{other.id}")
+    assert r.status_code == 200
+    assert r.json()["changes"] == []
+
+    root = db.query(models.DAGRootNode).filter_by(university_id=other.id).one()
+    root.children.append(models.ORNode(university=other))
+    db.commit()
+    [change] = client.get(f"{url}/{other.id}").json()["changes"]
+    assert change["change"] == "added"
+    assert change["node_type"] == "ORNode"
+
+    r = client.get(f"{url}/{other.id + 1000}")
+    assert r.status_code == 404
+
+
+def test_get_track_dags(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    track, department = uni.tracks[0], uni.tracks[0].departments[0]
+    root = db.query(models.DAGRootNode).filter_by(university_id=uni.id).one()
+    # a second track of the department, sharing a subgraph with the first
+    other = models.Track(
+        university=uni,
+        id=random_lower_string(),
+        degree=models.DegreeType.Masters,
+        departments=[department],
+    )
+    other_root = models.DAGRootNode(university=uni, track=other)
+    other_root.children.append(root.children[0])
+    db.add(other_root)
+    db.commit()
+    roots = {track.id: root.node_id, other.id: other_root.node_id}
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/tracks"
+    graph = client.get(f"{url}/{track.id}/graph").json()
+
+    with count_queries(db) as statements:
+        r = client.get(f"{url}/dags", params={"track_ids": [*roots, "missing"]})
+    assert r.status_code == 200
+    # the university's data version, and the roots
+    assert len(statements) == 2
+    graphs = r.json()
+    assert graphs["roots"] == roots
+    # shared nodes appear once
+    assert len(graphs["nodes"]) == len(graph["nodes"]) + 1
+    assert len(graphs["edges"]) == len(graph["edges"]) + 1
+
+    r = client.get(
+        f"{url}/dags",
+        params={"faculty_id": department.faculty_id, "department_id": department.id},
+    )
+    assert r.json() == graphs
+
+    r = client.get(f"{url}/dags")
+    assert r.status_code == 422
@@ -0,0 +1,211 @@
+import json
+from typing import Callable, List
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import models
+from app.clone_university import clone_university
+from app.core.config import settings
+from app.crud.base import encode_cursor
+from app.db.base_class import table_of
+from app.tests.utils.university import create_random_term, create_random_university
+from app.tests.utils.utils import count_queries, random_lower_string
+
+
+def grow_university(db: Session, uni: models.University) -> None:
+    """ Adds faculties with departments, courses of new terms and tracks to a
+        university, and another university after it """
+    for i in range(3):
+        faculty = models.Faculty(university=uni, id=f"fac{i}", name_translations={})
+        for j in range(2):
+            models.Department(faculty=faculty, id=f"dep{i}.{j}", name_translations={})
+        term = create_random_term(db)
+        for j in range(2):
+            models.Course(
+                university=uni,
+                id=f"C_NEW{i}.{j}",
+                name_translations={},
+                term=term,
+                course_credits=2,
+            )
+        models.Track(
+            university=uni,
+            id=random_lower_string(),
+            degree=models.DegreeType.Masters,
+            name_translations={},
+        )
+    create_random_university(db)
+    db.commit()
+
+
+# Paths of endpoints, by the university and one of its tracks, whose number of
+# queries mustn't depend on the number of returned rows and of their nested rows
+ENDPOINTS: List[Callable[[models.University, str], str]] = [
+    lambda uni, _: f"/universities/?cursor={encode_cursor([uni.id - 1])}",
+    lambda uni, _: f"/universities/?cursor={encode_cursor([uni.id - 1])}"
+    "&fields=id,faculties",
+    lambda uni, _: f"/universities/{uni.id}",
+    lambda uni, _: f"/universities/{uni.id}/courses/",
+    lambda uni, _: f"/universities/{uni.id}/courses/?fields=id,term",
+    lambda uni, _: f"/universities/{uni.id}/courses/facets",
+    lambda uni, _: f"/universities/{uni.id}/courses/C_INFI1",
+    lambda uni, _: f"/universities/{uni.id}/tracks/",
+    lambda uni, track_id: f"/universities/{uni.id}/tracks/{track_id}",
+]
+
+
+@pytest.mark.parametrize("endpoint", ENDPOINTS)
+def test_query_count_independent_of_size(
+    client: TestClient, db: Session, endpoint: Callable[[models.University, str], str]
+) -> None:
+    uni = create_random_university(db)
+    db.commit()
+    path = settings.API_V1_STR + endpoint(uni, uni.tracks[0].id)
+
+    with count_queries(db) as before:
+        r = client.get(path)
+    assert r.status_code == 200
+
+    grow_university(db, uni)
+    with count_queries(db) as after:
+        r = client.get(path)
+    assert r.status_code == 200
+    assert len(after) == len(before), after
+
+
+def test_read_university(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    db.commit()
+
+    r = client.get(f"{settings.API_V1_STR}/universities/{uni.id}")
+    assert r.status_code == 200
+    [faculty] = r.json()["faculties"]
+    assert faculty["id"] == "facCSE"
+    assert [d["id"] for d in faculty["departments"]] == ["521"]
+
+    r = client.get(f"{settings.API_V1_STR}/universities/{uni.id}?fields=id")
+    assert r.json() == {"id": uni.id}
+
+    r = client.get(f"{settings.API_V1_STR}/universities/{uni.id + 10 ** 6}")
+    assert r.status_code == 404
+
+
+def test_cached_responses(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    db.commit()
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/courses/C_INFI1"
+
+    r = client.get(url)
+    assert r.status_code == 200
+    etag = r.headers["ETag"]
+    # served from memory, with a 304 if the client has it already, only reading the
+    # university's data version
+    with count_queries(db) as statements:
+        assert client.get(url).content == r.content
+        r = client.get(url, headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert len(statements) == 2 and all("data_version" in s for s in statements)
+    assert r.status_code == 304 and r.headers["ETag"] == etag
+
+    version = uni.data_version
+    course = db.query(models.Course).filter_by(university_id=uni.id, id="C_INFI1").one()
+    course.name_translations = {"en": "Calculus 1"}
+    db.commit()
+    assert uni.data_version == version + 1
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["name_translations"] == {"en": "Calculus 1"}
+    assert r.headers["ETag"] != etag
+
+    # writes of other processes, which don't invalidate this process' caches, are
+    # seen by their data version
+    etag = r.headers["ETag"]
+    courses, universities = table_of(models.Course), table_of(models.University)
+    db.execute(
+        courses.update()
+        .where((courses.c.university_id == uni.id) & (courses.c.id == "C_INFI1"))
+        .values(name_translations={"en": "Calculus 2"})
+    )
+    db.execute(
+        universities.update()
+        .where(universities.c.id == uni.id)
+        .values(data_version=universities.c.data_version + 1)
+    )
+    db.commit()
+    r = client.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.json()["name_translations"] == {"en": "Calculus 2"}
+
+    # the list of universities changes with any university
+    list_url = f"{settings.API_V1_STR}/universities/?cursor={encode_cursor([uni.id])}"
+    etag = client.get(list_url).headers["ETag"]
+    assert client.get(list_url, headers={"If-None-Match": etag}).status_code == 304
+    create_random_university(db)
+    db.commit()
+    r = client.get(list_url, headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.headers["ETag"] != etag
+
+
+def test_diff_universities(client: TestClient, db: Session) -> None:
+    uni = create_random_university(db)
+    db.commit()
+    other = db.query(models.University).get(clone_university(db, uni.id))
+    db.commit()
+    url = f"{settings.API_V1_STR}/universities/{uni.id}/diff/{other.id}"
+    r = client.get(url)
+    assert r.status_code == 200
+    assert r.text == ""
+
+    courses = {c.id: c for c in other.courses}
+    courses["C_IML"].course_credits = 6
+    other.tracks[0].name_translations = {"en": "CS"}
+    courses["C_LOGIC1"].singleton_set.max_credits = 10
+    models.Course(
+        university=other,
+        id="C_NEW",
+        name_translations={},
+        term=courses["C_IML"].term,
+        course_credits=2,
+    )
+    db.commit()
+    r = client.get(url)
+    assert r.headers["content-type"] == "application/x-ndjson"
+    changes = [json.loads(line) for line in r.text.splitlines()]
+    assert changes == [
+        {
+            "entity": "track",
+            "key": {"id": other.tracks[0].id},
+            "change": "changed",
+            "old": {"name_translations": {"en": "Computer Science"}},
+            "new": {"name_translations": {"en": "CS"}},
+        },
+        {
+            "entity": "course",
+            "key": {"id": "C_IML"},
+            "change": "changed",
+            "old": {"course_credits": 4},
+            "new": {"course_credits": 6},
+        },
+        {
+            "entity": "course",
+            "key": {"id": "C_NEW"},
+            "change": "added",
+            "new": {
+                "name_translations": {},
+                "term_id": courses["C_IML"].term_id,
+                "course_credits": 2,
+                "extra_data": {},
+            },
+        },
+        {
+            "entity": "course_set",
+            "key": {"course_ids": ["C_LOGIC1"], "ordinal": 1},
+            "change": "changed",
+            "old": {"max_credits": None},
+            "new": {"max_credits": 10},
+        },
+    ]
+
+    r = client.get(f"{settings.API_V1_STR}/universities/{uni.id}/diff/{other.id + 1}")
+    assert r.status_code == 404
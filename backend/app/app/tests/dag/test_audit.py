@@ -0,0 +1,79 @@
+import random
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.dag import bulk_audit, get_track_requirements
+from app.db.base_class import table_of
+from app.tests.utils.university import (
+    COURSE_NAMES,
+    create_random_university,
+    increment_data_version,
+)
+
+ALL_COURSES = [f"C_{name.upper()}" for name in COURSE_NAMES]
+
+
+def test_audit(db: Session) -> None:
+    uni = create_random_university(db)
+    requirements = get_track_requirements(db, uni.id, uni.tracks[0].id)
+    assert requirements is not None
+
+    result = requirements.audit_courses(ALL_COURSES)
+    assert result["satisfied"]
+    assert result["missing_credits"] == 0
+    assert all(node["satisfied"] for node in result["nodes"])
+
+    # Logic1 and LogicCS are alternatives
+    result = requirements.audit_courses(c for c in ALL_COURSES if c != "C_LOGIC1")
+    assert result["satisfied"]
+
+    # but LogicCS also follows Intro2CS
+    result = requirements.audit_courses(c for c in ALL_COURSES if c != "C_LOGICCS")
+    assert not result["satisfied"]
+    assert result["missing_credits"] == 4
+
+    result = requirements.audit_courses(["C_INFI1", "NOT_A_COURSE"])
+    assert not result["satisfied"]
+    assert result["unknown_courses"] == ["NOT_A_COURSE"]
+    infi1 = next(n for n in result["nodes"] if n["earned_credits"])
+    assert infi1["earned_credits"] == 4
+    assert not infi1["satisfied"]
+
+
+def test_requirements_rebuilt_on_version_change(db: Session) -> None:
+    uni = create_random_university(db)
+    db.commit()
+    track_id = uni.tracks[0].id
+    requirements = get_track_requirements(db, uni.id, track_id)
+    assert get_track_requirements(db, uni.id, track_id) is requirements
+
+    courses = table_of(models.Course)
+    db.execute(
+        courses.update()
+        .where((courses.c.university_id == uni.id) & (courses.c.id == "C_INFI1"))
+        .values(course_credits=6)
+    )
+    increment_data_version(db, uni.id)
+    db.commit()
+    requirements = get_track_requirements(db, uni.id, track_id)
+    assert requirements is not None
+    result = requirements.audit_courses(["C_INFI1"])
+    assert max(node["earned_credits"] for node in result["nodes"]) == 6
+
+
+def test_bulk_audit_matches_audit(db: Session) -> None:
+    uni = create_random_university(db)
+    requirements = get_track_requirements(db, uni.id, uni.tracks[0].id)
+    assert requirements is not None
+
+    rng = random.Random(0)
+    students = [[c for c in ALL_COURSES if rng.random() < 0.7] for _ in range(200)]
+    students += [ALL_COURSES, [], ["NOT_A_COURSE"]]
+    result = bulk_audit(requirements, students)
+    for i, completed in enumerate(students):
+        root = requirements.audit(requirements.encode(completed))[0]
+        assert result.satisfied[i] == root.satisfied
+        assert result.missing_credits[i] == root.missing_credits
+    assert result.earned_credits[-3] == 4 * len(ALL_COURSES)
+    assert result.earned_credits[-1] == 0
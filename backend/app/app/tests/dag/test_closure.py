@@ -0,0 +1,96 @@
+from collections import deque
+from typing import Dict, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.dag import is_ancestor, rebuild_closure
+from app.db.base_class import table_of
+from app.tests.utils.university import create_random_university
+
+dag_edge = models.dag_edge_assoc
+dag_closure = models.dag_closure
+dagnode = table_of(models.DAGNode)
+
+
+def expected_closure(db: Session, university_id: int) -> Dict[Tuple[int, int], int]:
+    edges = db.execute(
+        select(dag_edge.c.from_node_id, dag_edge.c.to_node_id)
+        .join(dagnode, dagnode.c.node_id == dag_edge.c.from_node_id)
+        .where(dagnode.c.university_id == university_id)
+    ).all()
+    children: Dict[int, list] = {}
+    for from_id, to_id in edges:
+        children.setdefault(from_id, []).append(to_id)
+    closure = {}
+    for source in children:
+        queue = deque([(source, 0)])
+        seen = {source}
+        while queue:
+            node, depth = queue.popleft()
+            for child in children.get(node, []):
+                if child not in seen:
+                    seen.add(child)
+                    closure[(source, child)] = depth + 1
+                    queue.append((child, depth + 1))
+    return closure
+
+
+def stored_closure(db: Session, university_id: int) -> Dict[Tuple[int, int], int]:
+    rows = db.execute(
+        select(dag_closure)
+        .join(dagnode, dagnode.c.node_id == dag_closure.c.ancestor_id)
+        .where(dagnode.c.university_id == university_id)
+    ).all()
+    return {(a, d): depth for a, d, depth in rows}
+
+
+def course_node(db: Session, university_id: int, course_id: str) -> models.DAGNode:
+    membership = (
+        db.query(models.CourseSetMembership)
+        .filter_by(university_id=university_id, course_id=course_id)
+        .one()
+    )
+    return membership.set.nodes[0]
+
+
+def test_closure_maintained_on_insert(db: Session) -> None:
+    uni = create_random_university(db)
+    closure = stored_closure(db, uni.id)
+    assert closure == expected_closure(db, uni.id)
+
+    lin2 = course_node(db, uni.id, "C_LINALG2")
+    iml = course_node(db, uni.id, "C_IML")
+    intro = course_node(db, uni.id, "C_INTRO2CS")
+    assert is_ancestor(db, lin2.node_id, iml.node_id)
+    assert not is_ancestor(db, iml.node_id, lin2.node_id)
+    assert not is_ancestor(db, intro.node_id, iml.node_id)
+    assert closure[(lin2.node_id, iml.node_id)] == 1
+
+
+def test_closure_maintained_on_delete(db: Session) -> None:
+    uni = create_random_university(db)
+    lin2 = course_node(db, uni.id, "C_LINALG2")
+    iml = course_node(db, uni.id, "C_IML")
+    prob = course_node(db, uni.id, "C_PROBABILITY")
+
+    lin2.children.remove(iml)
+    db.commit()
+    closure = stored_closure(db, uni.id)
+    assert closure == expected_closure(db, uni.id)
+    assert closure[(lin2.node_id, iml.node_id)] == 2
+
+    db.delete(prob)
+    db.commit()
+    closure = stored_closure(db, uni.id)
+    assert closure == expected_closure(db, uni.id)
+    assert (lin2.node_id, iml.node_id) not in closure
+
+
+def test_rebuild_closure(db: Session) -> None:
+    uni = create_random_university(db)
+    incremental = stored_closure(db, uni.id)
+    rebuild_closure(db.connection(), uni.id)
+    db.commit()
+    assert stored_closure(db, uni.id) == incremental
@@ -0,0 +1,33 @@
+from typing import Any, Dict, List, Tuple
+
+from app.dag import CompiledDAG
+
+
+def test_descendant_rows_paged() -> None:
+    # a chain of diamonds, with 2 ** 40 paths from the root to the last node
+    nodes: List[Dict[str, Any]] = [
+        {"node_id": 0, "node_type": "DAGRootNode", "course_set_id": None}
+    ]
+    edges: List[Tuple[int, int]] = []
+    for i in range(40):
+        join = 3 * i
+        for node_id in (join + 1, join + 2, join + 3):
+            nodes.append({"node_id": node_id, "node_type": "ORNode"})
+        edges += [(join, join + 1), (join, join + 2)]
+        edges += [(join + 1, join + 3), (join + 2, join + 3)]
+    for node in nodes:
+        node.setdefault("course_set_id", None)
+        node.setdefault("extra_data", {})
+    dag = CompiledDAG(1, "track", nodes, edges)
+
+    rows = dag.descendant_rows(max_depth=3)
+    distances = [row["distance"] for row in rows]
+    assert distances == [0, 1, 1, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4]
+    assert dag.descendant_rows(max_depth=3, skip=2, limit=4) == rows[2:6]
+    assert dag.descendant_rows(max_depth=3, skip=11, limit=4) == rows[11:]
+
+    # the k-th diamond has 4 * 2 ** k rows
+    count = 1 + 4 * (2 ** 40 - 1)
+    last = dag.descendant_rows(max_depth=80, skip=count - 2, limit=10)
+    assert [(row["node_id"], row["parent_id"]) for row in last] == [(120, 119)] * 2
+    assert dag.descendant_rows(max_depth=80, skip=count) == []
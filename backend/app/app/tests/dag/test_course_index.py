@@ -0,0 +1,58 @@
+from typing import List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.dag import rebuild_course_index
+from app.tests.utils.university import create_random_university
+
+course_index = models.course_requirement_index
+
+
+def stored_index(db: Session, university_id: int) -> List[Tuple]:
+    return sorted(
+        tuple(row)
+        for row in db.execute(
+            select(course_index).where(course_index.c.university_id == university_id)
+        )
+    )
+
+
+def course_node(
+    db: Session, university_id: int, course_id: str
+) -> models.CourseSetNode:
+    membership = (
+        db.query(models.CourseSetMembership)
+        .filter_by(university_id=university_id, course_id=course_id)
+        .one()
+    )
+    return membership.set.nodes[0]
+
+
+def test_index_updated_where_written(db: Session) -> None:
+    uni = create_random_university(db)
+    before = stored_index(db, uni.id)
+    root = db.query(models.DAGRootNode).filter_by(university_id=uni.id).one()
+    infi1 = course_node(db, uni.id, "C_INFI1")
+    linalg2 = course_node(db, uni.id, "C_LINALG2")
+    probability = course_node(db, uni.id, "C_PROBABILITY")
+
+    # Probability is no longer reached via LinAlg2 and requires no course, IML is
+    # deleted, Infi1 is detached from the root and LinAlg2 is attached to it
+    linalg2.children.remove(probability)
+    db.delete(course_node(db, uni.id, "C_IML"))
+    db.delete(
+        db.query(models.CourseSetMembership)
+        .filter_by(university_id=uni.id, set_id=probability.course_set_id)
+        .one()
+    )
+    root.children.remove(infi1)
+    root.children.append(linalg2)
+    db.commit()
+
+    after = stored_index(db, uni.id)
+    assert after != before
+    assert not any(row[1] == "C_IML" for row in after)
+    rebuild_course_index(db.connection(), uni.id)
+    assert stored_index(db, uni.id) == after
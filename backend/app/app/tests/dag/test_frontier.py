@@ -0,0 +1,128 @@
+import random
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.dag import (
+    CompiledDAG,
+    Frontier,
+    TrackRequirements,
+    get_frontier,
+    get_track_requirements,
+)
+from app.dag.audit import SetBounds
+from app.tests.dag.test_audit import ALL_COURSES
+from app.tests.utils.university import create_random_university, increment_data_version
+
+
+def test_frontier(db: Session) -> None:
+    uni = create_random_university(db)
+    requirements = get_track_requirements(db, uni.id, uni.tracks[0].id)
+    assert requirements is not None
+
+    frontier = Frontier(requirements)
+    assert set(frontier.courses()["course_ids"]) == {
+        "C_INFI1",
+        "C_LINALG1",
+        "C_INTRO2CS",
+        "C_LOGIC1",
+    }
+
+    # LogicCS follows Intro2CS, and is an alternative to Logic1
+    frontier.complete(["C_INTRO2CS"])
+    assert set(frontier.courses()["course_ids"]) == {
+        "C_INFI1",
+        "C_LINALG1",
+        "C_LOGIC1",
+        "C_LOGICCS",
+    }
+
+    # IML follows Infi2, LinAlg2 and Probability
+    frontier.complete(["C_INFI1", "C_INFI2", "C_LINALG1", "C_LINALG2"])
+    assert "C_IML" not in frontier.courses()["course_ids"]
+    frontier.complete(["C_PROBABILITY"])
+    assert "C_IML" in frontier.courses()["course_ids"]
+
+    frontier.complete(ALL_COURSES)
+    assert frontier.courses()["nodes"] == []
+
+
+def test_incremental_frontier_matches_full(db: Session) -> None:
+    uni = create_random_university(db)
+    requirements = get_track_requirements(db, uni.id, uni.tracks[0].id)
+    assert requirements is not None
+    rng = random.Random(0)
+    for _ in range(20):
+        order = rng.sample(ALL_COURSES, len(ALL_COURSES))
+        frontier = Frontier(requirements)
+        for i, course_id in enumerate(order):
+            frontier = frontier.copy()
+            frontier.complete([course_id])
+            full = Frontier(requirements, requirements.encode(order[: i + 1]))
+            assert frontier.courses() == full.courses()
+
+
+def test_frontier_rebuilt_on_version_change(db: Session) -> None:
+    uni = create_random_university(db)
+    db.commit()
+    track_id = uni.tracks[0].id
+    frontier = get_frontier(db, uni.id, track_id, [])
+    assert frontier is not None
+    assert get_frontier(db, uni.id, track_id, []) is frontier
+    assert "C_LOGICCS" not in frontier.courses()["course_ids"]
+
+    # LogicCS no longer follows Intro2CS
+    intro2cs, logiccs = (
+        db.query(models.CourseSetMembership)
+        .filter_by(university_id=uni.id, course_id=course_id)
+        .one()
+        .set.nodes[0]
+        for course_id in ("C_INTRO2CS", "C_LOGICCS")
+    )
+    edges = models.dag_edge_assoc
+    db.execute(
+        edges.delete().where(
+            (edges.c.from_node_id == intro2cs.node_id)
+            & (edges.c.to_node_id == logiccs.node_id)
+        )
+    )
+    increment_data_version(db, uni.id)
+    db.commit()
+    frontier = get_frontier(db, uni.id, track_id, [])
+    assert frontier is not None
+    assert "C_LOGICCS" in frontier.courses()["course_ids"]
+
+
+def test_frontier_agrees_with_audit_on_or_nodes() -> None:
+    # root -> {A, B} -> OR(X, Y): X or Y follows both A and B
+    names = {1: None, 2: "A", 3: "B", 4: None, 5: "X", 6: "Y"}
+    nodes = [
+        {
+            "node_id": node_id,
+            "node_type": "CourseSetNode" if name else "ORNode",
+            "course_set_id": node_id if name else None,
+            "extra_data": {},
+        }
+        for node_id, name in names.items()
+    ]
+    nodes[0]["node_type"] = "DAGRootNode"
+    edges = [(1, 2), (1, 3), (2, 4), (3, 4), (4, 5), (4, 6)]
+    dag = CompiledDAG(1, "track", nodes, edges)
+    bounds = SetBounds(1, None, None, None)
+    requirements = TrackRequirements(
+        dag,
+        {node_id: bounds for node_id, name in names.items() if name},
+        [(node_id, f"C_{name}", 4) for node_id, name in names.items() if name],
+    )
+
+    def frontier(*course_ids: str) -> list:
+        courses = Frontier(requirements, requirements.encode(course_ids)).courses()
+        return sorted(courses["course_ids"])
+
+    assert frontier() == ["C_A", "C_B"]
+    # the alternatives of the OR node follow both of its parents
+    assert frontier("C_A") == ["C_B"]
+    assert frontier("C_A", "C_B") == ["C_X", "C_Y"]
+    # either of them satisfies the track, though the other one remains available
+    assert requirements.audit_courses(["C_A", "C_B", "C_Y"])["satisfied"]
+    assert frontier("C_A", "C_B", "C_Y") == ["C_X"]
@@ -0,0 +1,59 @@
+from typing import Set
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.dag import load_track_dag
+from app.db.session import SessionLocal
+from app.tests.utils.university import COURSE_NAMES, create_random_university
+from app.tests.utils.utils import count_queries
+
+
+def walk(root: models.DAGNode) -> Set[str]:
+    """ Visits every node, edge and course of a DAG, returning the course ids """
+    course_ids = set()
+    visited = set()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.node_id in visited:
+            continue
+        visited.add(node.node_id)
+        assert all(node in child.parents for child in node.children)
+        if isinstance(node, models.CourseSetNode):
+            for course in node.course_set.courses:
+                assert course.term is not None
+                course_ids.add(course.id)
+        stack.extend(node.children)
+    return course_ids
+
+
+def test_load_track_dag_query_count(db: Session) -> None:
+    uni = create_random_university(db)
+    university_id, track_id = uni.id, uni.tracks[0].id
+    counts = []
+    for size in (0, 10, 40):
+        # grow the DAG by chains of course nodes below the root
+        root = db.query(models.DAGRootNode).filter_by(university_id=uni.id).one()
+        courses = db.query(models.Course).filter_by(university_id=uni.id).all()
+        for i in range(size):
+            node = models.singleton_course_node(courses[i % len(courses)], intern=False)
+            node.children.append(models.ORNode(university=uni))
+            root.children.append(node)
+        db.commit()
+
+        session = SessionLocal()
+        try:
+            with count_queries(session) as statements:
+                root = load_track_dag(session, university_id, track_id)
+                assert root is not None
+                assert len(walk(root)) == len(COURSE_NAMES)
+            counts.append(len(statements))
+        finally:
+            session.close()
+    assert counts[0] == counts[1] == counts[2] == 4
+
+
+def test_load_track_dag_missing(db: Session) -> None:
+    uni = create_random_university(db)
+    assert load_track_dag(db, uni.id, "missing") is None
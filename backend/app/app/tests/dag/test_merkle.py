@@ -0,0 +1,150 @@
+from typing import Dict
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.dag import NodeSpec, diff_track, spec_hashes, sync_track_dag, update_hashes
+from app.dag.audit import SetBounds
+from app.tests.utils.university import create_random_university
+from app.tests.utils.utils import random_lower_string
+
+SINGLETON = SetBounds(1, 1, None, None)
+
+
+def sample_spec() -> Dict[str, NodeSpec]:
+    """ The DAG of `create_random_university`'s track """
+
+    def course(name: str, *children: str) -> NodeSpec:
+        return NodeSpec("CourseSetNode", children, (f"C_{name.upper()}",), SINGLETON)
+
+    return {
+        "root": NodeSpec("DAGRootNode", ("Infi1", "LinAlg1", "OR", "Intro2CS")),
+        "Infi1": course("Infi1", "Infi2"),
+        "Infi2": course("Infi2", "IML"),
+        "LinAlg1": course("LinAlg1", "LinAlg2"),
+        "LinAlg2": course("LinAlg2", "Probability", "IML"),
+        "Probability": course("Probability", "IML"),
+        "IML": course("IML"),
+        "OR": NodeSpec("ORNode", ("Logic1", "LogicCS")),
+        "Logic1": course("Logic1"),
+        "LogicCS": course("LogicCS"),
+        "Intro2CS": course("Intro2CS", "LogicCS"),
+    }
+
+
+def get_root(db: Session, uni: models.University) -> models.DAGRootNode:
+    return db.query(models.DAGRootNode).filter_by(university_id=uni.id).one()
+
+
+def test_hashes_match_spec(db: Session) -> None:
+    uni = create_random_university(db)
+    root = get_root(db, uni)
+    assert root.merkle_hash == spec_hashes(sample_spec(), "root")["root"]
+
+
+def test_hashes_updated_where_written(db: Session) -> None:
+    uni = create_random_university(db)
+    root = get_root(db, uni)
+    spec = sample_spec()
+
+    # Probability no longer requires IML, and Logic1's set changes its bounds
+    probability, logic1 = (
+        db.query(models.CourseSetNode)
+        .join(models.CourseSet)
+        .filter(
+            (models.CourseSetNode.university_id == uni.id)
+            & models.CourseSet.courses.any(id=course_id)
+        )
+        .one()
+        for course_id in ("C_PROBABILITY", "C_LOGIC1")
+    )
+    probability.children.clear()
+    spec["Probability"] = spec["Probability"]._replace(children=())
+    logic1.course_set.max_subset_size = None
+    spec["Logic1"] = spec["Logic1"]._replace(bounds=SetBounds(1, None, None, None))
+    db.commit()
+
+    db.refresh(root)
+    assert root.merkle_hash == spec_hashes(spec, "root")["root"]
+    # no hash differs from those computed from scratch
+    assert update_hashes(db.connection(), uni.id) == 0
+
+
+def test_diff_track(db: Session) -> None:
+    track_id = random_lower_string()
+    uni = create_random_university(db, track_id)
+    other = create_random_university(db, track_id)
+    assert diff_track(db, uni.id, other.id, track_id) == []
+    assert diff_track(db, uni.id, other.id, "missing") is None
+
+    # removing Probability -> IML in the other university
+    probability = (
+        db.query(models.CourseSetNode)
+        .join(models.CourseSet)
+        .filter(
+            (models.CourseSetNode.university_id == other.id)
+            & models.CourseSet.courses.any(id="C_PROBABILITY")
+        )
+        .one()
+    )
+    iml = probability.children[0]
+    probability.children.clear()
+    db.commit()
+
+    [change] = diff_track(db, uni.id, other.id, track_id)  # type: ignore
+    assert change["change"] == "removed"
+    assert change["node_type"] == "CourseSetNode"
+    assert change["other_node_id"] is None
+    assert change["other_parent_id"] == probability.node_id
+    [removed] = db.query(models.CourseSetNode).get(change["node_id"]).course_set.courses
+    assert removed.id == "C_IML"
+
+    # and the reverse diff adds it
+    [change] = diff_track(db, other.id, uni.id, track_id)  # type: ignore
+    assert change["change"] == "added"
+    assert change["parent_id"] == probability.node_id
+    assert change["node_id"] is None
+    assert iml.node_id != change["other_node_id"]
+
+
+def test_sync_track_dag(db: Session) -> None:
+    uni = create_random_university(db)
+    track_id = uni.tracks[0].id
+    spec = sample_spec()
+    node_count = db.query(models.DAGNode).filter_by(university_id=uni.id).count()
+    assert sync_track_dag(db, uni.id, track_id, spec, "root") == 0
+
+    # only the changed node is created, with its ancestors
+    spec["Logic1"] = NodeSpec(
+        "CourseSetNode", (), ("C_LOGIC1", "C_LOGICCS"), SetBounds(1, None, None, None)
+    )
+    assert sync_track_dag(db, uni.id, track_id, spec, "root") == 2
+    db.commit()
+    root = get_root(db, uni)
+    assert root.merkle_hash == spec_hashes(spec, "root")["root"]
+    # the previous Logic1 and OR nodes are deleted
+    assert (
+        db.query(models.DAGNode).filter_by(university_id=uni.id).count() == node_count
+    )
+    set_count = db.query(models.CourseSet).filter_by(university_id=uni.id).count()
+
+    # as is the course set of Logic1's node, which no other node uses
+    spec["Logic1"] = spec["Logic1"]._replace(bounds=SetBounds(2, None, None, None))
+    assert sync_track_dag(db, uni.id, track_id, spec, "root") == 2
+    db.commit()
+    assert get_root(db, uni).merkle_hash == spec_hashes(spec, "root")["root"]
+    assert (
+        db.query(models.CourseSet).filter_by(university_id=uni.id).count() == set_count
+    )
+
+    # dropping the OR node deletes its unreachable subgraph
+    spec["root"] = NodeSpec("DAGRootNode", ("Infi1", "LinAlg1", "Intro2CS"))
+    assert sync_track_dag(db, uni.id, track_id, spec, "root") == 0
+    db.commit()
+    assert db.query(models.DAGNode).filter_by(university_id=uni.id).count() == (
+        node_count - 2
+    )
+    assert db.query(models.CourseSet).filter_by(university_id=uni.id).count() == (
+        set_count - 1
+    )
+    assert get_root(db, uni).merkle_hash == spec_hashes(spec, "root")["root"]
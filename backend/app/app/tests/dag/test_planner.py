@@ -0,0 +1,91 @@
+import random
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.dag import (
+    CompiledDAG,
+    Objective,
+    TrackRequirements,
+    get_track_requirements,
+    plan_track,
+)
+from app.dag.audit import SetBounds
+from app.tests.utils.university import create_random_university
+
+
+def test_plan_sample_track(db: Session) -> None:
+    uni = create_random_university(db)
+    requirements = get_track_requirements(db, uni.id, uni.tracks[0].id)
+    assert requirements is not None
+
+    plan = plan_track(requirements, [])
+    assert plan is not None and plan.optimal
+    # every course but one of the Logic1/LogicCS alternatives
+    assert len(plan.course_ids) == 8 and plan.credits == 32
+    assert requirements.audit_courses(plan.course_ids)["satisfied"]
+    # Lin. Alg 1 -> Lin. Alg 2 -> Probability -> IML
+    assert len(plan.terms) == 4
+    assert plan.terms[-1] == ["C_IML"]
+
+    plan = plan_track(requirements, ["C_INFI1", "C_LINALG1"], Objective.terms)
+    assert plan is not None and plan.optimal
+    assert plan.credits == 24 and len(plan.terms) == 3
+
+
+def random_track(rng: random.Random) -> TrackRequirements:
+    """ A small track with OR nodes and course sets of several courses, whose
+        courses have various credits and may belong to several sets """
+    courses = [(f"C{i}", rng.randint(1, 5)) for i in range(10)]
+    nodes: List[Dict[str, Any]] = [
+        {"node_id": 0, "node_type": "DAGRootNode", "course_set_id": None}
+    ]
+    edges = []
+    bounds: Dict[int, SetBounds] = {}
+    members: List[Tuple[int, str, Optional[int]]] = []
+    for node_id in range(1, 9):
+        if rng.random() < 0.25:
+            nodes.append(
+                {"node_id": node_id, "node_type": "ORNode", "course_set_id": None}
+            )
+        else:
+            nodes.append(
+                {
+                    "node_id": node_id,
+                    "node_type": "CourseSetNode",
+                    "course_set_id": node_id,
+                }
+            )
+            chosen = rng.sample(courses, rng.randint(1, 4))
+            members.extend((node_id, course_id, c) for course_id, c in chosen)
+            min_subset_size = rng.randint(0, len(chosen))
+            bounds[node_id] = SetBounds(
+                min_subset_size, None, rng.choice([None, rng.randint(1, 8)]), None
+            )
+        for parent in rng.sample(range(node_id), rng.randint(1, min(2, node_id))):
+            edges.append((parent, node_id))
+    for node in nodes:
+        node["extra_data"] = {}
+    dag = CompiledDAG(1, "track", nodes, edges)
+    return TrackRequirements(dag, bounds, sorted(members))
+
+
+def test_plan_matches_brute_force() -> None:
+    rng = random.Random(0)
+    for _ in range(30):
+        requirements = random_track(rng)
+        credits = dict(zip(requirements.course_ids, requirements.credits))
+        best: Optional[int] = None
+        for size in range(len(credits) + 1):
+            for courses in combinations(credits, size):
+                if requirements.audit(requirements.encode(courses))[0].satisfied:
+                    cost = sum(credits[c] for c in courses)
+                    best = cost if best is None else min(best, cost)
+        plan = plan_track(requirements, [])
+        if best is None:
+            assert plan is None
+            continue
+        assert plan is not None and plan.optimal
+        assert plan.credits == best
+        assert requirements.audit(requirements.encode(plan.course_ids))[0].satisfied
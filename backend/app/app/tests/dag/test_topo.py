@@ -0,0 +1,96 @@
+import random
+from typing import Dict
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.dag import CycleError, DynamicTopologicalOrder, insert_edges
+from app.db.base_class import table_of
+from app.tests.dag.test_closure import course_node, expected_closure, stored_closure
+from app.tests.utils.university import create_random_university
+
+dag_edge = models.dag_edge_assoc
+dagnode = table_of(models.DAGNode)
+
+
+def assert_topologically_ordered(db: Session, university_id: int) -> None:
+    rows = db.execute(
+        select(dag_edge.c.from_node_id, dag_edge.c.to_node_id)
+        .join(dagnode, dagnode.c.node_id == dag_edge.c.from_node_id)
+        .where(dagnode.c.university_id == university_id)
+    ).all()
+    order: Dict[int, int] = dict(
+        db.execute(
+            select(dagnode.c.node_id, dagnode.c.topo_order).where(
+                dagnode.c.university_id == university_id
+            )
+        ).all()
+    )
+    assert rows
+    assert all(order[from_id] < order[to_id] for from_id, to_id in rows)
+
+
+def test_dynamic_order_random_edges() -> None:
+    rng = random.Random(0)
+    # edges are consistent with a hidden order, and inserted in random order
+    hidden = list(range(200))
+    rng.shuffle(hidden)
+    topo = DynamicTopologicalOrder.from_graph({n: n for n in range(200)}, [])
+    for _ in range(1000):
+        a, b = rng.sample(range(200), 2)
+        from_id, to_id = (a, b) if hidden.index(a) < hidden.index(b) else (b, a)
+        topo.add_edge(from_id, to_id)
+        with pytest.raises(CycleError):
+            topo.add_edge(to_id, from_id)
+    order = topo.order
+    assert sorted(order.values()) == list(range(200))
+    assert all(
+        order[from_id] < order[to_id]
+        for from_id, successors in topo.successors.items()
+        for to_id in successors
+    )
+
+
+def test_orm_edges_keep_order(db: Session) -> None:
+    uni = create_random_university(db)
+    assert_topologically_ordered(db, uni.id)
+
+    root = db.query(models.DAGRootNode).filter_by(university_id=uni.id).one()
+    # new nodes are ordered last, so the whole DAG must be moved after this one
+    or_node = models.ORNode(university=uni)
+    or_node.children.append(root)
+    db.commit()
+    assert_topologically_ordered(db, uni.id)
+    assert stored_closure(db, uni.id) == expected_closure(db, uni.id)
+
+
+def test_orm_cycle_rejected(db: Session) -> None:
+    uni = create_random_university(db)
+    lin2 = course_node(db, uni.id, "C_LINALG2")
+    iml = course_node(db, uni.id, "C_IML")
+    iml.children.append(lin2)
+    with pytest.raises(CycleError):
+        db.commit()
+    db.rollback()
+    assert lin2 not in iml.children
+    assert_topologically_ordered(db, uni.id)
+
+
+def test_insert_edges(db: Session) -> None:
+    uni = create_random_university(db)
+    intro = course_node(db, uni.id, "C_INTRO2CS")
+    iml = course_node(db, uni.id, "C_IML")
+    lin2 = course_node(db, uni.id, "C_LINALG2")
+    conn = db.connection()
+
+    with pytest.raises(CycleError):
+        insert_edges(
+            conn, uni.id, [(iml.node_id, intro.node_id), (iml.node_id, lin2.node_id)]
+        )
+
+    insert_edges(conn, uni.id, [(iml.node_id, intro.node_id)])
+    db.commit()
+    assert_topologically_ordered(db, uni.id)
+    assert stored_closure(db, uni.id) == expected_closure(db, uni.id)
@@ -0,0 +1,62 @@
+from typing import Dict
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.clone_university import TABLES, clone_university
+from app.dag import diff_track, required_by
+from app.db.base_class import table_of
+from app.tests.utils.university import create_random_university
+
+dagnode = table_of(models.DAGNode)
+
+
+def count_rows(db: Session, university_id: int) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for table, node_columns in TABLES:
+        query = select(func.count()).select_from(table)
+        if "university_id" not in table.c:
+            query = query.join(
+                dagnode, dagnode.c.node_id == table.c[node_columns[0]]
+            ).where(dagnode.c.university_id == university_id)
+        else:
+            query = query.where(table.c.university_id == university_id)
+        counts[table.name] = db.execute(query).scalar_one()
+    return counts
+
+
+def test_clone_university(db: Session) -> None:
+    uni = create_random_university(db)
+    db.commit()
+    track_id = uni.tracks[0].id
+
+    clone_id = clone_university(db, uni.id, {"en": "Next year"})
+    db.commit()
+    clone = db.query(models.University).get(clone_id)
+    assert clone.name_translations == {"en": "Next year"}
+    assert count_rows(db, clone_id) == count_rows(db, uni.id)
+    assert count_rows(db, uni.id)["dag_closure"] > 0
+    # nodes are copied with new ids and the same hashes
+    nodes = db.query(models.DAGNode).filter_by(university_id=uni.id).all()
+    copies = db.query(models.DAGNode).filter_by(university_id=clone_id).all()
+    assert not {n.node_id for n in nodes} & {n.node_id for n in copies}
+    assert sorted(n.merkle_hash for n in nodes) == sorted(n.merkle_hash for n in copies)
+    assert diff_track(db, uni.id, clone_id, track_id) == []
+    [requirement] = required_by(db, clone_id, "C_IML")
+    assert requirement.track_id == track_id and requirement.depth == 3
+
+    # the copy is written to independently of the original
+    root = db.query(models.DAGRootNode).filter_by(university_id=clone_id).one()
+    root.children.append(models.ORNode(university=clone))
+    db.commit()
+    changes = diff_track(db, uni.id, clone_id, track_id)
+    assert changes is not None
+    [change] = changes
+    assert change["change"] == "added"
+    assert len(required_by(db, uni.id, "C_IML")) == 1
+
+    with pytest.raises(ValueError):
+        clone_university(db, uni.id + 10 ** 6)
+    db.rollback()
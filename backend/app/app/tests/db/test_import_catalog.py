@@ -0,0 +1,169 @@
+import csv
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.dag import diff_track, required_by
+from app.import_catalog import CatalogImportError, import_catalog
+from app.tests.utils.university import COURSE_NAMES, create_random_university
+
+
+def write_jsonl(path: Path, rows: List[Dict[str, Any]]) -> None:
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+
+def write_csv(path: Path, rows: List[Dict[str, Any]]) -> None:
+    with path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(
+                {
+                    name: json.dumps(value) if isinstance(value, dict) else value
+                    for name, value in row.items()
+                }
+            )
+
+
+def write_catalog(directory: Path, track_id: str, term_id: int) -> None:
+    """ Writes the catalog of `create_random_university`, with courses in CSV """
+    write_jsonl(
+        directory / "terms.jsonl",
+        [{"id": term_id, "name_translations": {"en": "Semester 1"}}],
+    )
+    write_jsonl(
+        directory / "faculties.jsonl",
+        [{"id": "facCSE", "name_translations": {"en": "CSE"}}],
+    )
+    write_jsonl(
+        directory / "departments.jsonl",
+        [{"faculty_id": "facCSE", "id": "521", "name_translations": {"en": "CS"}}],
+    )
+    write_jsonl(
+        directory / "tracks.jsonl",
+        [
+            {
+                "id": track_id,
+                "degree": "Bachelors",
+                "name_translations": {"en": "Computer Science"},
+            }
+        ],
+    )
+    write_jsonl(
+        directory / "track_departments.jsonl",
+        [{"track_id": track_id, "faculty_id": "facCSE", "department_id": "521"}],
+    )
+    write_csv(
+        directory / "courses.csv",
+        [
+            {
+                "id": f"C_{name.upper()}",
+                "term_id": term_id,
+                "course_credits": 4,
+                "name_translations": {"en": name},
+                "extra_data": "",
+            }
+            for name in COURSE_NAMES
+        ],
+    )
+    write_jsonl(
+        directory / "course_sets.jsonl",
+        [
+            {
+                "key": name,
+                "min_subset_size": 1,
+                "max_subset_size": 1,
+                "singleton_course_id": f"C_{name.upper()}",
+            }
+            for name in COURSE_NAMES
+        ],
+    )
+    write_jsonl(
+        directory / "course_set_memberships.jsonl",
+        [{"set_key": name, "course_id": f"C_{name.upper()}"} for name in COURSE_NAMES],
+    )
+    write_jsonl(
+        directory / "dag_nodes.jsonl",
+        [
+            # children may precede their parents
+            *(
+                {"key": name, "node_type": "CourseSetNode", "course_set_key": name}
+                for name in COURSE_NAMES
+            ),
+            {"key": "or", "node_type": "ORNode"},
+            {"key": "root", "node_type": "DAGRootNode", "track_id": track_id},
+        ],
+    )
+    edges = [
+        ("root", "Infi1"),
+        ("root", "LinAlg1"),
+        ("root", "or"),
+        ("root", "Intro2CS"),
+        ("Infi1", "Infi2"),
+        ("Infi2", "IML"),
+        ("LinAlg1", "LinAlg2"),
+        ("LinAlg2", "Probability"),
+        ("LinAlg2", "IML"),
+        ("Probability", "IML"),
+        ("or", "Logic1"),
+        ("or", "LogicCS"),
+        ("Intro2CS", "LogicCS"),
+    ]
+    write_jsonl(
+        directory / "dag_edges.jsonl",
+        [{"from_key": from_key, "to_key": to_key} for from_key, to_key in edges],
+    )
+
+
+def test_import_catalog(db: Session, tmp_path: Path) -> None:
+    uni = create_random_university(db)
+    track_id = uni.tracks[0].id
+    write_catalog(tmp_path, track_id, uni.courses[0].term_id)
+
+    report = import_catalog(db, tmp_path, {"en": "Imported"})
+    db.commit()
+    assert report.rows["courses"] == len(COURSE_NAMES)
+    assert report.rows["dag_edges"] == 13
+    assert report.rows_per_second > 0
+    assert list(crud.catalog_diff(db, uni.id, report.university_id)) == []
+    assert diff_track(db, uni.id, report.university_id, track_id) == []
+    [requirement] = required_by(db, report.university_id, "C_IML")
+    assert requirement.track_id == track_id and requirement.depth == 3
+    # parents are ordered before their children
+    nodes = db.query(models.DAGNode).filter_by(university_id=report.university_id)
+    for node in nodes:
+        assert all(node.topo_order < child.topo_order for child in node.children)
+
+
+def test_import_invalid_catalog(db: Session, tmp_path: Path) -> None:
+    uni = create_random_university(db)
+    track_id = uni.tracks[0].id
+    write_catalog(tmp_path, track_id, uni.courses[0].term_id)
+    edges = (tmp_path / "dag_edges.jsonl").read_text()
+
+    (tmp_path / "dag_edges.jsonl").write_text(
+        edges + json.dumps({"from_key": "IML", "to_key": "Infi1"}) + "\n"
+    )
+    with pytest.raises(CatalogImportError, match="cycle"):
+        import_catalog(db, tmp_path, {"en": "Cyclic"})
+    db.rollback()
+
+    (tmp_path / "dag_edges.jsonl").write_text(
+        edges + json.dumps({"from_key": "IML", "to_key": "Algorithms"}) + "\n"
+    )
+    with pytest.raises(CatalogImportError, match="line 14: unknown to_key"):
+        import_catalog(db, tmp_path, {"en": "Unknown key"})
+    db.rollback()
+
+    (tmp_path / "dag_edges.jsonl").write_text(edges)
+    write_jsonl(
+        tmp_path / "tracks.jsonl",
+        [{"id": track_id, "degree": "Diploma", "name_translations": {}}],
+    )
+    with pytest.raises(CatalogImportError, match="tracks.jsonl, line 1"):
+        import_catalog(db, tmp_path, {"en": "Invalid"})
+    db.rollback()
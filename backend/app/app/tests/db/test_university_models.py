@@ -9,8 +9,14 @@ from app.models import (
     Course,
     CourseSet,
     CourseSetMembership,
-    DAGNode, CourseSetNode, ORNode, singleton_course_node, DAGRootNode
+    DAGNode,
+    CourseSetNode,
+    ORNode,
+    singleton_course_node,
+    DAGRootNode,
 )
+from app.intern_singleton_course_sets import merge_singleton_sets
+from app.tests.utils.university import COURSE_NAMES, create_random_university
 
 
 def test_can_create_uni(db: Session) -> None:
@@ -61,19 +67,26 @@ def test_can_create_uni(db: Session) -> None:
     ]
 
     course_names = [
-        "Infi1", "Infi2", "LinAlg1", "LinAlg2", "Probability", "IML", "Logic1", "LogicCS", "Intro2CS"
+        "Infi1",
+        "Infi2",
+        "LinAlg1",
+        "LinAlg2",
+        "Probability",
+        "IML",
+        "Logic1",
+        "LogicCS",
+        "Intro2CS",
     ]
 
     courses = {
         name: Course(
             university=uni,
             id=f"C_{name.upper()}",
-            name_translations={
-                "en": name
-            },
+            name_translations={"en": name},
             term=terms[0],
-            course_credits=1337
-        ) for name in course_names
+            course_credits=1337,
+        )
+        for name in course_names
     }
 
     db.add_all(courses.values())
@@ -104,11 +117,62 @@ def test_can_create_uni(db: Session) -> None:
     cs_extended_root = DAGRootNode()
     cs_extended_root.track = tracks[0]
     cs_extended_root.university = uni
-    cs_extended_root.children.extend([
-        infi1, lin1, or_node, intro
-    ])
+    cs_extended_root.children.extend([infi1, lin1, or_node, intro])
 
     db.add(cs_extended_root)
 
     db.commit()
 
+
+def test_singleton_course_sets_are_interned(db: Session) -> None:
+    uni = create_random_university(db)
+    course = db.query(Course).filter_by(university_id=uni.id, id="C_IML").one()
+    nodes = [singleton_course_node(course, intern=True) for _ in range(3)]
+    separate = singleton_course_node(course)
+    root = db.query(DAGRootNode).filter_by(university_id=uni.id).one()
+    root.children.extend(nodes + [separate])
+    db.commit()
+
+    assert course.singleton_set is not None
+    assert course.singleton_set.singleton_course is course
+    assert {node.course_set_id for node in nodes} == {course.singleton_set.id}
+    assert separate.course_set_id != course.singleton_set.id
+    assert separate.course_set.independent
+
+
+def test_merge_singleton_sets(db: Session) -> None:
+    uni = create_random_university(db)
+    course = db.query(Course).filter_by(university_id=uni.id, id="C_IML").one()
+    root = db.query(DAGRootNode).filter_by(university_id=uni.id).one()
+    for _ in range(3):
+        # a singleton set as created before sets were interned
+        course_set = CourseSet(university=uni, min_subset_size=1, max_subset_size=1)
+        course_set.courses.append(course)
+        root.children.append(CourseSetNode(university=uni, course_set=course_set))
+    independent = singleton_course_node(course)
+    root.children.append(independent)
+    db.commit()
+    set_count = db.query(CourseSet).filter_by(university_id=uni.id).count()
+    version = uni.data_version
+
+    canonical, deleted = merge_singleton_sets(db, uni.id)
+    db.commit()
+    db.refresh(uni)
+    # the merge is a write to the university
+    assert uni.data_version == version + 1
+    assert (canonical, deleted) == (len(COURSE_NAMES), 3)
+    assert db.query(CourseSet).filter_by(university_id=uni.id).count() == set_count - 3
+    nodes = (
+        db.query(CourseSetNode)
+        .filter_by(university_id=uni.id)
+        .join(CourseSet)
+        .filter(CourseSet.singleton_course_id == "C_IML")
+        .all()
+    )
+    assert len(nodes) == 4
+    assert independent.course_set.singleton_course_id is None
+    assert merge_singleton_sets(db, uni.id) == (len(COURSE_NAMES), 0)
+    db.commit()
+    db.refresh(uni)
+    # nothing was written
+    assert uni.data_version == version + 1
@@ -0,0 +1,54 @@
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db.base_class import table_of
+from app.search import CoursePrefixIndex, get_prefix_index
+from app.tests.utils.university import create_random_university, increment_data_version
+
+
+def ids(index: CoursePrefixIndex, prefix: str, limit: int = 10) -> list:
+    return [course_id for course_id, _ in index.complete(prefix, limit)]
+
+
+def test_course_prefix_index() -> None:
+    index = CoursePrefixIndex(
+        [
+            ("67101", {"en": "Intro to Computer Science", "he": "מבוא למדעי המחשב"}),
+            ("80131", {"en": "Calculus 1", "he": "חשבון 1"}),
+            ("80132", {"en": "Calculus  2", "he": "חשבון 2"}),
+            ("67500", {"en": "Computability", "he": "חישוביות"}),
+            ("80134", {"en": "Linear Algebra for Computer Science"}),
+        ]
+    )
+    assert len(index) == 5
+    # ids, then names, then words within names, alphabetically within each
+    assert ids(index, "8013") == ["80131", "80132", "80134"]
+    assert ids(index, "CALC") == ["80131", "80132"]
+    assert ids(index, "comput") == ["67500", "67101", "80134"]
+    assert ids(index, "compute") == ["67101", "80134"]
+    assert ids(index, "calculus 2") == ["80132"]
+    assert ids(index, "חשבון") == ["80131", "80132"]
+    assert ids(index, "המחשב") == ["67101"]
+    assert ids(index, "6") == ["67101", "67500"]
+    assert ids(index, "comput", limit=1) == ["67500"]
+    # a course matching several times is completed once
+    assert ids(index, "c") == ["80131", "80132", "67500", "67101", "80134"]
+    assert ids(index, "physics") == []
+    assert ids(index, " ") == []
+
+
+def test_prefix_index_rebuilt_on_version_change(db: Session) -> None:
+    uni = create_random_university(db)
+    db.commit()
+    index = get_prefix_index(db, uni.id)
+    assert get_prefix_index(db, uni.id) is index
+
+    courses = table_of(models.Course)
+    db.execute(
+        courses.update()
+        .where((courses.c.university_id == uni.id) & (courses.c.id == "C_INFI1"))
+        .values(name_translations={"en": "Topology"})
+    )
+    increment_data_version(db, uni.id)
+    db.commit()
+    assert ids(get_prefix_index(db, uni.id), "topo") == ["C_INFI1"]
@@ -0,0 +1,46 @@
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db.base_class import table_of
+from app.search import CourseFilters, filtered_course_ids
+from app.search.facets import get_catalog, load_catalog
+from app.tests.utils.university import create_random_university, increment_data_version
+
+
+def test_catalog_matches_filtered_course_ids(db: Session) -> None:
+    uni = create_random_university(db)
+    uni.courses[0].course_credits = 2
+    db.commit()
+    track_id = uni.tracks[0].id
+    catalog = load_catalog(db, uni.id)
+
+    for filters in [
+        CourseFilters(),
+        CourseFilters(min_credits=3),
+        CourseFilters(max_credits=3, department_ids=["521"]),
+        CourseFilters(faculty_ids=["facCSE"], track_ids=[track_id]),
+        CourseFilters(track_ids=["missing"]),
+        CourseFilters(term_ids=[-1]),
+    ]:
+        course_ids = db.execute(filtered_course_ids(uni.id, filters)).scalars()
+        counts = catalog.facet_counts(filters)
+        assert counts["total"] == len(set(course_ids)), filters
+
+
+def test_catalog_reloaded_on_version_change(db: Session) -> None:
+    uni = create_random_university(db)
+    db.commit()
+    catalog = get_catalog(db, uni.id)
+    assert get_catalog(db, uni.id) is catalog
+    assert catalog.facet_counts(CourseFilters(max_credits=3))["total"] == 0
+
+    courses = table_of(models.Course)
+    db.execute(
+        courses.update()
+        .where((courses.c.university_id == uni.id) & (courses.c.id == "C_INFI1"))
+        .values(course_credits=2)
+    )
+    increment_data_version(db, uni.id)
+    db.commit()
+    counts = get_catalog(db, uni.id).facet_counts(CourseFilters(max_credits=3))
+    assert counts["total"] == 1
@@ -0,0 +1,110 @@
+from typing import Any, List
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.config import settings
+from app.db.base_class import table_of
+from app.search import Vocabulary, get_vocabulary, search_names
+from app.search.fulltext import _search_statement
+from app.tests.utils.university import create_random_university, increment_data_version
+
+
+def test_vocabulary_similar() -> None:
+    vocabulary = Vocabulary(["probability", "logic", "algebra", "ההסתברות"])
+    # substitution, transposition, insertion and deletion
+    assert vocabulary.similar("probabilety") == {"probability"}
+    assert vocabulary.similar("lgoic") == {"logic"}
+    assert vocabulary.similar("alggebra") == {"algebra"}
+    assert vocabulary.similar("algbra") == {"algebra"}
+    # a Hebrew prefix letter
+    assert vocabulary.similar("הסתברות") == {"ההסתברות"}
+    assert vocabulary.similar("lgic") == {"logic"}
+    assert vocabulary.similar("prbblty") == set()
+
+
+def search_ids(db: Session, uni: models.University, query: str) -> List[str]:
+    return [result["id"] for result in search_names(db, uni.id, query)]
+
+
+def test_search_names(db: Session) -> None:
+    uni = create_random_university(db)
+    courses = db.query(models.Course).filter_by(university_id=uni.id)
+    course = courses.filter_by(id="C_PROBABILITY").one()
+    course.name_translations = {
+        "en": "Introduction to Probability",
+        "he": "מבוא להסתברות",
+    }
+    logic = courses.filter_by(id="C_LOGICCS").one()
+    logic.name_translations = {"en": "Logic for CS"}
+    db.commit()
+
+    assert search_ids(db, uni, "probability")[0] == "C_PROBABILITY"
+    # by prefix, by English stem, with a typo, and in Hebrew
+    assert search_ids(db, uni, "prob") == ["C_PROBABILITY"]
+    assert search_ids(db, uni, "probabilities") == ["C_PROBABILITY"]
+    assert search_ids(db, uni, "introdcution to") == ["C_PROBABILITY"]
+    assert search_ids(db, uni, "הסתברות") == ["C_PROBABILITY"]
+    assert search_ids(db, uni, "מבוא") == ["C_PROBABILITY"]
+    # by id
+    assert search_ids(db, uni, "C_IML") == ["C_IML"]
+
+    # exact matches rank first
+    ids = search_ids(db, uni, "logic")
+    assert ids[0] == "C_LOGICCS" and "C_LOGIC1" in ids
+    # tracks and departments are searched as well
+    results = search_names(db, uni.id, "computer")
+    assert {(r["kind"], r["id"]) for r in results} == {("track", uni.tracks[0].id)}
+    [department] = search_names(db, uni.id, "CS", kinds=["department"])
+    assert department["faculty_id"] == "facCSE"
+
+    assert search_ids(db, uni, "nothing") == []
+    assert search_ids(db, uni, "!!") == []
+
+
+def test_search_names_beyond_max_candidates(db: Session, monkeypatch: Any) -> None:
+    monkeypatch.setattr(settings, "SEARCH_MAX_CANDIDATES", 5)
+    _search_statement.cache_clear()
+    uni = create_random_university(db)
+    term = db.query(models.Course).filter_by(university_id=uni.id).first().term
+    # many matches by prefix, added before the exact and id matches
+    db.add_all(
+        models.Course(
+            university=uni,
+            id=f"C_TARGET_{i}",
+            name_translations={"he": f"מבואות {i}"},
+            term=term,
+        )
+        for i in range(settings.SEARCH_MAX_CANDIDATES * 4)
+    )
+    db.flush()
+    db.add(
+        models.Course(
+            university=uni, id="C_TARGET", name_translations={"he": "מבוא"}, term=term
+        )
+    )
+    db.commit()
+    try:
+        assert search_ids(db, uni, "מבוא")[0] == "C_TARGET"
+        assert search_ids(db, uni, "C_TARGET")[0] == "C_TARGET"
+    finally:
+        monkeypatch.undo()
+        _search_statement.cache_clear()
+
+
+def test_vocabulary_reloaded_on_version_change(db: Session) -> None:
+    uni = create_random_university(db)
+    db.commit()
+    vocabulary = get_vocabulary(db, uni.id)
+    assert get_vocabulary(db, uni.id) is vocabulary
+    assert vocabulary.similar("topology") == set()
+
+    courses = table_of(models.Course)
+    db.execute(
+        courses.update()
+        .where((courses.c.university_id == uni.id) & (courses.c.id == "C_INFI1"))
+        .values(name_translations={"en": "Topology"})
+    )
+    increment_data_version(db, uni.id)
+    db.commit()
+    assert "topology" in get_vocabulary(db, uni.id).similar("topolgy")
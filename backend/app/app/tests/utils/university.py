@@ -0,0 +1,100 @@
+import random
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db.base_class import table_of
+from app.tests.utils.utils import random_lower_string
+
+COURSE_NAMES = [
+    "Infi1",
+    "Infi2",
+    "LinAlg1",
+    "LinAlg2",
+    "Probability",
+    "IML",
+    "Logic1",
+    "LogicCS",
+    "Intro2CS",
+]
+
+
+def create_random_term(db: Session) -> models.Term:
+    term = models.Term(
+        id=random.randint(10 ** 6, 10 ** 9), name_translations={"en": "Semester 1"}
+    )
+    db.add(term)
+    return term
+
+
+def create_random_university(
+    db: Session, track_id: Optional[str] = None
+) -> models.University:
+    """ Creates a university with a single track, whose DAG is:
+
+        root -> Infi1 -> Infi2 -> IML
+        root -> LinAlg1 -> LinAlg2 -> {Probability, IML}, Probability -> IML
+        root -> OR(Logic1, LogicCS), Intro2CS -> LogicCS
+        root -> Intro2CS
+    """
+    uni = models.University(name_translations={"en": random_lower_string()})
+    term = create_random_term(db)
+    fac = models.Faculty(university=uni, id="facCSE", name_translations={"en": "CSE"})
+    dep = models.Department(faculty=fac, id="521", name_translations={"en": "CS"})
+    track = models.Track(
+        university=uni,
+        id=track_id or random_lower_string(),
+        degree=models.DegreeType.Bachelors,
+        name_translations={"en": "Computer Science"},
+        departments=[dep],
+    )
+    courses: Dict[str, models.Course] = {
+        name: models.Course(
+            university=uni,
+            id=f"C_{name.upper()}",
+            name_translations={"en": name},
+            term=term,
+            course_credits=4,
+        )
+        for name in COURSE_NAMES
+    }
+    db.add_all(courses.values())
+
+    nodes = {
+        name: models.singleton_course_node(course, intern=True)
+        for name, course in courses.items()
+    }
+    nodes["Infi1"].children.append(nodes["Infi2"])
+    nodes["LinAlg1"].children.append(nodes["LinAlg2"])
+    nodes["Probability"].parents.append(nodes["LinAlg2"])
+    nodes["LogicCS"].parents.append(nodes["Intro2CS"])
+    nodes["IML"].parents.extend(
+        [nodes["Probability"], nodes["Infi2"], nodes["LinAlg2"]]
+    )
+
+    or_node = models.ORNode()
+    or_node.university = uni
+    or_node.children.extend([nodes["Logic1"], nodes["LogicCS"]])
+
+    root = models.DAGRootNode()
+    root.track = track
+    root.university = uni
+    root.children.extend([nodes["Infi1"], nodes["LinAlg1"], or_node, nodes["Intro2CS"]])
+
+    db.add(root)
+    db.commit()
+    db.refresh(uni)
+    return uni
+
+
+def increment_data_version(db: Session, university_id: int) -> None:
+    """ Increments a university's data version without going through the ORM, as a
+        write of another process would, which doesn't invalidate this process'
+        caches """
+    universities = table_of(models.University)
+    db.execute(
+        universities.update()
+        .where(universities.c.id == university_id)
+        .values(data_version=universities.c.data_version + 1)
+    )
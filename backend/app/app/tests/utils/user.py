@@ -4,6 +4,7 @@ from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
 from app import crud
+from app.core import security
 from app.core.config import settings
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
@@ -22,6 +23,18 @@ def user_authentication_headers(
     return headers
 
 
+def token_authentication_headers(user: User) -> Dict[str, str]:
+    """ Returns headers authenticating as a user, with a token issued directly rather
+        than through the login route, which isn't served """
+    return {"Authorization": f"Bearer {security.create_access_token(user.id)}"}
+
+
+def superuser_authentication_headers(db: Session) -> Dict[str, str]:
+    user = crud.user.get_by_email(db, email=settings.FIRST_SUPERUSER)
+    assert user is not None
+    return token_authentication_headers(user)
+
+
 def create_random_user(db: Session) -> User:
     email = random_email()
     password = random_lower_string()
@@ -1,8 +1,11 @@
 import random
 import string
-from typing import Dict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
 
 from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
 
@@ -25,3 +28,19 @@ def get_superuser_token_headers(client: TestClient) -> Dict[str, str]:
     a_token = tokens["access_token"]
     headers = {"Authorization": f"Bearer {a_token}"}
     return headers
+
+
+@contextmanager
+def count_queries(db: Session) -> Iterator[List[str]]:
+    """ Collects the statements executed through a session's engine """
+    statements: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):  # type: ignore
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
@@ -1,7 +1,11 @@
+from typing import Dict, Optional
+
 from raven import Client
 
+from app.clone_university import clone_university
 from app.core.celery_app import celery_app
 from app.core.config import settings
+from app.db.session import SessionLocal
 
 client_sentry = Client(settings.SENTRY_DSN)
 
@@ -9,3 +13,17 @@ client_sentry = Client(settings.SENTRY_DSN)
 @celery_app.task(acks_late=True)
 def test_celery(word: str) -> str:
     return f"test task return {word}"
+
+
+@celery_app.task(acks_late=True)
+def clone_university_task(
+    university_id: int, name_translations: Optional[Dict[str, str]] = None
+) -> int:
+    """ Copies a university in a single transaction, returning the new one's id """
+    db = SessionLocal()
+    try:
+        clone_id = clone_university(db, university_id, name_translations)
+        db.commit()
+        return clone_id
+    finally:
+        db.close()
@@ -0,0 +1,26 @@
+""" Benchmarks of performance-sensitive code paths. Each module is runnable from
+    `backend/app`, e.g `python -m benchmarks.dag_closure`, against the configured
+    database. Benchmarks which write data do so in a transaction which is rolled back.
+"""
+import statistics
+import time
+from typing import Any, Callable, List
+
+
+def measure(fn: Callable[[], Any], repeat: int = 20) -> List[float]:
+    """ Runs `fn` `repeat` times, returning the duration of each run in milliseconds """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: List[float]) -> None:
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(
+        f"{name:<50} median {statistics.median(timings):9.3f}ms"
+        f"  p99 {p99:9.3f}ms  ({len(timings)} runs)"
+    )
@@ -0,0 +1,77 @@
+""" Measures the memory taken by the course autocompletion index of a university of
+    the synthetic catalog of `benchmarks.search_dataset`, and the latency of
+    completing every keystroke of typing course names and ids, compared to
+    searching the database on every keystroke """
+import random
+import tracemalloc
+
+from app import models
+from app.db.session import SessionLocal
+from app.search import search_names
+from app.search.autocomplete import CoursePrefixIndex, build_prefix_index
+from benchmarks import measure, report
+from benchmarks.search_dataset import course_names
+
+COURSES = 50000
+# number of course names and ids typed, up to TYPED_LENGTH characters each
+TYPED = 100
+TYPED_LENGTH = 12
+
+course = models.Course.__table__
+
+
+def main() -> None:
+    random.seed(0)
+    catalog = list(course_names(COURSES))
+
+    tracemalloc.start()
+    index = CoursePrefixIndex(catalog)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{COURSES} courses, index takes {size / 2 ** 20:.1f}MiB")
+
+    typed = []
+    for course_id, names in random.sample(catalog, TYPED):
+        text = random.choice([course_id, *names.values()])[:TYPED_LENGTH]
+        typed.extend(text[:length] for length in range(1, len(text) + 1))
+    timings = []
+    for prefix in typed:
+        timings.extend(measure(lambda: index.complete(prefix), repeat=1))
+    report("keystroke: index", timings)
+
+    db = SessionLocal()
+    uni = models.University(name_translations={"en": "Autocomplete benchmark"})
+    term = models.Term(id=random.randint(10 ** 6, 10 ** 9), name_translations={})
+    db.add_all([uni, term])
+    db.flush()
+    db.execute(
+        course.insert(),
+        [
+            {
+                "id": course_id,
+                "university_id": uni.id,
+                "term_id": term.id,
+                "course_credits": 2,
+                "name_translations": names,
+                "extra_data": {},
+            }
+            for course_id, names in catalog
+        ],
+    )
+    db.connection().exec_driver_sql("ANALYZE course")
+    report(
+        "rebuild from database", measure(lambda: build_prefix_index(db, uni.id), 3)
+    )
+    # warm the search vocabulary, which is built once as well
+    search_names(db, uni.id, "warmup", ["course"])
+    timings = []
+    for prefix in typed[::5]:
+        timings.extend(
+            measure(lambda: search_names(db, uni.id, prefix, ["course"], 10), repeat=1)
+        )
+    report("keystroke: database search", timings)
+    db.rollback()
+
+
+if __name__ == "__main__":
+    main()
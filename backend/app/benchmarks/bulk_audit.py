@@ -0,0 +1,88 @@
+""" Throughput of bulk degree audits of 10k students against a synthetic 300-course
+    track, compared with auditing each student separately. Doesn't use the database.
+"""
+import random
+import time
+
+from app.dag import CompiledDAG, TrackRequirements, bulk_audit
+from app.dag.audit import SetBounds
+from app.dag.bulk_audit import encode_students
+
+COURSES = 300
+SETS = 60
+STUDENTS = 10_000
+
+
+def synthetic_track() -> TrackRequirements:
+    rng = random.Random(0)
+    courses = [(f"C{i}", rng.choice([2, 3, 4, 5])) for i in range(COURSES)]
+    # root -> chains of 5 course set nodes, and an OR node between pairs of chains
+    nodes = [{"node_id": 0, "node_type": "DAGRootNode", "course_set_id": None}]
+    edges = []
+    bounds = {}
+    members = []
+    for set_id in range(SETS):
+        node_id = set_id + 1
+        nodes.append(
+            {"node_id": node_id, "node_type": "CourseSetNode", "course_set_id": set_id}
+        )
+        # every course is a member of at least one set
+        start, end = set_id * COURSES // SETS, (set_id + 1) * COURSES // SETS
+        chosen = courses[start:end]
+        chosen += rng.sample(courses, rng.randint(0, 10))
+        chosen = list(set(chosen))
+        size = len(chosen)
+        members.extend((set_id, course_id, credits) for course_id, credits in chosen)
+        bounds[set_id] = SetBounds(
+            rng.randint(1, size), size, rng.randint(0, 2 * size), None
+        )
+        if set_id % 5:
+            edges.append((node_id - 1, node_id))
+        elif set_id % 10 == 0:
+            edges.append((0, node_id))
+        else:
+            or_id = 1000 + set_id
+            nodes.append(
+                {"node_id": or_id, "node_type": "ORNode", "course_set_id": None}
+            )
+            edges.extend([(0, or_id), (or_id, node_id), (or_id, node_id - 5)])
+    for node in nodes:
+        node["extra_data"] = {}
+    dag = CompiledDAG(0, "synthetic", nodes, edges)
+    return TrackRequirements(dag, bounds, sorted(members))
+
+
+def main() -> None:
+    requirements = synthetic_track()
+    rng = random.Random(1)
+    course_ids = requirements.course_ids
+    students = [
+        [c for c in course_ids if rng.random() < 0.8 + 0.2 * rng.random()]
+        for _ in range(STUDENTS)
+    ]
+    print(
+        f"{len(requirements.course_ids)} courses, {len(requirements.dag)} nodes, "
+        f"{STUDENTS} students"
+    )
+
+    start = time.perf_counter()
+    encode_students(requirements, students)
+    encoding = time.perf_counter() - start
+    start = time.perf_counter()
+    result = bulk_audit(requirements, students)
+    bulk = time.perf_counter() - start
+    print(f"bulk audit:          {bulk:7.3f}s  {STUDENTS / bulk:10.0f} students/s")
+    print(f"  of which encoding: {encoding:7.3f}s")
+
+    start = time.perf_counter()
+    single = [requirements.audit(requirements.encode(s))[0] for s in students]
+    looped = time.perf_counter() - start
+    print(f"audit per student:   {looped:7.3f}s  {STUDENTS / looped:10.0f} students/s")
+
+    assert result.satisfied.tolist() == [r.satisfied for r in single]
+    assert result.missing_credits.tolist() == [r.missing_credits for r in single]
+    print(f"{int(result.satisfied.sum())} students satisfy the track")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+""" Measures diffing the catalogs of two snapshots of a university of 20k courses,
+    where the later snapshot changed a tenth of the courses and course sets """
+import json
+import random
+
+from sqlalchemy import func, select
+
+from app import crud, models
+from app.clone_university import clone_university
+from app.db.session import SessionLocal
+from benchmarks import measure, report
+from benchmarks.clone import create_university
+
+CHANGED = 0.1
+
+course = models.Course.__table__
+courseset = models.CourseSet.__table__
+
+
+def main() -> None:
+    random.seed(0)
+    db = SessionLocal()
+    uid = create_university(db)
+    other_id = clone_university(db, uid)
+    sample = func.random() < CHANGED
+    db.execute(
+        course.update()
+        .where((course.c.university_id == other_id) & sample)
+        .values(course_credits=course.c.course_credits + 1)
+    )
+    db.execute(
+        courseset.update()
+        .where((courseset.c.university_id == other_id) & sample)
+        .values(max_credits=10)
+    )
+    db.connection().exec_driver_sql("ANALYZE")
+    courses = db.execute(
+        select(func.count()).where(course.c.university_id == uid)
+    ).scalar()
+    changes = sum(1 for _ in crud.catalog_diff(db, uid, other_id))
+    print(f"{courses} courses, {changes} changes")
+
+    def diff() -> None:
+        for change in crud.catalog_diff(db, uid, other_id):
+            json.dumps(change)
+
+    report("catalog diff", measure(diff, repeat=5))
+    db.rollback()
+
+
+if __name__ == "__main__":
+    main()
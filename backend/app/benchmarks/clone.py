@@ -0,0 +1,132 @@
+""" Measures cloning a university of 20k courses, whose tracks' DAGs require
+    hundreds of courses each, along with their derived closure and course index """
+import random
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.clone_university import clone_university
+from app.dag import rebuild_closure, rebuild_course_index, update_hashes
+from app.db.session import SessionLocal
+from benchmarks import measure, report
+
+COURSES = 20000
+TRACKS = 100
+COURSES_PER_TRACK = 200
+# length of the prerequisite chains within every track
+CHAIN = 4
+
+course = models.Course.__table__
+courseset = models.CourseSet.__table__
+membership = models.CourseSetMembership.__table__
+track = models.Track.__table__
+dagnode = models.DAGNode.__table__
+dagrootnode = models.DAGRootNode.__table__
+coursesetnode = models.CourseSetNode.__table__
+dag_edge = models.dag_edge_assoc
+
+
+def create_university(db: Session) -> int:
+    uni = models.University(name_translations={"en": "Clone benchmark"})
+    term = models.Term(id=random.randint(10 ** 6, 10 ** 9), name_translations={})
+    db.add_all([uni, term])
+    db.flush()
+    uid = uni.id
+    course_ids = [f"C{i:05}" for i in range(COURSES)]
+    db.execute(
+        course.insert(),
+        [
+            {
+                "id": course_id,
+                "university_id": uid,
+                "term_id": term.id,
+                "course_credits": 4,
+                "name_translations": {"en": f"Course {course_id}"},
+                "extra_data": {},
+            }
+            for course_id in course_ids
+        ],
+    )
+    # the canonical singleton set of every course
+    db.execute(
+        courseset.insert(),
+        [
+            {
+                "id": i + 1,
+                "university_id": uid,
+                "min_subset_size": 1,
+                "max_subset_size": 1,
+                "singleton_course_id": course_id,
+                "extra_data": {},
+            }
+            for i, course_id in enumerate(course_ids)
+        ],
+    )
+    db.execute(
+        membership.insert(),
+        [
+            {"university_id": uid, "set_id": i + 1, "course_id": course_id}
+            for i, course_id in enumerate(course_ids)
+        ],
+    )
+    track_ids = [f"T{i:03}" for i in range(TRACKS)]
+    db.execute(
+        track.insert(),
+        [
+            {"id": track_id, "university_id": uid, "degree": "Bachelors"}
+            for track_id in track_ids
+        ],
+    )
+    node_ids = iter(
+        db.execute(
+            select(
+                func.nextval(func.pg_get_serial_sequence(dagnode.name, "node_id"))
+            ).select_from(func.generate_series(1, TRACKS * (COURSES_PER_TRACK + 1)))
+        ).scalars()
+    )
+    nodes, roots, set_nodes, edges = [], [], [], []
+    for track_id in track_ids:
+        root = next(node_ids)
+        nodes.append({"node_id": root, "node_type": "DAGRootNode"})
+        roots.append({"node_id": root, "track_id": track_id})
+        required = random.sample(range(COURSES), COURSES_PER_TRACK)
+        for i, course_index in enumerate(required):
+            node = next(node_ids)
+            nodes.append({"node_id": node, "node_type": "CourseSetNode"})
+            set_nodes.append({"node_id": node, "course_set_id": course_index + 1})
+            # every chain starts at the root, and continues from the previous node
+            parent = root if i % CHAIN == 0 else node - 1
+            edges.append({"from_node_id": parent, "to_node_id": node})
+    # parents are inserted first, so their topological order precedes children's
+    db.execute(
+        dagnode.insert(),
+        [{**node, "university_id": uid, "extra_data": {}} for node in nodes],
+    )
+    db.execute(dagrootnode.insert(), [{**root, "university_id": uid} for root in roots])
+    db.execute(
+        coursesetnode.insert(), [{**node, "university_id": uid} for node in set_nodes]
+    )
+    db.execute(dag_edge.insert(), edges)
+    conn = db.connection()
+    rebuild_closure(conn, uid)
+    rebuild_course_index(conn, uid)
+    update_hashes(conn, uid)
+    conn.exec_driver_sql("ANALYZE")
+    return uid
+
+
+def main() -> None:
+    random.seed(0)
+    db = SessionLocal()
+    uid = create_university(db)
+    print(
+        f"{COURSES} courses, {TRACKS} tracks of {COURSES_PER_TRACK} courses, "
+        f"in chains of {CHAIN}"
+    )
+    report("clone", measure(lambda: clone_university(db, uid), repeat=3))
+    db.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+""" Measures upserting the 20k courses of a university, a tenth of which changed, in
+    batches, against updating courses one at a time through the ORM """
+import random
+
+from app import crud, models, schemas
+from app.core.config import settings
+from app.db.session import SessionLocal
+from benchmarks import measure, report
+from benchmarks.clone import create_university
+
+CHANGED = 0.1
+# courses updated through the ORM, as updating all of them one at a time takes long
+ORM_COURSES = 1000
+
+
+def main() -> None:
+    random.seed(0)
+    db = SessionLocal()
+    uid = create_university(db)
+    courses = [
+        schemas.CourseRow(
+            id=course.id,
+            term_id=course.term_id,
+            course_credits=course.course_credits + (random.random() < CHANGED),
+            name_translations=course.name_translations,
+        )
+        for course in db.query(models.Course).filter_by(university_id=uid)
+    ]
+
+    # every run is rolled back to a savepoint, keeping the university
+    def upsert() -> None:
+        savepoint = db.begin_nested()
+        crud.course.upsert_many(
+            db,
+            university_id=uid,
+            courses=courses,
+            batch_size=settings.COURSE_BULK_BATCH_SIZE,
+        )
+        savepoint.rollback()
+
+    def update_one_at_a_time() -> None:
+        savepoint = db.begin_nested()
+        for row in courses[:ORM_COURSES]:
+            course = db.query(models.Course).get((row.id, uid))
+            course.course_credits = row.course_credits
+            db.flush()
+        savepoint.rollback()
+
+    print(f"{len(courses)} courses, {CHANGED:.0%} changed")
+    report("bulk upsert", measure(upsert, repeat=5))
+    report(
+        f"ORM updates of {ORM_COURSES} courses",
+        measure(update_one_at_a_time, repeat=3),
+    )
+    db.rollback()
+
+
+if __name__ == "__main__":
+    main()
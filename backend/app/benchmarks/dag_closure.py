@@ -0,0 +1,84 @@
+""" Compares reachability queries over the DAG using a recursive CTE over `dag_edge`
+    against the `dag_closure` table, on a deep synthetic DAG """
+import random
+
+from sqlalchemy import exists, literal, select
+
+from app import models
+from app.dag import descendants_query, rebuild_closure
+from app.db.session import SessionLocal
+from benchmarks import measure, report
+
+NODES = 1000
+EXTRA_EDGES_PER_NODE = 2
+MAX_SPAN = 50
+
+dag_edge = models.dag_edge_assoc
+dag_closure = models.dag_closure
+
+
+def descendants_cte(root_id: int):  # type: ignore
+    reachable = select(literal(root_id).label("node_id")).cte(
+        "reachable", recursive=True
+    )
+    reachable = reachable.union(
+        select(dag_edge.c.to_node_id).where(
+            dag_edge.c.from_node_id == reachable.c.node_id
+        )
+    )
+    return select(reachable.c.node_id)
+
+
+def main() -> None:
+    random.seed(0)
+    db = SessionLocal()
+    uni = models.University(name_translations={"en": "Closure benchmark"})
+    nodes = [models.ORNode(university=uni) for _ in range(NODES)]
+    db.add_all(nodes)
+    db.flush()
+    ids = [node.node_id for node in nodes]
+
+    edges = {(ids[i], ids[i + 1]) for i in range(NODES - 1)}
+    for i in range(NODES - 1):
+        for _ in range(EXTRA_EDGES_PER_NODE):
+            j = random.randint(i + 1, min(NODES - 1, i + MAX_SPAN))
+            edges.add((ids[i], ids[j]))
+    db.execute(
+        dag_edge.insert(), [{"from_node_id": f, "to_node_id": t} for f, t in edges]
+    )
+    conn = db.connection()
+    rows = rebuild_closure(conn, uni.id)
+    print(
+        f"{NODES} nodes, {len(edges)} edges, longest path {NODES - 1}, "
+        f"{rows} closure rows"
+    )
+
+    root, leaf = ids[0], ids[-1]
+    cte = descendants_cte(root)
+    closure = descendants_query(root)
+    assert len(conn.execute(cte).all()) == len(conn.execute(closure).all()) + 1
+
+    report(
+        "descendants of root: recursive CTE", measure(lambda: conn.execute(cte).all())
+    )
+    report("descendants of root: closure", measure(lambda: conn.execute(closure).all()))
+
+    cte_check = select(exists(cte.where(literal(leaf) == cte.selected_columns[0])))
+    closure_check = select(
+        exists().where(
+            (dag_closure.c.ancestor_id == root) & (dag_closure.c.descendant_id == leaf)
+        )
+    )
+    report(
+        "is root an ancestor of leaf: recursive CTE",
+        measure(lambda: conn.execute(cte_check).scalar()),
+    )
+    report(
+        "is root an ancestor of leaf: closure",
+        measure(lambda: conn.execute(closure_check).scalar(), repeat=200),
+    )
+    db.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+""" Measures filtering a large course catalog and counting its facets, where courses
+    are required by many tracks of many departments """
+import random
+from typing import List, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db.session import SessionLocal
+from app.search import CourseFilters, facet_counts, filtered_course_ids
+from app.search.facets import load_catalog
+from benchmarks import measure, report
+
+COURSES = 10000
+TERMS = 3
+FACULTIES = 8
+DEPARTMENTS_PER_FACULTY = 5
+TRACKS = 200
+COURSES_PER_TRACK = 150
+
+course = models.Course.__table__
+track = models.Track.__table__
+faculty = models.Faculty.__table__
+department = models.Department.__table__
+track_department = models.track_department
+course_index = models.course_requirement_index
+
+
+def create_catalog(db: Session) -> Tuple[int, List[models.Term], List[str]]:
+    """ Creates a university, returning its id, terms and track ids """
+    uni = models.University(name_translations={"en": "Facets benchmark"})
+    terms = [
+        models.Term(id=random.randint(10 ** 6, 10 ** 9), name_translations={})
+        for _ in range(TERMS)
+    ]
+    db.add_all([uni, *terms])
+    db.flush()
+    uid = uni.id
+    course_ids = [f"C{i:05}" for i in range(COURSES)]
+    db.execute(
+        course.insert(),
+        [
+            {
+                "id": course_id,
+                "university_id": uid,
+                "term_id": random.choice(terms).id,
+                "course_credits": random.choice([2, 2, 3, 4, 4, 5, 6]),
+                "name_translations": {},
+                "extra_data": {},
+            }
+            for course_id in course_ids
+        ],
+    )
+    departments = [
+        (f"F{f}", f"D{f}.{d}")
+        for f in range(FACULTIES)
+        for d in range(DEPARTMENTS_PER_FACULTY)
+    ]
+    db.execute(
+        faculty.insert(),
+        [{"id": f"F{f}", "university_id": uid} for f in range(FACULTIES)],
+    )
+    db.execute(
+        department.insert(),
+        [
+            {"id": department_id, "faculty_id": faculty_id, "university_id": uid}
+            for faculty_id, department_id in departments
+        ],
+    )
+    track_ids = [f"T{i:03}" for i in range(TRACKS)]
+    db.execute(
+        track.insert(),
+        [
+            {"id": track_id, "university_id": uid, "degree": "Bachelors"}
+            for track_id in track_ids
+        ],
+    )
+    # most tracks belong to a single department, some are shared by two
+    db.execute(
+        track_department.insert(),
+        [
+            {
+                "university_id": uid,
+                "track_id": track_id,
+                "faculty_id": faculty_id,
+                "department_id": department_id,
+            }
+            for track_id in track_ids
+            for faculty_id, department_id in random.sample(
+                departments, 1 if random.random() < 0.8 else 2
+            )
+        ],
+    )
+    # the course index is derived from the DAGs, which aren't needed for filtering
+    db.execute(
+        course_index.insert(),
+        [
+            {
+                "university_id": uid,
+                "course_id": course_id,
+                "track_id": track_id,
+                "node_id": node_id,
+                "course_set_id": node_id,
+                "depth": 1,
+            }
+            for track_id in track_ids
+            for node_id, course_id in enumerate(
+                random.sample(course_ids, COURSES_PER_TRACK)
+            )
+        ],
+    )
+    db.connection().exec_driver_sql("ANALYZE")
+    return uid, terms, track_ids
+
+
+def main() -> None:
+    random.seed(0)
+    db = SessionLocal()
+    uid, terms, track_ids = create_catalog(db)
+    print(
+        f"{COURSES} courses, {TRACKS} tracks of {FACULTIES * DEPARTMENTS_PER_FACULTY} "
+        "departments, "
+        f"{COURSES_PER_TRACK} courses per track"
+    )
+
+    report("load catalog", measure(lambda: load_catalog(db, uid), repeat=5))
+    cases = [
+        ("no filters", CourseFilters()),
+        ("term and credits", CourseFilters(term_ids=[terms[0].id], min_credits=4)),
+        ("faculty", CourseFilters(faculty_ids=["F1"])),
+        (
+            "department and tracks",
+            CourseFilters(department_ids=["D1.1"], track_ids=track_ids[:10]),
+        ),
+    ]
+    for name, filters in cases:
+        counts = facet_counts(db, uid, filters)
+        report(
+            f"facet counts: {name} ({counts['total']} courses)",
+            measure(lambda: facet_counts(db, uid, filters)),
+        )
+        query = (
+            db.query(models.Course)
+            .filter(models.Course.university_id == uid)
+            .filter(models.Course.id.in_(filtered_course_ids(uid, filters)))
+            .order_by(models.Course.university_id, models.Course.id)
+            .limit(100)
+        )
+        report(f"first page: {name}", measure(lambda: query.all()))
+    db.rollback()
+
+
+if __name__ == "__main__":
+    main()
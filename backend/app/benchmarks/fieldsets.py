@@ -0,0 +1,86 @@
+""" Compares the size and latency of pages of courses with large `extra_data`, with
+    all fields and with a sparse fieldset, serialized as the API does. Endpoints are
+    called directly, as the benchmark's data is only visible in its transaction. """
+import random
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app import models, schemas
+from app.api import deps
+from app.api.api_v1.endpoints.course import read_courses
+from app.db.session import SessionLocal
+from app.search import CourseFilters
+from benchmarks import measure, report
+
+COURSES = 2000
+PAGE_SIZE = 500
+
+course = models.Course.__table__
+
+
+def extra_data() -> Dict[str, Any]:
+    """ Extra data of about 2KB, as scraped from a course catalog """
+    words = ["lorem", "ipsum", "dolor", "sit"]
+    return {
+        "syllabus": " ".join(random.choice(words) for _ in range(250)),
+        "lecturers": [f"Lecturer {random.randint(0, 500)}" for _ in range(3)],
+        "hours": [{"day": d, "start": "10:00", "end": "12:00"} for d in range(4)],
+        "exam_dates": ["2021-02-01", "2021-03-01"],
+    }
+
+
+def main() -> None:
+    random.seed(0)
+    db = SessionLocal()
+    uni = models.University(name_translations={"en": "Fieldsets benchmark"})
+    term = models.Term(id=random.randint(10 ** 6, 10 ** 9), name_translations={})
+    db.add_all([uni, term])
+    db.flush()
+    db.execute(
+        course.insert(),
+        [
+            {
+                "id": f"C{i:05}",
+                "university_id": uni.id,
+                "term_id": term.id,
+                "course_credits": 2,
+                "name_translations": {"en": f"Course {i}", "he": f"קורס {i}"},
+                "extra_data": extra_data(),
+            }
+            for i in range(COURSES)
+        ],
+    )
+    db.connection().exec_driver_sql("ANALYZE course")
+    print(f"{COURSES} courses, pages of {PAGE_SIZE}")
+
+    def page(fields: Optional[str] = None) -> bytes:
+        response = Response()
+        courses = read_courses(
+            uni.id,
+            db=db,
+            pagination=deps.Pagination(response, skip=0, limit=PAGE_SIZE, cursor=None),
+            filters=CourseFilters(),
+            fields=deps.Fields(response, fields=fields),
+        )
+        db.expunge_all()
+        if isinstance(courses, JSONResponse):
+            return courses.body
+        # as serialized by FastAPI through the endpoint's response model
+        content = [schemas.Course.from_orm(c) for c in courses]
+        return JSONResponse(jsonable_encoder(content)).body
+
+    for name, fields in [
+        ("all fields", None),
+        ("id,name_translations", "id,name_translations"),
+        ("id,name_translations,term", "id,name_translations,term"),
+    ]:
+        size = len(page(fields))
+        report(f"{name} ({size / 1024:.0f}KiB)", measure(lambda: page(fields)))
+    db.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+""" Measures importing a catalog of 20k courses, whose tracks' DAGs require hundreds
+    of courses each, reporting rows per second """
+import json
+import random
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+from app.db.session import SessionLocal
+from app.import_catalog import import_catalog
+from benchmarks import measure, report
+from benchmarks.clone import CHAIN, COURSES, COURSES_PER_TRACK, TRACKS
+
+TERM_ID = 1
+
+
+def write_jsonl(path: Path, rows: Iterable[Dict[str, Any]]) -> None:
+    with path.open("w") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+def write_catalog(directory: Path) -> None:
+    course_ids = [f"C{i:05}" for i in range(COURSES)]
+    track_ids = [f"T{i:03}" for i in range(TRACKS)]
+    write_jsonl(directory / "terms.jsonl", [{"id": TERM_ID, "name_translations": {}}])
+    write_jsonl(
+        directory / "courses.jsonl",
+        (
+            {
+                "id": course_id,
+                "term_id": TERM_ID,
+                "course_credits": 4,
+                "name_translations": {"en": f"Course {course_id}"},
+            }
+            for course_id in course_ids
+        ),
+    )
+    write_jsonl(
+        directory / "course_sets.jsonl",
+        (
+            {
+                "key": course_id,
+                "min_subset_size": 1,
+                "max_subset_size": 1,
+                "singleton_course_id": course_id,
+            }
+            for course_id in course_ids
+        ),
+    )
+    write_jsonl(
+        directory / "course_set_memberships.jsonl",
+        ({"set_key": course_id, "course_id": course_id} for course_id in course_ids),
+    )
+    write_jsonl(
+        directory / "tracks.jsonl",
+        (
+            {"id": track_id, "degree": "Bachelors", "name_translations": {}}
+            for track_id in track_ids
+        ),
+    )
+    nodes, edges = [], []
+    for track_id in track_ids:
+        root = f"{track_id}/root"
+        nodes.append({"key": root, "node_type": "DAGRootNode", "track_id": track_id})
+        required = random.sample(course_ids, COURSES_PER_TRACK)
+        for i, course_id in enumerate(required):
+            node = f"{track_id}/{i}"
+            nodes.append(
+                {"key": node, "node_type": "CourseSetNode", "course_set_key": course_id}
+            )
+            # every chain starts at the root, and continues from the previous node
+            parent = root if i % CHAIN == 0 else f"{track_id}/{i - 1}"
+            edges.append({"from_key": parent, "to_key": node})
+    write_jsonl(directory / "dag_nodes.jsonl", nodes)
+    write_jsonl(directory / "dag_edges.jsonl", edges)
+
+
+def main() -> None:
+    random.seed(0)
+    db = SessionLocal()
+    with tempfile.TemporaryDirectory() as directory:
+        write_catalog(Path(directory))
+        reports = []
+
+        def run() -> None:
+            reports.append(import_catalog(db, directory, {"en": "Import benchmark"}))
+            db.rollback()
+
+        report("import catalog", measure(run, repeat=3))
+    print(
+        f"{sum(reports[0].rows.values())} rows, "
+        f"{min(r.rows_per_second for r in reports):.0f}-"
+        f"{max(r.rows_per_second for r in reports):.0f} rows/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
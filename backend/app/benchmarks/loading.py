@@ -0,0 +1,74 @@
+""" Compares serializing a page of universities, each with many faculties and
+    departments, when relationships are loaded lazily and with the loading plan of
+    `schemas.University` """
+from typing import List
+
+from sqlalchemy import event
+
+from app import crud, models, schemas
+from app.db.session import SessionLocal, engine
+from benchmarks import measure, report
+
+UNIVERSITIES = 100
+FACULTIES = 10
+DEPARTMENTS_PER_FACULTY = 5
+
+faculty = models.Faculty.__table__
+department = models.Department.__table__
+
+
+def main() -> None:
+    db = SessionLocal()
+    unis = [
+        models.University(name_translations={"en": f"Loading benchmark {i}"})
+        for i in range(UNIVERSITIES)
+    ]
+    db.add_all(unis)
+    db.flush()
+    ids = [uni.id for uni in unis]
+    db.execute(
+        faculty.insert(),
+        [
+            {"id": f"F{f}", "university_id": uid}
+            for uid in ids
+            for f in range(FACULTIES)
+        ],
+    )
+    db.execute(
+        department.insert(),
+        [
+            {"id": f"D{d}", "faculty_id": f"F{f}", "university_id": uid}
+            for uid in ids
+            for f in range(FACULTIES)
+            for d in range(DEPARTMENTS_PER_FACULTY)
+        ],
+    )
+    print(
+        f"{UNIVERSITIES} universities of {FACULTIES} faculties with "
+        f"{DEPARTMENTS_PER_FACULTY} departments each"
+    )
+
+    statements: List[str] = []
+    event.listen(
+        engine, "before_cursor_execute", lambda *args: statements.append(args[2])
+    )
+
+    def page(planned: bool) -> List[schemas.University]:
+        query = db.query(models.University).filter(models.University.id.in_(ids))
+        if planned:
+            query = query.options(
+                *crud.loading_plan(models.University, schemas.University)
+            )
+        result = [schemas.University.from_orm(uni) for uni in query.all()]
+        db.expunge_all()
+        return result
+
+    for name, planned in [("lazy loading", False), ("loading plan", True)]:
+        statements.clear()
+        page(planned)
+        report(f"{name} ({len(statements)} queries)", measure(lambda: page(planned)))
+    db.rollback()
+
+
+if __name__ == "__main__":
+    main()
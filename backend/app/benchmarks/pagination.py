@@ -0,0 +1,77 @@
+""" Compares fetching the first and the last page of a large course catalog by
+    offset and by cursor, with another snapshot of the catalog in the database """
+import random
+
+from app import crud, models
+from app.db.session import SessionLocal
+from benchmarks import measure, report
+
+COURSES = 20000
+PAGE_SIZE = 100
+
+course = models.Course.__table__
+
+
+def main() -> None:
+    random.seed(0)
+    db = SessionLocal()
+    term = models.Term(id=random.randint(10 ** 6, 10 ** 9), name_translations={})
+    unis = [
+        models.University(name_translations={"en": f"Pagination benchmark {year}"})
+        for year in (2020, 2021)
+    ]
+    db.add_all([term, *unis])
+    db.flush()
+    for uni in unis:
+        db.execute(
+            course.insert(),
+            [
+                {
+                    "id": f"C{i:05}",
+                    "university_id": uni.id,
+                    "term_id": term.id,
+                    "course_credits": 2,
+                    "name_translations": {"en": f"Course {i}"},
+                    "extra_data": {},
+                }
+                for i in range(COURSES)
+            ],
+        )
+    db.connection().exec_driver_sql("ANALYZE course")
+    uni = unis[0]
+    query = db.query(models.Course).filter(models.Course.university_id == uni.id)
+    last_skip = COURSES - PAGE_SIZE
+    _, last_cursor = crud.course.get_page(
+        db, query=query, skip=last_skip - 1, limit=1
+    )
+    print(f"{COURSES} courses per university, pages of {PAGE_SIZE}")
+
+    def page(**kwargs):  # type: ignore
+        rows, _ = crud.course.get_page(db, query=query, limit=PAGE_SIZE, **kwargs)
+        assert len(rows) == PAGE_SIZE
+
+    report("first page: offset", measure(lambda: page(skip=0)))
+    report("last page: offset", measure(lambda: page(skip=last_skip)))
+    report("last page: cursor", measure(lambda: page(cursor=last_cursor)))
+
+    def crawl(by_cursor: bool) -> None:
+        cursor, skip = None, 0
+        while True:
+            rows, cursor = crud.course.get_page(
+                db,
+                query=query,
+                cursor=cursor if by_cursor else None,
+                skip=0 if by_cursor else skip,
+                limit=PAGE_SIZE,
+            )
+            skip += len(rows)
+            if cursor is None:
+                break
+
+    report("whole catalog: offset", measure(lambda: crawl(False), repeat=3))
+    report("whole catalog: cursor", measure(lambda: crawl(True), repeat=3))
+    db.rollback()
+
+
+if __name__ == "__main__":
+    main()
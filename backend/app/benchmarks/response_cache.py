@@ -0,0 +1,70 @@
+""" Compares serving a page of courses when it's serialized on every request, when
+    its serialized response is cached, and when the client revalidates it with
+    `If-None-Match`. As endpoints read committed data, the benchmark's university is
+    committed, and deleted afterwards. """
+import random
+
+from fastapi.testclient import TestClient
+
+from app import models
+from app.api.caching import response_cache
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.main import app
+from benchmarks import measure, report
+from benchmarks.fieldsets import extra_data
+
+COURSES = 2000
+PAGE_SIZE = 500
+
+course = models.Course.__table__
+
+
+def main() -> None:
+    random.seed(0)
+    db = SessionLocal()
+    uni = models.University(name_translations={"en": "Response cache benchmark"})
+    term = models.Term(id=random.randint(10 ** 6, 10 ** 9), name_translations={})
+    db.add_all([uni, term])
+    db.flush()
+    db.execute(
+        course.insert(),
+        [
+            {
+                "id": f"C{i:05}",
+                "university_id": uni.id,
+                "term_id": term.id,
+                "course_credits": 2,
+                "name_translations": {"en": f"Course {i}"},
+                "extra_data": extra_data(),
+            }
+            for i in range(COURSES)
+        ],
+    )
+    db.commit()
+    try:
+        client = TestClient(app)
+        url = f"{settings.API_V1_STR}/universities/{uni.id}/courses/"
+        params = {"limit": PAGE_SIZE}
+        r = client.get(url, params=params)
+        etag = r.headers["ETag"]
+        size = len(r.content) / 1024
+        print(f"{COURSES} courses, pages of {PAGE_SIZE} ({size:.0f}KiB)")
+
+        def uncached() -> None:
+            response_cache.clear()
+            client.get(url, params=params)
+
+        report("serialized", measure(uncached))
+        report("cached", measure(lambda: client.get(url, params=params)))
+        headers = {"If-None-Match": etag}
+        report("304", measure(lambda: client.get(url, params=params, headers=headers)))
+    finally:
+        db.execute(course.delete().where(course.c.university_id == uni.id))
+        db.delete(uni)
+        db.delete(term)
+        db.commit()
+
+
+if __name__ == "__main__":
+    main()
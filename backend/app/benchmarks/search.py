@@ -0,0 +1,75 @@
+""" Measures searches of course names over the synthetic catalog of
+    `benchmarks.search_dataset`, in English and Hebrew, by prefix and with typos """
+import random
+
+from app import models
+from app.db.base_class import table_of
+from app.db.session import SessionLocal
+from app.search import get_vocabulary, search_names
+from benchmarks import measure, report
+from benchmarks.search_dataset import course_names
+
+COURSES = 50000
+
+QUERIES = [
+    ("English word", "thermodynamics"),
+    ("English prefix", "cryp"),
+    ("English stem", "genetic"),
+    ("English typo", "psychollogy"),
+    ("English phrase", "advanced machine learning"),
+    ("rare word", "shalison"),
+    ("rare word typo", "shalisom"),
+    ("rare prefix", "shali"),
+    ("Hebrew word", "קריפטוגרפיה"),
+    ("Hebrew prefix letter", "לסטטיסטיקה"),
+    ("Hebrew phrase", "מבוא לוגיקה"),
+    ("Hebrew rare word", "שאליסון"),
+    ("course id", "142000"),
+]
+
+course = table_of(models.Course)
+
+
+def main() -> None:
+    random.seed(0)
+    db = SessionLocal()
+    uni = models.University(name_translations={"en": "Search benchmark"})
+    term = models.Term(id=random.randint(10 ** 6, 10 ** 9), name_translations={})
+    db.add_all([uni, term])
+    db.flush()
+    db.execute(
+        course.insert(),
+        [
+            {
+                "id": course_id,
+                "university_id": uni.id,
+                "term_id": term.id,
+                "course_credits": 2,
+                "name_translations": names,
+                "extra_data": {},
+            }
+            for course_id, names in course_names(COURSES)
+        ],
+    )
+    db.connection().exec_driver_sql("ANALYZE course")
+    print(f"{COURSES} courses")
+
+    report(
+        "load vocabulary",
+        measure(lambda: get_vocabulary(db, uni.id), repeat=1),
+    )
+    for name, query in QUERIES:
+        results = search_names(db, uni.id, query, ["course"])
+        report(
+            f"{name} ({len(results)} results)",
+            measure(lambda: search_names(db, uni.id, query, ["course"])),
+        )
+    report(
+        "all kinds: English word",
+        measure(lambda: search_names(db, uni.id, "thermodynamics")),
+    )
+    db.rollback()
+
+
+if __name__ == "__main__":
+    main()
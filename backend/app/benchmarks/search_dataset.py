@@ -0,0 +1,104 @@
+""" A synthetic, deterministic catalog of course names in English and Hebrew, for
+    benchmarking searches. Names combine a prefix, one or two subjects and an
+    optional suffix, each with its translation, e.g "Advanced Topics in Quantum
+    Mechanics 2" / "נושאים מתקדמים ב מכניקת קוונטים 2". Like real catalogs, many
+    names also have a rare word, such as a topic named after a person, which are
+    made up pseudo-words, transliterated into Hebrew. """
+import random
+from typing import Dict, Iterator, List, Tuple
+
+PREFIXES: List[Tuple[str, str]] = [
+    ("", ""),
+    ("Introduction to", "מבוא ל"),
+    ("Advanced Topics in", "נושאים מתקדמים ב"),
+    ("Seminar in", "סמינר ב"),
+    ("Workshop in", "סדנה ב"),
+    ("Foundations of", "יסודות"),
+    ("Selected Topics in", "נושאים נבחרים ב"),
+    ("Laboratory in", "מעבדה ב"),
+]
+
+SUBJECTS: List[Tuple[str, str]] = [
+    ("Calculus", "חשבון אינפיניטסימלי"),
+    ("Linear Algebra", "אלגברה לינארית"),
+    ("Probability", "הסתברות"),
+    ("Statistics", "סטטיסטיקה"),
+    ("Logic", "לוגיקה"),
+    ("Algorithms", "אלגוריתמים"),
+    ("Data Structures", "מבני נתונים"),
+    ("Databases", "מסדי נתונים"),
+    ("Operating Systems", "מערכות הפעלה"),
+    ("Computer Networks", "רשתות תקשורת"),
+    ("Machine Learning", "למידה חישובית"),
+    ("Computer Vision", "ראייה ממוחשבת"),
+    ("Cryptography", "קריפטוגרפיה"),
+    ("Compilers", "קומפילציה"),
+    ("Quantum Mechanics", "מכניקת קוונטים"),
+    ("Thermodynamics", "תרמודינמיקה"),
+    ("Organic Chemistry", "כימיה אורגנית"),
+    ("Genetics", "גנטיקה"),
+    ("Microbiology", "מיקרוביולוגיה"),
+    ("Neuroscience", "מדעי המוח"),
+    ("Economics", "כלכלה"),
+    ("Game Theory", "תורת המשחקים"),
+    ("Philosophy", "פילוסופיה"),
+    ("Ethics", "אתיקה"),
+    ("Linguistics", "בלשנות"),
+    ("Jewish History", "היסטוריה של עם ישראל"),
+    ("Archaeology", "ארכיאולוגיה"),
+    ("International Relations", "יחסים בינלאומיים"),
+    ("Psychology", "פסיכולוגיה"),
+    ("Sociology", "סוציולוגיה"),
+    ("Number Theory", "תורת המספרים"),
+    ("Topology", "טופולוגיה"),
+    ("Differential Equations", "משוואות דיפרנציאליות"),
+    ("Signal Processing", "עיבוד אותות"),
+    ("Control Theory", "תורת הבקרה"),
+    ("Electromagnetism", "אלקטרומגנטיות"),
+    ("Astrophysics", "אסטרופיזיקה"),
+    ("Ecology", "אקולוגיה"),
+    ("Public Law", "משפט ציבורי"),
+    ("Contract Law", "דיני חוזים"),
+]
+
+SYLLABLES = [
+    ("ka", "קא"), ("lo", "לו"), ("mi", "מי"), ("ra", "רא"), ("ten", "טן"),
+    ("vo", "וו"), ("sha", "שא"), ("dor", "דור"), ("bi", "בי"), ("nu", "נו"),
+    ("gal", "גל"), ("zi", "זי"), ("per", "פר"), ("ho", "הו"), ("li", "לי"),
+    ("tam", "תם"), ("ye", "יה"), ("son", "סון"), ("fa", "פא"), ("rel", "רל"),
+]
+RARE_TOPICS = [
+    ("{} Methods", "שיטות {}"),
+    ("The {} Problem", "בעיית {}"),
+    ("{} Theory", "תורת {}"),
+]
+# the share of names with a rare word
+RARE_SHARE = 0.6
+CONNECTORS = [(" and ", " ו"), (" for ", " עבור "), (" in ", " ב")]
+SUFFIXES = ["", "", " 1", " 2", " 3", " (Honors)"]
+
+
+def course_names(count: int, seed: int = 0) -> Iterator[Tuple[str, Dict[str, str]]]:
+    """ Yields `count` (course id, name translations) pairs """
+    rng = random.Random(seed)
+    for i in range(count):
+        prefix_en, prefix_he = rng.choice(PREFIXES)
+        subject_en, subject_he = rng.choice(SUBJECTS)
+        if rng.random() < 0.4:
+            other_en, other_he = rng.choice(SUBJECTS)
+            connector_en, connector_he = rng.choice(CONNECTORS)
+            subject_en += connector_en + other_en
+            subject_he += connector_he + other_he
+        if rng.random() < RARE_SHARE:
+            syllables = rng.choices(SYLLABLES, k=rng.randint(3, 4))
+            word_en = "".join(en for en, _ in syllables).capitalize()
+            word_he = "".join(he for _, he in syllables)
+            topic_en, topic_he = rng.choice(RARE_TOPICS)
+            subject_en += ": " + topic_en.format(word_en)
+            subject_he += ": " + topic_he.format(word_he)
+        suffix = rng.choice(SUFFIXES)
+        suffix_he = suffix.replace("(Honors)", "(מצטיינים)")
+        yield f"{i + 100000}", {
+            "en": f"{prefix_en} {subject_en}{suffix}".strip(),
+            "he": f"{prefix_he} {subject_he}{suffix_he}".strip(),
+        }
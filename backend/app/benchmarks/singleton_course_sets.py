@@ -0,0 +1,106 @@
+""" Compares the size of the course set tables and the time of queries joining
+    through them, before and after merging duplicate singleton course sets, on a
+    synthetic catalog whose tracks share many of their courses """
+import random
+
+from sqlalchemy import bindparam, func, select
+
+from app import models
+from app.db.base_class import table_of
+from app.db.session import SessionLocal
+from app.intern_singleton_course_sets import merge_singleton_sets
+from benchmarks import measure, report
+
+COURSES = 1000
+TRACKS = 100
+COURSES_PER_TRACK = 50
+
+courseset = table_of(models.CourseSet)
+membership = table_of(models.CourseSetMembership)
+coursesetnode = table_of(models.CourseSetNode)
+
+
+def legacy_singleton_node(course: models.Course) -> models.CourseSetNode:
+    """ A node with its own singleton set, as created before sets were interned """
+    course_set = models.CourseSet(
+        university=course.university, min_subset_size=1, max_subset_size=1
+    )
+    course_set.courses.append(course)
+    return models.CourseSetNode(university=course.university, course_set=course_set)
+
+
+def main() -> None:
+    random.seed(0)
+    db = SessionLocal()
+    uni = models.University(name_translations={"en": "Singleton sets benchmark"})
+    term = models.Term(id=random.randint(10 ** 6, 10 ** 9), name_translations={})
+    courses = [
+        models.Course(university=uni, id=f"C{i}", term=term, course_credits=2)
+        for i in range(COURSES)
+    ]
+    for i in range(TRACKS):
+        track = models.Track(
+            university=uni, id=f"T{i}", degree=models.DegreeType.Bachelors
+        )
+        root = models.DAGRootNode(university=uni, track=track)
+        root.children.extend(
+            legacy_singleton_node(course)
+            for course in random.sample(courses, COURSES_PER_TRACK)
+        )
+        db.add(root)
+    db.flush()
+    conn = db.connection()
+
+    # the courses of every course set node of the university
+    courses_query = (
+        select(coursesetnode.c.node_id, membership.c.course_id)
+        .join(courseset, courseset.c.id == coursesetnode.c.course_set_id)
+        .join(membership, membership.c.set_id == courseset.c.id)
+        .where(coursesetnode.c.university_id == uni.id)
+    )
+
+    # the nodes requiring a course, through its set memberships
+    nodes_query = (
+        select(coursesetnode.c.node_id)
+        .join(courseset, courseset.c.id == coursesetnode.c.course_set_id)
+        .join(membership, membership.c.set_id == courseset.c.id)
+        .where(
+            (membership.c.university_id == uni.id)
+            & (membership.c.course_id == bindparam("course_id"))
+        )
+    )
+
+    def run(name: str) -> None:
+        conn.exec_driver_sql("ANALYZE courseset, coursesetmembership, coursesetnode")
+        sets, members = (
+            conn.execute(
+                select(func.count())
+                .select_from(table)
+                .where(table.c.university_id == uni.id)
+            ).scalar()
+            for table in (courseset, membership)
+        )
+        print(f"{name}: {sets} course sets, {members} memberships")
+        report(
+            f"{name}: courses of nodes",
+            measure(lambda: conn.execute(courses_query).all()),
+        )
+        report(
+            f"{name}: nodes requiring 100 courses",
+            measure(
+                lambda: [
+                    conn.execute(nodes_query, {"course_id": f"C{i}"}).all()
+                    for i in range(100)
+                ]
+            ),
+        )
+
+    run("duplicates")
+    canonical, deleted = merge_singleton_sets(conn, uni.id)
+    print(f"merged into {canonical} canonical sets, deleted {deleted}")
+    run("interned")
+    db.rollback()
+
+
+if __name__ == "__main__":
+    main()